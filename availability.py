@@ -0,0 +1,465 @@
+"""
+Availability index - precomputed per-person free intervals for fast queries
+
+Both indexes are built from each person's busy fingerprint (merged busy
+intervals in minutes), and computing those is most of the cost of indexing
+a large file. They can be kept in a sidecar file next to the data file
+(`<data_file>.avail`): the distinct fingerprints, the number of each
+person's, and a hash of the snapshot and journal they were taken from.
+load_data seeds everyone's fingerprint from it when that hash matches what
+it just read, and ignores it otherwise.
+
+Saves and journal compactions rewrite an existing sidecar. Only
+load_availability(write_cache=True) creates one.
+"""
+
+import base64
+import json
+import os
+import sys
+
+from schedule import (
+    DAYS, MINUTES_PER_DAY, to_minutes, to_time, invert_minutes, intersect_intervals,
+    quorum_intervals, normalized_busy
+)
+from storage import load_data, snapshot_digest, get_fernet, decrypt_json_data
+from journal import snapshot_is_encrypted
+from instrumentation import timed, count
+
+CACHE_VERSION = 3
+
+
+class AvailabilityIndex:
+    """Keeps every distinct schedule's free intervals per day in memory.
+
+    People with identical busy patterns (same busy_fingerprint) share one
+    entry, so queries over a whole cohort only intersect the distinct
+    schedules. Intervals are stored in minutes for the index window
+    (`start`-`end`); queries may ask for any narrower window. A schedule's
+    intervals are computed the first time a query needs them.
+    """
+
+    def __init__(self, people_list=(), start="09:00", end="23:00"):
+        self.start = start
+        self.end = end
+        self.people = {}
+        self.fingerprints = {}  # name -> busy fingerprint
+        self.free = {}  # fingerprint -> {day: free intervals}, filled in by queries
+        self._refcounts = {}  # fingerprint -> people with it
+        self.update(people_list)
+
+    def _compute_free(self, fingerprint):
+        start_m, end_m = to_minutes(self.start), to_minutes(self.end)
+        busy = {}
+        for day, s, e in fingerprint:
+            busy.setdefault(day, []).append((s, e))
+        return {day: invert_minutes(busy.get(day, ()), start_m, end_m) for day in DAYS}
+
+    def _release(self, fingerprint):
+        self._refcounts[fingerprint] -= 1
+        if not self._refcounts[fingerprint]:
+            del self._refcounts[fingerprint]
+            self.free.pop(fingerprint, None)
+
+    def compute_free(self, people_list):
+        """{fingerprint: free intervals per day} for the schedules in people_list
+        the index has not computed yet, to pass to update(). Only reads the
+        index, so it can run while other threads query it."""
+        free = {}
+        for person in people_list:
+            fingerprint = person.busy_fingerprint()
+            if fingerprint not in free and fingerprint not in self.free:
+                free[fingerprint] = self._compute_free(fingerprint)
+        return free
+
+    def update(self, people_list, free=None):
+        """Bring the index in line with people_list, recomputing only changed people.
+
+        `free` may hold precomputed intervals from compute_free(). Returns
+        (added, changed, removed) name lists.
+        """
+        added, changed = [], []
+        seen = set()
+        for person in people_list:
+            seen.add(person.name)
+            fingerprint = person.busy_fingerprint()
+            old_fingerprint = self.fingerprints.get(person.name)
+            self.people[person.name] = person
+            if old_fingerprint == fingerprint:
+                continue
+            if old_fingerprint is None:
+                added.append(person.name)
+            else:
+                changed.append(person.name)
+                self._release(old_fingerprint)
+
+            self.fingerprints[person.name] = fingerprint
+            self._refcounts[fingerprint] = self._refcounts.get(fingerprint, 0) + 1
+            if free and fingerprint in free:
+                self.free.setdefault(fingerprint, free[fingerprint])
+
+        removed = [name for name in self.people if name not in seen]
+        for name in removed:
+            del self.people[name]
+            self._release(self.fingerprints.pop(name))
+        return added, changed, removed
+
+    def names(self):
+        """All indexed names in insertion order"""
+        return list(self.people)
+
+    def unique_count(self):
+        """Number of distinct schedules in the index"""
+        return len(self._refcounts)
+
+    def _free_lists(self, names, day):
+        """([free intervals], [people per entry]) for the distinct schedules among names"""
+        if names is None:
+            names = self.people
+        missing = [name for name in names if name not in self.fingerprints]
+        if missing:
+            raise KeyError(f"Unknown people: {', '.join(missing)}")
+        weights = {}
+        for name in names:
+            fingerprint = self.fingerprints[name]
+            weights[fingerprint] = weights.get(fingerprint, 0) + 1
+        free_lists = []
+        for fingerprint in weights:
+            free = self.free.get(fingerprint)
+            if free is None:
+                free = self.free[fingerprint] = self._compute_free(fingerprint)
+            free_lists.append(free[day])
+        return free_lists, list(weights.values())
+
+    def _window(self, start, end):
+        start_m = to_minutes(start or self.start)
+        end_m = to_minutes(end or self.end)
+        if start_m < to_minutes(self.start) or end_m > to_minutes(self.end):
+            raise ValueError(
+                f"Window must lie within {self.start}-{self.end}"
+            )
+        return [(start_m, end_m)]
+
+    def common(self, names, day, start=None, end=None):
+        """Common free (start, end) times for the named people on a day"""
+        free_lists, _ = self._free_lists(names, day)
+        common = self._window(start, end)
+        for free in free_lists:
+            common = intersect_intervals(common, free)
+            if not common:
+                break
+        return [(to_time(s), to_time(e)) for s, e in common]
+
+    def quorum(self, names, day, min_count, start=None, end=None):
+        """(start, end, count) times when at least min_count of the people are free"""
+        free_lists, weights = self._free_lists(names, day)
+        window = self._window(start, end)
+        clipped = [intersect_intervals(window, free) for free in free_lists]
+        return [
+            (to_time(s), to_time(e), count)
+            for s, e, count in quorum_intervals(clipped, min_count, weights)
+        ]
+
+
+def bit_indices(mask):
+    """Positions of the set bits of a (possibly very wide) int, in ascending order"""
+    # bin() is linear in the width; peeling bits off one by one would be quadratic
+    return [i for i, bit in enumerate(reversed(bin(mask)[2:])) if bit == "1"]
+
+
+def indices_to_mask(indices):
+    """Int with the given bit positions set, built in one pass"""
+    indices = list(indices)
+    if not indices:
+        return 0
+    if len(indices) < 64:
+        mask = 0
+        for i in indices:
+            mask |= 1 << i
+        return mask
+    bitmap = bytearray(max(indices) // 8 + 1)
+    for i in indices:
+        bitmap[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bitmap, "little")
+
+
+class FreeAtIndex:
+    """Answers "who is free for the whole of <day> <start>-<end>" for everyone.
+
+    Each day is cut into `step`-minute buckets and every bucket holds a bitset
+    of the people whose busy slots touch it. A query ORs the buckets that lie
+    completely inside the window and checks only the people in the two
+    partly covered edge buckets against their exact busy times.
+    """
+
+    def __init__(self, people_list=(), step=10):
+        self.step = step
+        self.bucket_count = -(-MINUTES_PER_DAY // step)
+        self.touched = {day: [0] * self.bucket_count for day in DAYS}
+        self.names = []  # bit position -> name, None once removed
+        self.positions = {}  # name -> bit position
+        self.busy = []  # bit position -> {day: [(start_m, end_m)]}
+        self.alive = 0
+        self._keys = {}
+        self.update(people_list)
+
+    def update(self, people_list):
+        """Bring the index in line with people_list, touching only changed people.
+
+        Returns (added, changed, removed) name lists.
+        """
+        added, changed = [], []
+        seen = set()
+        # (day, start, end) -> positions. Many people share the same course
+        # slots, so each distinct interval's bitset is built once and ORed
+        # into its buckets at the end.
+        to_clear, to_set = {}, {}
+
+        def forget(position):
+            for day, intervals in self.busy[position].items():
+                for s, e in intervals:
+                    to_clear.setdefault((day, s, e), []).append(position)
+
+        for person in people_list:
+            seen.add(person.name)
+            # Merged busy intervals in minutes: the buckets they touch and the
+            # overlaps they have are the same as for the raw slots
+            fingerprint = person.busy_fingerprint()
+            if self._keys.get(person.name) == fingerprint:
+                continue
+            self._keys[person.name] = fingerprint
+
+            position = self.positions.get(person.name)
+            if position is None:
+                added.append(person.name)
+                position = len(self.names)
+                self.names.append(person.name)
+                self.busy.append({})
+                self.positions[person.name] = position
+            else:
+                changed.append(person.name)
+                forget(position)
+
+            busy = {}
+            for day, s, e in fingerprint:
+                if day not in self.touched:
+                    continue
+                busy.setdefault(day, []).append((s, e))
+                to_set.setdefault((day, s, e), []).append(position)
+            self.busy[position] = busy
+
+        removed = [name for name in self.positions if name not in seen]
+        for name in removed:
+            position = self.positions.pop(name)
+            del self._keys[name]
+            forget(position)
+            self.names[position] = None
+            self.busy[position] = {}
+
+        for (day, s, e), positions in to_clear.items():
+            keep = ~indices_to_mask(positions)
+            buckets = self.touched[day]
+            for bucket in self._bucket_range(s, e):
+                buckets[bucket] &= keep
+        for (day, s, e), positions in to_set.items():
+            mask = indices_to_mask(positions)
+            buckets = self.touched[day]
+            for bucket in self._bucket_range(s, e):
+                buckets[bucket] |= mask
+        if added or removed:
+            self.alive = indices_to_mask(self.positions.values())
+        return added, changed, removed
+
+    def _bucket_range(self, s, e):
+        """Buckets touched by the interval [s, e)"""
+        return range(s // self.step, min(-(-e // self.step), self.bucket_count))
+
+    def free_at(self, day, start, end, names=None):
+        """Names of the people free for the whole of [start, end) on day"""
+        if day not in self.touched:
+            raise ValueError(f"Unknown day: {day}")
+        start_m, end_m = to_minutes(start), to_minutes(end)
+        if end_m <= start_m:
+            raise ValueError("End time must be after start time")
+
+        candidates = self.alive
+        if names is not None:
+            missing = [name for name in names if name not in self.positions]
+            if missing:
+                raise KeyError(f"Unknown people: {', '.join(missing)}")
+            candidates &= indices_to_mask(self.positions[name] for name in names)
+
+        buckets = self.touched[day]
+        first = start_m // self.step
+        last = min((end_m - 1) // self.step, self.bucket_count - 1)
+        inner_first = first if start_m % self.step == 0 else first + 1
+        inner_last = last if end_m % self.step == 0 else last - 1
+
+        busy = 0
+        for bucket in range(inner_first, inner_last + 1):
+            busy |= buckets[bucket]
+        candidates &= ~busy
+
+        # Edge buckets are only partly inside the window: check exactly
+        edges = {first, last} - set(range(inner_first, inner_last + 1))
+        edge_people = 0
+        for bucket in edges:
+            edge_people |= buckets[bucket]
+        for position in bit_indices(edge_people & candidates):
+            for s, e in self.busy[position].get(day, ()):
+                if s < end_m and e > start_m:
+                    candidates &= ~(1 << position)
+                    break
+
+        return [self.names[position] for position in bit_indices(candidates)]
+
+
+def availability_cache_path(data_file):
+    return f"{data_file}.avail"
+
+
+def read_availability_cache(data_file):
+    """The sidecar's contents, or None if it is missing or unusable"""
+    try:
+        with open(availability_cache_path(data_file), "r") as file:
+            content = file.read().strip()
+        data = json.loads(content) if content.startswith("{") else decrypt_json_data(content)
+    except Exception:
+        # Missing, half-written or written with another key: it is ignored
+        return None
+    if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+        return None
+    return data
+
+
+def seed_cached_fingerprints(cache, people_list):
+    """Give everyone their busy fingerprint from the sidecar.
+
+    Only called once the sidecar's source hash matched the data just loaded,
+    so people are in the order the sidecar was written in.
+    """
+    days = cache["days"]
+    schedules = cache["schedules"]
+    numbers = cache["people"]
+    if len(numbers) != len(people_list):
+        return False
+    decoded = {}
+    for person, number in zip(people_list, numbers):
+        fingerprint = decoded.get(number)
+        if fingerprint is None:
+            flat = schedules[number]
+            fingerprint = decoded[number] = tuple(
+                zip(map(days.__getitem__, flat[0::3]), flat[1::3], flat[2::3])
+            )
+        person.seed_busy_fingerprint(fingerprint)
+    count("availability.cache_hit", len(people_list))
+    return True
+
+
+def saved_fingerprints(people_list, courses):
+    """Everyone's busy fingerprint as it will be after saving and reloading,
+    in people_list order. Personal periods are not saved, so people with one
+    are fingerprinted from their courses alone."""
+    course_ids = {id(slots) for slots in courses.values()}
+    fingerprints = []
+    for person in people_list:
+        if all(id(group) in course_ids for group in person.schedule):
+            fingerprints.append(person.busy_fingerprint())
+        else:
+            fingerprints.append(normalized_busy(
+                (slot.start_time, slot.end_time, slot.day)
+                for group in person.schedule if id(group) in course_ids
+                for slot in group
+            ))
+    return fingerprints
+
+
+def cache_fingerprints(data_file, people_list, courses):
+    """saved_fingerprints for a save of data_file, or None if it has no sidecar to update"""
+    if not os.path.exists(availability_cache_path(data_file)):
+        return None
+    return saved_fingerprints(people_list, courses)
+
+
+def write_availability_cache(data_file, source, fingerprints):
+    """Write the sidecar (encrypted if data_file is).
+
+    `source` is the hash of the data the fingerprints (one per person, in
+    file order) were taken from; see storage.load_data. Distinct fingerprints
+    are stored once, as flat [day number, start, end, ...] lists, and each
+    person as the number of theirs.
+    """
+    days = list(DAYS)
+    day_numbers = {day: number for number, day in enumerate(days)}
+    numbers = {}
+    schedules = []
+    people = []
+    for fingerprint in fingerprints:
+        number = numbers.get(fingerprint)
+        if number is None:
+            number = numbers[fingerprint] = len(schedules)
+            flat = []
+            for day, s, e in fingerprint:
+                if day not in day_numbers:
+                    day_numbers[day] = len(days)
+                    days.append(day)
+                flat.extend((day_numbers[day], s, e))
+            schedules.append(flat)
+        people.append(number)
+    data = {
+        "version": CACHE_VERSION,
+        "source": source,
+        "days": days,
+        "schedules": schedules,
+        "people": people,
+    }
+    # Compact JSON, encrypted the way decrypt_json_data expects if the data file is
+    content = json.dumps(data, separators=(",", ":"))
+    if snapshot_is_encrypted(data_file):
+        content = base64.b64encode(get_fernet().encrypt(content.encode())).decode()
+    path = availability_cache_path(data_file)
+    temp_file = f"{path}.tmp"
+    with open(temp_file, "w") as file:
+        file.write(content)
+    os.replace(temp_file, path)
+
+
+@timed("availability.refresh_availability_cache")
+def refresh_availability_cache(data, data_file, content, fingerprints=None):
+    """Update an existing sidecar after data (build_save_data's result) was
+    written to data_file as content. Without fingerprints they are computed
+    from data. Does nothing if there is no sidecar; errors are reported, not
+    raised, as they only cost the next load some recomputation."""
+    if not os.path.exists(availability_cache_path(data_file)):
+        return
+    try:
+        if fingerprints is None:
+            course_rows = data["courses"]
+            fingerprints = [
+                normalized_busy(row for course in course_names for row in course_rows[course])
+                for course_names in data["people"].values()
+            ]
+        write_availability_cache(data_file, snapshot_digest(content).hexdigest(), fingerprints)
+    except Exception as e:
+        print(f"Could not update availability cache: {e}", file=sys.stderr)
+
+
+@timed("availability.load_availability")
+def load_availability(data_file, write_cache=False):
+    """load_data(data_file), which seeds busy fingerprints from an up-to-date
+    sidecar. With write_cache, a missing or stale sidecar is (re)written from
+    the data just loaded; otherwise the sidecar is only read."""
+    if not write_cache:
+        return load_data(data_file)
+    digest = snapshot_digest("")
+    people_list, courses = load_data(data_file, digest)
+    if os.path.exists(data_file):
+        source = digest.hexdigest()
+        cache = read_availability_cache(data_file)
+        if cache is None or cache["source"] != source:
+            fingerprints = [person.busy_fingerprint() for person in people_list]
+            try:
+                write_availability_cache(data_file, source, fingerprints)
+            except OSError as e:
+                print(f"Could not write availability cache: {e}", file=sys.stderr)
+    return people_list, courses
@@ -0,0 +1,7 @@
+"""
+Benchmarks for the schedule and storage hot paths
+
+Run from the repository root:
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --baseline results.json --threshold 0.2
+"""
@@ -0,0 +1,260 @@
+"""
+Synthetic dataset generator - NTHU-style courses, enrollments and ICS files
+
+Usage (from the repository root):
+    python -m benchmarks.datagen --students 50000 --courses 2000 \\
+        --output data/schedule_data.json [--encrypted] \\
+        [--ics-dir data/ics --ics-limit 500] [--seed 1]
+
+Output is deterministic for a given seed. Students are generated one at a
+time and the JSON file is written entry by entry as they are drawn, so large
+cohorts never need every enrollment or the whole document in memory (the
+encrypted variant has to be assembled before encryption). Course names use
+the "Name (code)" form produced by storage.import_ics_file, and the ICS
+files use folded DESCRIPTION lines with a courses/<code> link so importing
+them reproduces the same course names.
+"""
+
+import argparse
+import base64
+import io
+import itertools
+import json
+import os
+import random
+import sys
+from bisect import bisect
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+from schedule import DAYS
+
+# NTHU class periods as (start, end) in 24-hour time
+PERIODS = [
+    ("08:00", "08:50"), ("09:00", "09:50"), ("10:10", "11:00"),
+    ("11:10", "12:00"), ("13:20", "14:10"), ("14:20", "15:10"),
+    ("15:30", "16:20"), ("16:30", "17:20"), ("17:30", "18:20"),
+    ("18:30", "19:20"), ("19:30", "20:20"),
+]
+
+DEPARTMENTS = ["CS", "EE", "MATH", "PHYS", "CHEM", "ME", "ECON", "LANG", "HIS", "PE"]
+SUBJECTS = [
+    "Calculus", "Linear Algebra", "Data Structures", "Algorithms", "Physics",
+    "Chemistry", "Economics", "English", "History", "Physical Education",
+    "Signals and Systems", "Thermodynamics", "Statistics", "Operating Systems",
+]
+SEMESTER = "11410"
+
+# parse_ics_datetime converts UTC to Taipei (+8h) and then shifts one day
+# forward, so events are written 1 day 8 hours earlier than they should read
+ICS_WEEK_START = datetime(2025, 9, 1) - timedelta(days=1, hours=8)
+
+
+def parse_range(text):
+    """Parse "4-8" or "5" into an inclusive (low, high) tuple"""
+    low, _, high = text.partition("-")
+    return int(low), int(high or low)
+
+
+def generate_catalogue(rng, course_count, sections=(1, 3), meetings=(2, 3)):
+    """Create course sections.
+
+    Returns a list of base courses; each is a list of section dicts with
+    "title", "code", "name" ("Title (code)") and "slots" [(start, end, day)].
+    """
+    catalogue = []
+    for i in range(course_count):
+        department = DEPARTMENTS[i % len(DEPARTMENTS)]
+        title = f"{rng.choice(SUBJECTS)} {i // len(SUBJECTS) + 1}"
+        number = 100 + i
+        course_sections = []
+        for section in range(1, rng.randint(*sections) + 1):
+            code = f"{SEMESTER}{department}{number:04d}{section:02d}"
+            # Distinct weekday periods so a section never repeats a meeting
+            times = rng.sample(range(len(PERIODS) * 5), rng.randint(*meetings))
+            slots = [PERIODS[t % len(PERIODS)] + (DAYS[t // len(PERIODS)],) for t in times]
+            course_sections.append({
+                "title": title,
+                "code": code,
+                "name": f"{title} ({code})",
+                "slots": slots,
+            })
+        catalogue.append(course_sections)
+    return catalogue
+
+
+def generate_enrollments(rng, catalogue, student_count, per_student=(4, 8), skew=1.0,
+                         max_draws=50):
+    """Yield (student name, [section dicts]) for every student.
+
+    Course popularity follows a Zipf-like distribution controlled by `skew`
+    (0 = uniform); each enrolled course picks one of its sections uniformly
+    among those that do not clash with the student's timetable so far. A
+    course with no such section is skipped and another one drawn; after
+    `max_draws` draws the student keeps the courses found so far.
+    """
+    weights = [1 / (rank + 1) ** skew for rank in range(len(catalogue))]
+    cumulative = list(itertools.accumulate(weights))
+    total = cumulative[-1]
+
+    for i in range(student_count):
+        wanted = min(rng.randint(*per_student), len(catalogue))
+        chosen = {}
+        busy = set()  # (start, day) of taken periods; slots never straddle periods
+        for _ in range(max_draws):
+            if len(chosen) == wanted:
+                break
+            index = bisect(cumulative, rng.random() * total)
+            if index in chosen:
+                continue
+            fits = [
+                section for section in catalogue[index]
+                if not any((start, day) in busy for start, _, day in section["slots"])
+            ]
+            if fits:
+                section = rng.choice(fits)
+                chosen[index] = section
+                busy.update((start, day) for start, _, day in section["slots"])
+        sections = [chosen[index] for index in sorted(chosen)]
+        yield f"Student {i:06d}", sections
+
+
+def iter_json_chunks(catalogue, enrollments):
+    """Yield the data file as JSON text chunks in storage.save_data's layout"""
+    yield '{\n  "courses": {'
+    first = True
+    for course_sections in catalogue:
+        for section in course_sections:
+            slots = json.dumps([list(slot) for slot in section["slots"]])
+            yield f'{"" if first else ","}\n    {json.dumps(section["name"])}: {slots}'
+            first = False
+    yield '\n  },\n  "people": {'
+    first = True
+    for name, sections in enrollments:
+        names = json.dumps([section["name"] for section in sections])
+        yield f'{"" if first else ","}\n    {json.dumps(name)}: {names}'
+        first = False
+    yield "\n  }\n}\n"
+
+
+def write_schedule_json(path, catalogue, enrollments, encrypted=False):
+    """Write schedule_data.json, plain (streamed) or encrypted"""
+    if not encrypted:
+        with open(path, "w") as f:
+            for chunk in iter_json_chunks(catalogue, enrollments):
+                f.write(chunk)
+        return
+
+    # Fernet tokens cover the whole payload, so it is assembled first
+    from storage import get_fernet
+    buffer = io.StringIO()
+    for chunk in iter_json_chunks(catalogue, enrollments):
+        buffer.write(chunk)
+    token = get_fernet().encrypt(buffer.getvalue().encode())
+    with open(path, "w") as f:
+        f.write(base64.b64encode(token).decode())
+
+
+def fold_ics_line(line, width=75):
+    """Fold a content line RFC 5545 style (continuations start with a space)"""
+    if len(line) <= width:
+        return [line]
+    parts = [line[:width]]
+    for i in range(width, len(line), width - 1):
+        parts.append(" " + line[i:i + width - 1])
+    return parts
+
+
+def ics_content(sections, weeks=1):
+    """Build an ICS calendar with one event per meeting per week"""
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//NTHU Time Sync//datagen//EN"]
+    for week in range(weeks):
+        for section in sections:
+            link = f"https://www.ccxp.nthu.edu.tw/courses/{quote(section['code'])}"
+            description = f"{section['title']}\\nSection {section['code'][-2:]}\\n{link}"
+            for start, end, day in section["slots"]:
+                day_start = ICS_WEEK_START + timedelta(days=7 * week + DAYS.index(day))
+                start_dt = day_start + timedelta(hours=int(start[:2]), minutes=int(start[3:]))
+                end_dt = day_start + timedelta(hours=int(end[:2]), minutes=int(end[3:]))
+                lines += [
+                    "BEGIN:VEVENT",
+                    f"DTSTART:{start_dt:%Y%m%dT%H%M%S}Z",
+                    f"DTEND:{end_dt:%Y%m%dT%H%M%S}Z",
+                    f"SUMMARY:{section['title']}",
+                ]
+                lines += fold_ics_line(f"DESCRIPTION:{description}")
+                lines.append("END:VEVENT")
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(lines) + "\r\n"
+
+
+def write_ics_files(directory, enrollments, limit=None, weeks=1):
+    """Write <student>.ics files for the first `limit` students"""
+    os.makedirs(directory, exist_ok=True)
+    count = 0
+    for name, sections in itertools.islice(enrollments, limit):
+        path = os.path.join(directory, f"{name}.ics")
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(ics_content(sections, weeks))
+        count += 1
+    return count
+
+
+def draw(args):
+    """(catalogue, enrollment generator) for parsed arguments.
+
+    Each call starts again from the seed, so every call yields the same
+    students; outputs each draw their own instead of holding all of them.
+    """
+    rng = random.Random(args.seed)
+    catalogue = generate_catalogue(
+        rng, args.courses, parse_range(args.sections), parse_range(args.meetings)
+    )
+    enrollments = generate_enrollments(
+        rng, catalogue, args.students, parse_range(args.per_student), args.skew
+    )
+    return catalogue, enrollments
+
+
+def generate(args, out=sys.stderr):
+    """Generate the requested outputs from parsed arguments"""
+    if args.output:
+        catalogue, enrollments = draw(args)
+        section_count = sum(len(sections) for sections in catalogue)
+        write_schedule_json(args.output, catalogue, enrollments, args.encrypted)
+        out.write(
+            f"wrote {args.output}: {args.students} students, {section_count} sections"
+            f"{' (encrypted)' if args.encrypted else ''}\n"
+        )
+    if args.ics_dir:
+        # Drawn again from the seed, so the ICS files match the JSON file
+        _, enrollments = draw(args)
+        count = write_ics_files(args.ics_dir, enrollments, args.ics_limit, args.weeks)
+        out.write(f"wrote {count} ICS files to {args.ics_dir}\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic schedule datasets")
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--courses", type=int, default=200, help="number of base courses")
+    parser.add_argument("--sections", default="1-3", help="sections per course, e.g. 1-3")
+    parser.add_argument("--meetings", default="2-3", help="weekly meetings per section")
+    parser.add_argument("--per-student", default="4-8", help="courses per student")
+    parser.add_argument("--skew", type=float, default=1.0,
+                        help="course popularity skew (0 = uniform)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="schedule data JSON file to write")
+    parser.add_argument("--encrypted", action="store_true", help="encrypt the JSON file")
+    parser.add_argument("--ics-dir", help="directory for per-student .ics files")
+    parser.add_argument("--ics-limit", type=int, help="only write ICS for the first N students")
+    parser.add_argument("--weeks", type=int, default=1, help="weeks of events per ICS file")
+    args = parser.parse_args(argv)
+
+    if not args.output and not args.ics_dir:
+        parser.error("nothing to do: pass --output and/or --ics-dir")
+    generate(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
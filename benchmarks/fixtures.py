@@ -0,0 +1,63 @@
+"""
+Deterministic in-memory datasets for the benchmarks
+"""
+
+import random
+
+from models import Person, intern_time_slot
+from schedule import DAYS
+from benchmarks.datagen import (
+    PERIODS, generate_catalogue, generate_enrollments, ics_content
+)
+
+
+def make_dataset(people_count, courses_per_person=6, seed=0):
+    """Return (people_list, courses) with a course catalogue scaled to the cohort"""
+    rng = random.Random(seed)
+    catalogue = generate_catalogue(rng, max(20, people_count // 10))
+
+    courses = {}
+    for course_sections in catalogue:
+        for section in course_sections:
+            courses[section["name"]] = [intern_time_slot(*slot) for slot in section["slots"]]
+
+    people = []
+    per_student = (courses_per_person, courses_per_person)
+    for name, sections in generate_enrollments(rng, catalogue, people_count, per_student):
+        people.append(Person(name, [courses[section["name"]] for section in sections]))
+    return people, courses
+
+
+def make_cohort(people_count, programmes=None, courses_per_person=6, seed=0):
+    """Like make_dataset, but students in the same programme share one course set"""
+    if programmes is None:
+        programmes = max(1, people_count // 50)
+    base, courses = make_dataset(programmes, courses_per_person, seed)
+    people = [
+        Person(f"Student {i:06d}", list(base[i % programmes].schedule))
+        for i in range(people_count)
+    ]
+    return people, courses
+
+
+def make_busy_slots(count, rng):
+    """Busy (start, end, day) tuples in busy_time format"""
+    slots = []
+    for _ in range(count):
+        start, end = rng.choice(PERIODS)
+        slots.append((start, end, rng.choice(DAYS)))
+    return slots
+
+
+def make_intervals(count, rng):
+    """Sorted, non-overlapping (start, end) intervals"""
+    points = sorted(rng.sample(range(count * 10), count * 2))
+    return [(points[i], points[i + 1]) for i in range(0, len(points), 2)]
+
+
+def make_ics_content(event_count, seed=0):
+    """ICS text (LF line endings, as read from disk) with about `event_count` events"""
+    rng = random.Random(seed)
+    catalogue = generate_catalogue(rng, max(1, event_count // 2), sections=(1, 1), meetings=(2, 2))
+    sections = [course_sections[0] for course_sections in catalogue]
+    return ics_content(sections).replace("\r\n", "\n")
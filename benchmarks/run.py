@@ -0,0 +1,250 @@
+"""
+Benchmark runner - times schedule and storage functions at several dataset sizes
+
+Usage (from the repository root):
+    python -m benchmarks.run [--sizes 100,1000,5000] [--repeat 5]
+                             [--output results.json]
+                             [--baseline baseline.json --threshold 0.2]
+
+Results are written as JSON. With --baseline, any benchmark whose median is
+more than `threshold` slower than the baseline median is reported and the
+runner exits with status 1.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from schedule import (
+    common_free_times, clear_free_times_cache, quorum_free_times, invert_busy,
+    intersect_intervals
+)
+from storage import (
+    parse_ics_content, import_ics_file, load_data, save_data, save_data_encrypted
+)
+from benchmarks.fixtures import (
+    make_dataset, make_cohort, make_busy_slots, make_intervals, make_ics_content
+)
+
+# name -> factory(size, workdir) returning (func, reset or None)
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a benchmark factory under a name"""
+    def register(factory):
+        BENCHMARKS[name] = factory
+        return factory
+    return register
+
+
+@benchmark("invert_busy")
+def bench_invert_busy(size, workdir):
+    # One person with `size` busy slots spread over the week
+    busy = make_busy_slots(size, random.Random(size))
+    return (lambda: invert_busy(busy, "Monday", "00:00", "23:59")), None
+
+
+@benchmark("intersect_intervals")
+def bench_intersect_intervals(size, workdir):
+    rng = random.Random(size)
+    first = make_intervals(size, rng)
+    second = make_intervals(size, rng)
+    return (lambda: intersect_intervals(first, second)), None
+
+
+@benchmark("common_free_times")
+def bench_common_free_times(size, workdir):
+    people, _ = make_dataset(size)
+    return (lambda: common_free_times(people, "Monday")), clear_free_times_cache
+
+
+@benchmark("common_free_times_cohort")
+def bench_common_free_times_cohort(size, workdir):
+    # Whole class year: about 50 students per identical course set
+    people, _ = make_cohort(size)
+    return (lambda: common_free_times(people, "Monday")), clear_free_times_cache
+
+
+@benchmark("common_free_times_repeat")
+def bench_common_free_times_repeat(size, workdir):
+    # The same query again with nothing changed (switching back to a day)
+    people, _ = make_dataset(size)
+    return (lambda: common_free_times(people, "Monday")), None
+
+
+@benchmark("quorum_free_times_cohort")
+def bench_quorum_free_times_cohort(size, workdir):
+    people, _ = make_cohort(size)
+    return (lambda: quorum_free_times(people, "Monday", max(1, size // 2))), None
+
+
+@benchmark("parse_ics_content")
+def bench_parse_ics_content(size, workdir):
+    content = make_ics_content(size)
+    return (lambda: parse_ics_content(content)), None
+
+
+@benchmark("import_ics_file")
+def bench_import_ics_file(size, workdir):
+    # Import a 40-event calendar into a dataset of `size` people
+    path = os.path.join(workdir, f"import_{size}.ics")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(make_ics_content(40))
+
+    state = {}
+
+    def reset():
+        state["people"], state["courses"] = make_dataset(size)
+
+    def run():
+        import_ics_file(path, state["courses"], "New Student", state["people"])
+
+    return run, reset
+
+
+@benchmark("load_data")
+def bench_load_data(size, workdir):
+    path = os.path.join(workdir, f"plain_{size}.json")
+    people, courses = make_dataset(size)
+    save_data(people, courses, path)
+    return (lambda: load_data(path)), None
+
+
+@benchmark("load_data_encrypted")
+def bench_load_data_encrypted(size, workdir):
+    path = os.path.join(workdir, f"encrypted_{size}.json")
+    people, courses = make_dataset(size)
+    save_data_encrypted(people, courses, path)
+    return (lambda: load_data(path)), None
+
+
+@benchmark("save_data")
+def bench_save_data(size, workdir):
+    path = os.path.join(workdir, f"save_{size}.json")
+    people, courses = make_dataset(size)
+    return (lambda: save_data(people, courses, path)), None
+
+
+@benchmark("save_data_encrypted")
+def bench_save_data_encrypted(size, workdir):
+    path = os.path.join(workdir, f"save_encrypted_{size}.json")
+    people, courses = make_dataset(size)
+    return (lambda: save_data_encrypted(people, courses, path)), None
+
+
+def measure(func, reset=None, repeat=5, min_time=0.05):
+    """Return per-call timings (seconds) for `repeat` rounds.
+
+    Functions without a reset step are looped until a round takes at least
+    `min_time`; functions with one are timed one call per round.
+    """
+    number = 1
+    if reset is None:
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            if time.perf_counter() - start >= min_time:
+                break
+            number *= 2
+
+    timings = []
+    for _ in range(repeat):
+        if reset is not None:
+            reset()
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return timings
+
+
+def run_benchmarks(sizes, repeat, names=None, out=sys.stdout):
+    """Run the selected benchmarks and return the results dict"""
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, factory in BENCHMARKS.items():
+            if names and name not in names:
+                continue
+            for size in sizes:
+                func, reset = factory(size, workdir)
+                timings = measure(func, reset, repeat)
+                key = f"{name}[n={size}]"
+                results[key] = {
+                    "benchmark": name,
+                    "size": size,
+                    "best": min(timings),
+                    "median": statistics.median(timings),
+                    "timings": timings,
+                }
+                out.write(f"{key:40} median {results[key]['median'] * 1000:10.3f} ms"
+                          f"   best {results[key]['best'] * 1000:10.3f} ms\n")
+                out.flush()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return a list of (key, baseline median, current median) regressions"""
+    regressions = []
+    for key, result in results.items():
+        previous = baseline.get("results", {}).get(key)
+        if previous and result["median"] > previous["median"] * (1 + threshold):
+            regressions.append((key, previous["median"], result["median"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run schedule/storage benchmarks")
+    parser.add_argument("--sizes", default="100,1000,5000",
+                        help="comma-separated dataset sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="rounds per benchmark")
+    parser.add_argument("--only", help="comma-separated benchmark names to run")
+    parser.add_argument("--output", help="write results JSON to this file")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown before reporting a regression (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    names = set(args.only.split(",")) if args.only else None
+    unknown = (names or set()) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    results = run_benchmarks(sizes, args.repeat, names)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for key, before, after in regressions:
+            print(f"REGRESSION {key}: {before * 1000:.3f} ms -> {after * 1000:.3f} ms "
+                  f"({(after / before - 1) * 100:+.0f}%)")
+        if regressions:
+            return 1
+        print(f"No regressions over {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,378 @@
+"""
+Command-line interface - non-interactive subcommands for scripted use
+
+Loads the data file once, writes results to stdout and never imports the GUI,
+so it can run from cron jobs and shell pipelines.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from storage import (
+    load_data, save_data, save_data_encrypted, is_encrypted_json, build_save_data
+)
+from datastore import DataStore
+from schedule import DAYS, common_free_times
+
+
+def parse_people(people_list, names_arg):
+    """Resolve a comma-separated list of names to Person objects"""
+    if not names_arg:
+        return people_list
+
+    by_name = {person.name: person for person in people_list}
+    selected = []
+    for name in names_arg.split(","):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in by_name:
+            raise ValueError(f"Person '{name}' not found")
+        selected.append(by_name[name])
+    return selected
+
+
+def source_saver(filename):
+    """Save function that writes the data file back in the format it was read in"""
+    if os.path.exists(filename) and is_encrypted_json(filename):
+        return save_data_encrypted
+    return save_data
+
+
+def cmd_common(args, out):
+    """Print common free times for the selected people"""
+    from availability import load_availability
+    people_list, _ = load_availability(args.data, args.write_cache)
+    selected = parse_people(people_list, args.people)
+    days = [args.day] if args.day else DAYS
+
+    for day in days:
+        common = common_free_times(selected, day, args.start, args.end)
+        if args.format == "json":
+            record = {
+                "day": day,
+                "people": [person.name for person in selected],
+                "free": [[start, end] for start, end in common],
+            }
+            out.write(json.dumps(record) + "\n")
+        else:
+            times = ", ".join(f"{start}-{end}" for start, end in common) or "none"
+            out.write(f"{day}: {times}\n")
+        out.flush()
+    return 0
+
+
+def cmd_free_at(args, out):
+    """List the people free for the whole of a time window"""
+    from availability import FreeAtIndex, load_availability
+    people_list, _ = load_availability(args.data, args.write_cache)
+    names = [person.name for person in parse_people(people_list, args.people)] if args.people else None
+
+    free = FreeAtIndex(people_list).free_at(args.day, args.start, args.end, names)
+    if args.format == "json":
+        record = {"day": args.day, "start": args.start, "end": args.end, "free": free}
+        out.write(json.dumps(record) + "\n")
+    else:
+        for name in free:
+            out.write(name + "\n")
+    return 0
+
+
+def cmd_import_ics(args, out):
+    """Import every .ics file in a directory, one person per file"""
+    people_list, courses = load_data(args.data)
+    store = DataStore(
+        people_list, courses, None if args.dry_run else args.data,
+        saver=source_saver(args.data),
+    )
+
+    # One transaction: busy times are rebuilt and the file written once at the end.
+    # Each import is a nested transaction, so a file that fails leaves nothing behind.
+    failures = 0
+    with store.transaction():
+        for entry in sorted(os.listdir(args.directory)):
+            if not entry.lower().endswith(".ics"):
+                continue
+            path = os.path.join(args.directory, entry)
+            person_name = os.path.splitext(entry)[0]
+            try:
+                store.import_ics_file(path, person_name)
+                out.write(f"imported {entry} -> {person_name}\n")
+            except Exception as e:
+                failures += 1
+                out.write(f"failed {entry}: {e}\n")
+            out.flush()
+    return 1 if failures else 0
+
+
+def cmd_export(args, out):
+    """Export the data file as plain JSON"""
+    people_list, courses = load_data(args.data)
+    data = build_save_data(people_list, courses)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(data, file, indent=2)
+    else:
+        json.dump(data, out, indent=2)
+        out.write("\n")
+    return 0
+
+
+def cmd_serve(args, out):
+    """Run the local HTTP/JSON query service"""
+    from service import serve
+    serve(args.data, args.host, args.port, args.poll, args.write_cache)
+    return 0
+
+
+def cmd_memory(args, out):
+    """Report memory used by the loaded data structures"""
+    from memreport import memory_report, format_report
+    report = memory_report(args.data, args.ics or (), args.top)
+    if args.format == "json":
+        json.dump(report, out, indent=2)
+        out.write("\n")
+    else:
+        out.write(format_report(report) + "\n")
+    return 0
+
+
+def cmd_audit(args, out):
+    """List everyone whose courses or personal periods overlap"""
+    from conflicts import audit_clashes, format_clash
+    people_list, courses = load_data(args.data)
+
+    affected = 0
+    for person, clashes in audit_clashes(people_list, courses):
+        affected += 1
+        if args.format == "json":
+            record = {
+                "person": person.name,
+                "clashes": [
+                    {"day": day, "first": first, "first_time": first_time,
+                     "second": second, "second_time": second_time}
+                    for day, first, first_time, second, second_time in clashes
+                ],
+            }
+            out.write(json.dumps(record) + "\n")
+        else:
+            out.write(f"{person.name}\n")
+            for clash in clashes:
+                out.write(f"  {format_clash(clash)}\n")
+        out.flush()
+
+    if args.format == "text":
+        out.write(f"{affected} of {len(people_list)} people have clashes\n")
+    return 1 if affected else 0
+
+
+def cmd_clashes(args, out):
+    """List the courses whose time slots overlap a course"""
+    from conflicts import CourseOverlapIndex
+    _, courses = load_data(args.data)
+    if args.course not in courses:
+        raise ValueError(f"Course '{args.course}' not found")
+
+    for name in CourseOverlapIndex(courses).clashes_with(args.course):
+        out.write(name + "\n")
+    return 0
+
+
+def cmd_timetable(args, out):
+    """Assign one event per course to a slot so nobody has two at once"""
+    from timetabling import solve_timetable
+    people_list, courses = load_data(args.data)
+    slots = args.slot or [f"Slot {i + 1}" for i in range(args.slots)]
+    course_names = [name.strip() for name in args.courses.split(",")] if args.courses else None
+
+    result = solve_timetable(people_list, courses, slots, course_names, args.iterations, args.seed)
+    if args.format == "json":
+        json.dump(result, out, indent=2)
+        out.write("\n")
+    else:
+        by_slot = {slot: [] for slot in slots}
+        for course_name, slot in result["assignment"].items():
+            by_slot[slot].append(course_name)
+        for slot, names in by_slot.items():
+            out.write(f"{slot} ({len(names)} courses)\n")
+            for course_name in sorted(names):
+                out.write(f"  {course_name}\n")
+
+        out.write(f"\n{len(result['conflicts'])} clashing course pairs, "
+                  f"{result['affected_people']} people affected\n")
+        for conflict in result["conflicts"][:20]:
+            first, second = conflict["courses"]
+            out.write(f"  {conflict['slot']}: {first} / {second} ({conflict['people']} people)\n")
+        if result["unavoidable"]:
+            out.write(f"{len(result['clique'])} courses all share students, so with "
+                      f"{len(slots)} slots some clashes are unavoidable\n")
+    return 0
+
+
+def cmd_sections(args, out):
+    """Choose course sections that give a group the most common free time"""
+    from sections import optimize_sections
+    people_list, courses = load_data(args.data)
+    selected = parse_people(people_list, args.people)
+    vary = {person.name for person in parse_people(people_list, args.vary)} if args.vary else None
+    days = args.day or DAYS
+
+    result = optimize_sections(selected, courses, vary, days, args.start, args.end)
+    if args.format == "json":
+        json.dump(result, out, indent=2)
+        out.write("\n")
+        return 0
+
+    out.write(f"Common free time: {result['baseline_minutes']} min now, "
+              f"{result['free_minutes']} min with the suggested sections\n")
+    if result["changes"]:
+        for person_name, current, chosen in result["changes"]:
+            out.write(f"  {person_name}: {current} -> {chosen}\n")
+    else:
+        out.write("  The current sections are already optimal\n")
+    for day, times in result["free_times"].items():
+        out.write(f"{day}: {', '.join(f'{start}-{end}' for start, end in times)}\n")
+    return 0
+
+
+def add_write_cache_flag(parser):
+    parser.add_argument(
+        "--write-cache", action="store_true",
+        help="create or refresh the <data file>.avail sidecar (by default it is only read)",
+    )
+
+
+def build_parser(default_data_file):
+    """Build the argument parser with all subcommands"""
+    parser = argparse.ArgumentParser(
+        prog="scheduler",
+        description="Schedule Manager command-line tools",
+    )
+    parser.add_argument(
+        "--data", default=default_data_file,
+        help="schedule data file (plain or encrypted JSON)",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    common = subparsers.add_parser("common", help="show common free times")
+    common.add_argument("--people", help="comma-separated names (default: everyone)")
+    common.add_argument("--day", choices=DAYS, help="single day (default: all days)")
+    common.add_argument("--start", default="09:00", help="window start, HH:MM")
+    common.add_argument("--end", default="23:00", help="window end, HH:MM")
+    common.add_argument(
+        "--format", choices=["text", "json"], default="text",
+        help="json writes one object per line",
+    )
+    add_write_cache_flag(common)
+    common.set_defaults(func=cmd_common)
+
+    free_at = subparsers.add_parser(
+        "free-at", help="list people free for the whole of a time window"
+    )
+    free_at.add_argument("--day", choices=DAYS, required=True)
+    free_at.add_argument("--start", required=True, help="window start, HH:MM")
+    free_at.add_argument("--end", required=True, help="window end, HH:MM")
+    free_at.add_argument("--people", help="comma-separated names (default: everyone)")
+    free_at.add_argument("--format", choices=["text", "json"], default="text")
+    add_write_cache_flag(free_at)
+    free_at.set_defaults(func=cmd_free_at)
+
+    import_ics = subparsers.add_parser(
+        "import-ics", help="import all .ics files in a directory (file name = person name)"
+    )
+    import_ics.add_argument("directory")
+    import_ics.add_argument(
+        "--dry-run", action="store_true", help="import without saving the data file"
+    )
+    import_ics.set_defaults(func=cmd_import_ics)
+
+    export = subparsers.add_parser("export", help="export data as plain JSON")
+    export.add_argument("-o", "--output", help="output file (default: stdout)")
+    export.set_defaults(func=cmd_export)
+
+    serve = subparsers.add_parser("serve", help="run the local HTTP/JSON query service")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument(
+        "--poll", type=float, default=2.0,
+        help="seconds between data file change checks",
+    )
+    add_write_cache_flag(serve)
+    serve.set_defaults(func=cmd_serve)
+
+    memory = subparsers.add_parser(
+        "memory", help="report memory used by the data file (tracemalloc)"
+    )
+    memory.add_argument(
+        "--ics", action="append",
+        help="also measure importing this .ics file (repeatable)",
+    )
+    memory.add_argument("--top", type=int, default=10, help="allocation sites to list")
+    memory.add_argument("--format", choices=["text", "json"], default="text")
+    memory.set_defaults(func=cmd_memory)
+
+    audit = subparsers.add_parser(
+        "audit", help="find overlapping courses in every schedule (exit 1 if any)"
+    )
+    audit.add_argument(
+        "--format", choices=["text", "json"], default="text",
+        help="json writes one object per affected person per line",
+    )
+    audit.set_defaults(func=cmd_audit)
+
+    clashes = subparsers.add_parser("clashes", help="list courses that overlap a course")
+    clashes.add_argument("course")
+    clashes.set_defaults(func=cmd_clashes)
+
+    timetable = subparsers.add_parser(
+        "timetable", help="schedule one event per course (e.g. exams) without clashes"
+    )
+    slot_choice = timetable.add_mutually_exclusive_group(required=True)
+    slot_choice.add_argument("--slots", type=int, help="number of available slots")
+    slot_choice.add_argument(
+        "--slot", action="append", help="named slot, e.g. 'Mon AM' (repeatable)"
+    )
+    timetable.add_argument("--courses", help="comma-separated courses (default: all)")
+    timetable.add_argument(
+        "--iterations", type=int, default=5000, help="local search iterations"
+    )
+    timetable.add_argument("--seed", type=int, default=0)
+    timetable.add_argument("--format", choices=["text", "json"], default="text")
+    timetable.set_defaults(func=cmd_timetable)
+
+    sections = subparsers.add_parser(
+        "sections", help="pick course sections that maximise a group's common free time"
+    )
+    sections.add_argument("--people", help="comma-separated names (default: everyone)")
+    sections.add_argument(
+        "--vary", help="comma-separated names allowed to switch sections (default: all)"
+    )
+    sections.add_argument(
+        "--day", action="append", choices=DAYS,
+        help="restrict the target window to this day (repeatable)",
+    )
+    sections.add_argument("--start", default="09:00", help="window start, HH:MM")
+    sections.add_argument("--end", default="23:00", help="window end, HH:MM")
+    sections.add_argument("--format", choices=["text", "json"], default="text")
+    sections.set_defaults(func=cmd_sections)
+
+    return parser
+
+
+def run_cli(argv, default_data_file="schedule_data.json", out=None):
+    """Run a subcommand and return its exit code"""
+    out = out or sys.stdout
+    parser = build_parser(default_data_file)
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args, out)
+    except BrokenPipeError:
+        # Downstream command (e.g. head) closed the pipe early
+        sys.stdout = open(os.devnull, "w")
+        return 0
+    except Exception as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
@@ -0,0 +1,331 @@
+"""
+Conflict detection - overlapping time slots in a schedule or a course
+"""
+
+import heapq
+
+from intervals import DayIntervalIndex
+from schedule import to_minutes
+
+PERSONAL_PERIOD = "Personal period"
+
+
+class SlotGroupIndex:
+    """DayIntervalIndex of (group, slot) over a list of slot groups.
+
+    Callers that know what changed keep it current with add_group(),
+    remove_group() and update_group(), each costing one tree operation per
+    slot involved (see DataStore.slot_index); sync() compares against a whole
+    list of groups instead.
+    """
+
+    def __init__(self, slot_groups=()):
+        self.index = DayIntervalIndex()
+        self._groups = {}  # id(group) -> [group, indexed (group, slot) values, times listed]
+        for group in slot_groups:
+            self.add_group(group)
+
+    def __len__(self):
+        return len(self.index)
+
+    def add_group(self, group):
+        """Index a group added to the list"""
+        entry = self._groups.get(id(group))
+        if entry is not None:
+            entry[2] += 1
+            return
+        self._groups[id(group)] = [group, [self._add(group, slot) for slot in group], 1]
+
+    def remove_group(self, group):
+        """Forget a group taken out of the list"""
+        entry = self._groups.get(id(group))
+        if entry is None:
+            return
+        entry[2] -= 1
+        if entry[2]:
+            return
+        del self._groups[id(group)]
+        for value in entry[1]:
+            self.index.remove_slot(value[1], value)
+
+    def update_group(self, group):
+        """Re-index a group whose slots changed in place"""
+        entry = self._groups.get(id(group))
+        if entry is None:
+            return
+        # Slots are compared by identity (interned slots are shared), so an
+        # edit costs one tree operation per slot added or removed
+        remaining = list(group)
+        kept = []
+        for value in entry[1]:
+            for i, slot in enumerate(remaining):
+                if slot is value[1]:
+                    remaining.pop(i)
+                    kept.append(value)
+                    break
+            else:
+                self.index.remove_slot(value[1], value)
+        kept.extend(self._add(group, slot) for slot in remaining)
+        entry[1] = kept
+
+    def sync(self, slot_groups):
+        """Bring the index in line with a whole new list of groups"""
+        wanted = {}
+        for group in slot_groups:
+            wanted.setdefault(id(group), [group, 0])[1] += 1
+        for key in [key for key in self._groups if key not in wanted]:
+            for value in self._groups.pop(key)[1]:
+                self.index.remove_slot(value[1], value)
+        for key, (group, times) in wanted.items():
+            if key in self._groups:
+                self.update_group(group)
+            else:
+                self.add_group(group)
+            self._groups[key][2] = times
+        return self
+
+    def _add(self, group, slot):
+        value = (group, slot)
+        self.index.add_slot(slot, value)
+        return value
+
+    def overlapping(self, day, start_time, end_time):
+        return self.index.overlapping(day, start_time, end_time)
+
+
+def build_slot_index(slot_groups):
+    """Index of (group, slot) for every slot in every group"""
+    return SlotGroupIndex(slot_groups)
+
+
+def find_slot_conflicts(index, slot, ignore=None):
+    """(group, existing slot) pairs in the index overlapping slot"""
+    return [
+        (group, existing)
+        for group, existing in index.overlapping(slot.day, slot.start_time, slot.end_time)
+        if group is not ignore
+    ]
+
+
+def group_name(courses, group):
+    """Course name of a schedule entry, or PERSONAL_PERIOD if it is not a course"""
+    for name, slots in courses.items():
+        if slots is group:
+            return name
+    return PERSONAL_PERIOD
+
+
+def slot_conflicts(index, slots, name_of, ignore=None):
+    """Clashes between new slots and an indexed schedule as (slot, course name, existing slot).
+
+    name_of(group) names a schedule entry; it is only called for entries that clash.
+    """
+    return [
+        (slot, name_of(group), existing)
+        for slot in slots
+        for group, existing in find_slot_conflicts(index, slot, ignore)
+    ]
+
+
+def person_conflicts(person, slots, courses, ignore=None, index=None):
+    """Clashes between new slots and a person's schedule as (slot, course name, existing slot).
+
+    `index` is a SlotGroupIndex over the schedule kept up to date by the caller
+    (see DataStore.slot_index); without one, one is built for the call.
+    """
+    if index is None:
+        index = build_slot_index(person.schedule)
+    return slot_conflicts(index, slots, lambda group: group_name(courses, group), ignore)
+
+
+def course_conflicts(course_slots, slot, index=None):
+    """Existing slots of a course that overlap slot (`index` as for person_conflicts)"""
+    if index is None:
+        index = build_slot_index([course_slots])
+    return [existing for _, existing in find_slot_conflicts(index, slot)]
+
+
+def period_conflicts(person, slots, overlap_index, index=None):
+    """Clashes between new slots and a person's personal periods, in person_conflicts' form.
+
+    For enrolments checked against a CourseOverlapIndex: clashes with courses
+    come from its graph, so only the entries that are not courses count.
+    """
+    if index is None:
+        periods = [group for group in person.schedule if overlap_index.course_name(group) is None]
+        if not periods:
+            return []
+        index = build_slot_index(periods)
+    return [
+        (slot, PERSONAL_PERIOD, existing)
+        for slot, name, existing in slot_conflicts(index, slots, overlap_index.course_name)
+        if name is None
+    ]
+
+
+def describe_conflict(conflict):
+    """e.g. 'Physics (PHYS101) on Monday 09:00-10:00'"""
+    _, name, existing = conflict
+    return f"{name} on {existing.day} {existing.start_time}-{existing.end_time}"
+
+
+def sweep_overlaps(intervals):
+    """Yield overlapping (earlier key, later key) pairs from (start, end, key) tuples"""
+    active = []  # heap of (end, key) for intervals still running
+    for start, end, key in sorted(intervals):
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        for _, other in active:
+            yield other, key
+        heapq.heappush(active, (end, key))
+
+
+def busy_overlaps(busy_time):
+    """Pairs of busy_time keys whose slots overlap, by a per-day sort-and-sweep"""
+    by_day = {}
+    for key, (start, end, day) in busy_time.items():
+        by_day.setdefault(day, []).append((to_minutes(start), to_minutes(end), key))
+
+    pairs = []
+    for intervals in by_day.values():
+        pairs.extend(sweep_overlaps(intervals))
+    return pairs
+
+
+def person_clashes(person, course_names):
+    """Overlaps between different courses / personal periods of one person.
+
+    course_names maps id(course slot list) to the course name.
+    """
+    # busy_time keys count slots in schedule order
+    owners = [group for group in person.schedule for _ in group]
+    clashes = []
+    seen = set()
+    for first, second in busy_overlaps(person.busy_time):
+        group_a, group_b = owners[first], owners[second]
+        if group_a is group_b:
+            continue
+        start_a, end_a, day = person.busy_time[first]
+        start_b, end_b, _ = person.busy_time[second]
+        clash = (
+            day,
+            course_names.get(id(group_a), PERSONAL_PERIOD), f"{start_a}-{end_a}",
+            course_names.get(id(group_b), PERSONAL_PERIOD), f"{start_b}-{end_b}",
+        )
+        if clash not in seen:
+            seen.add(clash)
+            clashes.append(clash)
+    return clashes
+
+
+def audit_clashes(people_list, courses):
+    """Yield (person, clashes) for every person with overlapping schedule entries"""
+    course_names = {id(slots): name for name, slots in courses.items()}
+    for person in people_list:
+        clashes = person_clashes(person, course_names)
+        if clashes:
+            yield person, clashes
+
+
+def format_clash(clash):
+    """e.g. 'Monday: Physics 09:00-10:00 overlaps Chemistry 09:30-10:30'"""
+    day, first, first_time, second, second_time = clash
+    return f"{day}: {first} {first_time} overlaps {second} {second_time}"
+
+
+class CourseOverlapIndex:
+    """Graph of courses whose time slots overlap, updated as courses change"""
+
+    def __init__(self, courses):
+        self.courses = courses
+        self.rebuild()
+
+    def rebuild(self):
+        """Build the graph with one sweep per day over every course slot"""
+        self.slots = DayIntervalIndex()
+        self.graph = {}
+        self._indexed = {}  # name -> (name, slot list, copy of its slots)
+        self._names = {}  # id(slot list) -> name
+
+        by_day = {}
+        for name, course_slots in self.courses.items():
+            self._track(name, course_slots)
+            for slot in course_slots:
+                self.slots.add_slot(slot, name)
+                by_day.setdefault(slot.day, []).append(
+                    (to_minutes(slot.start_time), to_minutes(slot.end_time), name)
+                )
+        for intervals in by_day.values():
+            for first, second in sweep_overlaps(intervals):
+                self._link(first, second)
+
+    def _track(self, name, course_slots):
+        self._indexed[name] = (name, course_slots, list(course_slots))
+        self._names[id(course_slots)] = name
+        self.graph.setdefault(name, set())
+
+    def _link(self, first, second):
+        if first != second:
+            self.graph[first].add(second)
+            self.graph[second].add(first)
+
+    def add_course(self, name):
+        """Index a course that was added to `courses`"""
+        course_slots = self.courses[name]
+        self._track(name, course_slots)
+        for slot in course_slots:
+            for other in self.slots.overlapping(slot.day, slot.start_time, slot.end_time):
+                self._link(name, other)
+        for slot in course_slots:
+            self.slots.add_slot(slot, name)
+
+    def remove_course(self, name):
+        """Forget a course that was removed from `courses`"""
+        entry = self._indexed.pop(name, None)
+        if entry is None:
+            return
+        indexed_name, indexed_list, indexed_slots = entry
+        if self._names.get(id(indexed_list)) == name:
+            del self._names[id(indexed_list)]
+        for slot in indexed_slots:
+            self.slots.remove_slot(slot, indexed_name)
+        for other in self.graph.pop(name, ()):
+            self.graph[other].discard(name)
+
+    def update_course(self, name):
+        """Re-index a course whose time slots changed"""
+        self.remove_course(name)
+        if name in self.courses:
+            self.add_course(name)
+
+    def sync(self):
+        """Pick up courses changed without going through the index.
+
+        Compares every course; DataStore.course_overlaps() is instead kept
+        current by the mutations, one course at a time.
+        """
+        for name in [name for name in self._indexed if name not in self.courses]:
+            self.remove_course(name)
+        for name, course_slots in self.courses.items():
+            entry = self._indexed.get(name)
+            if entry is None:
+                self.add_course(name)
+            elif entry[1] is not course_slots or entry[2] != course_slots:
+                # Compares the slots themselves, so in-place edits of the same length count
+                self.update_course(name)
+
+    def course_name(self, group):
+        """Name of the indexed course a schedule entry is, or None for a personal period"""
+        return self._names.get(id(group))
+
+    def clashes_with(self, name):
+        """Sorted names of courses with a slot overlapping the given course"""
+        return sorted(self.graph.get(name, ()))
+
+    def enrolled_clashes(self, name, schedule):
+        """Courses in a person's schedule that clash with the given course"""
+        enrolled = {id(group) for group in schedule}
+        return [
+            other for other in self.clashes_with(name)
+            if id(self._indexed[other][1]) in enrolled
+        ]
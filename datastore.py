@@ -0,0 +1,688 @@
+"""
+Data Store - people and courses with indexes for name lookups and enrolments
+
+DataStore owns the people list and the courses dict and keeps three indexes
+in step with them:
+  * people by name
+  * enrolled person names per course
+  * course name per slot list (schedules hold the course's slot list itself)
+
+Clash checks use interval indexes over a person's schedule, over a course's
+slots and over every course (the overlap graph). They are built the first
+time a check needs them and then updated by each mutation with just the
+course or person it changed.
+
+Its mutation methods mirror the functions in storage.py without the
+people_list / courses arguments, so callers only swap `st.add_person(people_list,
+name)` for `store.add_person(name)`. The list and dict are updated in place and
+stay usable with every function that takes (people_list, courses).
+
+Every mutation runs in a transaction. Busy-time rebuilds, course overlap index
+updates, the save and subscriber notifications are deferred until the
+outermost transaction commits, so a bulk edit pays for them once:
+
+    with store.transaction():
+        for name in names:
+            store.assign_course_to_person(name, course_name)
+
+If the block raises, every change made in it is undone from an inverse log.
+
+With a journal (see journal.py) a commit appends the transaction's change
+records to it instead of rewriting the data file. With an undo history (see
+history.py) each commit is also recorded as an edit that can be undone and
+redone.
+"""
+
+import functools
+from contextlib import contextmanager
+
+from models import Person
+from storage import (
+    enroll, enrollment_conflicts, unenroll, read_ics_courses, merge_course_slots, save_data
+)
+from conflicts import (
+    SlotGroupIndex, CourseOverlapIndex, person_conflicts, course_conflicts, describe_conflict
+)
+from journal import slot_rows
+from history import Edit, command, describe_edit
+from instrumentation import timed
+
+# Kinds of change reported to subscribers
+PEOPLE = "people"  # people added or removed
+COURSES = "courses"  # courses added or removed
+SCHEDULES = "schedules"  # enrolments, personal periods or course slots changed
+
+
+def _mutation(method):
+    """Run a DataStore method inside a transaction (joining any open one)"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._label is None:
+            self._label = describe_edit(method.__name__, args)
+        with self.transaction():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class DataStore:
+    """People (in display order) and courses, indexed by name.
+
+    If `journal` is set, each committed transaction appends its change
+    records to it; otherwise, if `data_file` is set, the whole data set is
+    written with `saver(people_list, courses, data_file)`. If `history` (an
+    UndoStack) is set, each committed transaction is pushed onto it. Callbacks
+    registered with subscribe() are called with the set of change kinds after
+    each commit.
+    """
+
+    def __init__(self, people_list=None, courses=None, data_file=None, saver=save_data,
+                 journal=None, history=None):
+        self.people_list = people_list if people_list is not None else []
+        self.courses = courses if courses is not None else {}
+        self.data_file = data_file
+        self.saver = saver
+        self.journal = journal
+        self.history = history
+        self.subscribers = []
+        self._reindex()
+        self._slot_indexes = {}  # person name -> (person, SlotGroupIndex over their schedule)
+        self._course_slot_indexes = {}  # course name -> SlotGroupIndex over its slots
+        self._overlaps = None  # CourseOverlapIndex, see course_overlaps()
+
+        # Transaction state
+        self._depth = 0
+        self._undo_log = []
+        self._records = []
+        self._steps = []  # (redo command, undo commands) per mutation, for the history
+        self._label = None
+        self._persist = True
+        self._stale_people = {}  # id(person) -> person whose busy_time needs a rebuild
+        self._stale_courses = {}  # id(overlap index) -> (index, set of course names)
+        self._changes = set()
+
+    def __len__(self):
+        return len(self.people_list)
+
+    def __iter__(self):
+        return iter(self.people_list)
+
+    # Transactions
+
+    @contextmanager
+    def transaction(self, label=None, persist=True):
+        """Group mutations: deferred work runs once on commit, everything is undone on error.
+
+        `label` names the edit in the undo history (default: its first mutation).
+        A nested transaction that fails undoes only its own changes, so the
+        outer one can catch the error and carry on. With persist=False the changes are already on disk (e.g. another program
+        rewrote the data file), so they are neither saved nor added to the history.
+        """
+        if self._depth == 0:
+            if label is not None:
+                self._label = label
+            self._persist = persist
+        savepoint = (len(self._undo_log), len(self._records), len(self._steps))
+        self._depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._depth -= 1
+            if self._depth == 0:
+                self._rollback()
+            else:
+                self._rollback_to(savepoint)
+            raise
+        self._depth -= 1
+        if self._depth == 0:
+            self._commit()
+
+    def subscribe(self, callback):
+        """Call callback(changes) after every committed transaction that changed something"""
+        self.subscribers.append(callback)
+
+    def _log(self, undo, *kinds, record=None, redo=None, inverse=()):
+        """Record a change: how to roll it back, its kinds, its journal record and
+        the commands that redo and reverse it for the undo history"""
+        self._undo_log.append(undo)
+        self._changes.update(kinds)
+        if record is not None:
+            self._records.append(record)
+        if redo is not None and self.history is not None:
+            self._steps.append((redo, list(inverse)))
+
+    def _touch(self, person):
+        self._stale_people[id(person)] = person
+
+    def _touch_course(self, overlap_index, course_name):
+        for index in (overlap_index, self._overlaps):
+            if index is not None:
+                entry = self._stale_courses.setdefault(id(index), (index, set()))
+                entry[1].add(course_name)
+
+    def _update_stale_courses(self, overlap_index=None):
+        """Re-index the courses changed in this transaction in the overlap indexes
+        (only in overlap_index if given); they are re-indexed again on commit"""
+        for index, course_names in self._stale_courses.values():
+            if overlap_index is None or index is overlap_index:
+                for course_name in course_names:
+                    index.update_course(course_name)
+
+    def _rebuild_stale_people(self):
+        for person in self._stale_people.values():
+            person.busy_time = person._create_busy_time_dict()
+
+    def _reset_transaction(self):
+        self._undo_log = []
+        self._records = []
+        self._steps = []
+        self._label = None
+        self._persist = True
+        self._stale_people = {}
+        self._stale_courses = {}
+        self._changes = set()
+
+    @timed("datastore.commit")
+    def _commit(self):
+        changes = self._changes
+        records = self._records
+        steps = self._steps
+        label = self._label
+        persist = self._persist
+        self._rebuild_stale_people()
+        self._update_stale_courses()
+        if changes and persist:
+            try:
+                if self.journal is not None:
+                    # Personal periods are not saved, so they leave no record
+                    self.journal.append(records)
+                elif self.data_file:
+                    self.saver(self.people_list, self.courses, self.data_file)
+            except BaseException:
+                # Nothing reached the disk, so memory goes back to match it
+                self._rollback()
+                raise
+        self._reset_transaction()
+        if not changes:
+            return
+        if persist:
+            if self.journal is not None:
+                self.journal.maybe_compact(self.people_list, self.courses)
+            if steps and not self.history.replaying:
+                self.history.record(Edit(label, changes, steps))
+        for callback in list(self.subscribers):
+            callback(changes)
+
+    def _rollback(self):
+        for undo in reversed(self._undo_log):
+            undo()
+        # Undo only restores the data; the indexes are rebuilt from it. Overlap
+        # indexes may have been updated early for an enrolment check, so the
+        # courses touched are re-indexed from the restored slots.
+        self._reindex()
+        self._drop_slot_indexes()
+        self._rebuild_stale_people()
+        self._update_stale_courses()
+        self._reset_transaction()
+
+    def _rollback_to(self, savepoint):
+        """Undo the changes made since a nested transaction started"""
+        undo_count, record_count, step_count = savepoint
+        if len(self._undo_log) == undo_count:
+            return
+        for undo in reversed(self._undo_log[undo_count:]):
+            undo()
+        del self._undo_log[undo_count:]
+        del self._records[record_count:]
+        del self._steps[step_count:]
+        # People and courses it touched stay marked, and are refreshed from the
+        # restored data on commit
+        self._reindex()
+        self._drop_slot_indexes()
+
+    # Indexes
+
+    def _reindex(self):
+        self.people = {}
+        self._course_names = {}  # id(slot list) -> course name
+        self._enrolled = {}  # course name -> {person name: None}, an ordered set
+        for course_name in self.courses:
+            self._index_course(course_name)
+        for person in self.people_list:
+            if person.name in self.people:
+                raise ValueError(f"Person with name '{person.name}' already exists")
+            self.people[person.name] = person
+            self._index_enrolments(person)
+
+    def _index_course(self, course_name):
+        self._course_names[id(self.courses[course_name])] = course_name
+        self._enrolled.setdefault(course_name, {})
+
+    def _unindex_course(self, course_name):
+        del self._course_names[id(self.courses[course_name])]
+        del self._enrolled[course_name]
+
+    def _index_enrolments(self, person):
+        for course_slots in person.schedule:
+            course_name = self._course_names.get(id(course_slots))
+            if course_name is not None:
+                self._enrolled[course_name][person.name] = None
+
+    def _unindex_enrolments(self, person):
+        for course_slots in person.schedule:
+            course_name = self._course_names.get(id(course_slots))
+            if course_name is not None:
+                self._enrolled[course_name].pop(person.name, None)
+
+    def _touch_enrolled(self, course_name):
+        """Mark everyone taking a course whose slots changed"""
+        course_slots = self.courses[course_name]
+        for name in self._enrolled[course_name]:
+            self._touch(self.people[name])
+            self._indexed_slots(name, "update_group", course_slots)
+        index = self._course_slot_indexes.get(course_name)
+        if index is not None:
+            index.update_group(course_slots)
+
+    def _indexed_slots(self, person_name, change, group):
+        """Apply a schedule change (a SlotGroupIndex method name) to a person's slot index, if built"""
+        entry = self._slot_indexes.get(person_name)
+        if entry is not None:
+            getattr(entry[1], change)(group)
+
+    def _drop_slot_indexes(self):
+        # Undo closures change schedules and slots directly; the indexes are
+        # rebuilt from the restored data when next needed
+        self._slot_indexes = {}
+        self._course_slot_indexes = {}
+
+    # Clash checks
+
+    def slot_index(self, person):
+        """SlotGroupIndex over a person's schedule, built on first use and then
+        updated by each mutation that changes the schedule or one of its courses"""
+        entry = self._slot_indexes.get(person.name)
+        if entry is None or entry[0] is not person:
+            entry = self._slot_indexes[person.name] = (person, SlotGroupIndex(person.schedule))
+        return entry[1]
+
+    def course_slot_index(self, course_name):
+        """SlotGroupIndex over a course's slots, kept up to date like slot_index()"""
+        index = self._course_slot_indexes.get(course_name)
+        if index is None:
+            index = self._course_slot_indexes[course_name] = SlotGroupIndex([self.courses[course_name]])
+        return index
+
+    def course_overlaps(self):
+        """CourseOverlapIndex over the courses, built on first use and then
+        updated with each course that is added, removed or changed"""
+        if self._overlaps is None:
+            self._overlaps = CourseOverlapIndex(self.courses)
+        # Inside a transaction, courses changed so far are re-indexed now
+        self._update_stale_courses(self._overlaps)
+        return self._overlaps
+
+    def person_conflicts(self, person_name, time_slots, ignore=None):
+        """Clashes between new slots and a person's schedule as (slot, course name, existing slot)"""
+        person = self.people.get(person_name)
+        if person is None:
+            raise ValueError(f"Person '{person_name}' not found")
+        return person_conflicts(person, time_slots, self.courses, ignore, self.slot_index(person))
+
+    def course_conflicts(self, course_name, time_slot):
+        """Existing slots of a course that overlap time_slot"""
+        if course_name not in self.courses:
+            raise ValueError(f"Course '{course_name}' not found")
+        return course_conflicts(self.courses[course_name], time_slot,
+                                self.course_slot_index(course_name))
+
+    def enrollment_conflicts(self, person_name, course_name):
+        """Clashes assigning a course would give a person, as (slot, course name, existing slot).
+
+        assign_course_to_person(..., allow_conflicts=False) refuses the same clashes.
+        """
+        if course_name not in self.courses:
+            raise ValueError(f"Course '{course_name}' not found")
+        person = self.people.get(person_name)
+        if person is None:
+            raise ValueError(f"Person '{person_name}' not found")
+        return enrollment_conflicts(person, self.courses, course_name, self.course_overlaps(),
+                                    self.slot_index(person))
+
+    # Lookups
+
+    def get_person(self, name):
+        """Get a person by name"""
+        return self.people.get(name)
+
+    def get_course(self, course_name):
+        """Get a course by name"""
+        return self.courses.get(course_name)
+
+    def course_name(self, course_slots):
+        """Course name of a schedule entry, or None for a personal period"""
+        return self._course_names.get(id(course_slots))
+
+    def person_course_names(self, person):
+        """Names of the courses in a person's schedule, in schedule order"""
+        names = [self.course_name(course_slots) for course_slots in person.schedule]
+        return [name for name in names if name is not None]
+
+    def is_enrolled(self, person_name, course_name):
+        """True if the person takes the course"""
+        return person_name in self._enrolled.get(course_name, ())
+
+    def get_people_in_course(self, course_name):
+        """Get list of people enrolled in a specific course"""
+        if course_name not in self.courses:
+            raise ValueError(f"Course '{course_name}' not found")
+        return list(self._enrolled[course_name])
+
+    # People
+
+    @_mutation
+    def add_person(self, name, schedule=None, position=None):
+        """Add a new person (at the end, or at `position` in the list); the schedule is copied"""
+        if name in self.people:
+            raise ValueError(f"Person with name '{name}' already exists")
+
+        person = Person(name, list(schedule or []))
+        if position is None:
+            position = len(self.people_list)
+        position = min(position, len(self.people_list))
+        self.people_list.insert(position, person)
+        self.people[name] = person
+        self._index_enrolments(person)
+
+        def undo():
+            self.people_list.pop(position)
+        record = {"op": "add_person", "name": name, "courses": self.person_course_names(person)}
+        if position < len(self.people_list) - 1:
+            record["position"] = position
+        self._log(undo, PEOPLE, record=record,
+                  redo=command("add_person", name, list(person.schedule), position=position),
+                  inverse=[command("remove_person", name)])
+        return person
+
+    @_mutation
+    def remove_person(self, name):
+        """Remove a person"""
+        person = self.people.pop(name, None)
+        if person is None:
+            raise ValueError(f"Person with name '{name}' not found")
+        position = self.people_list.index(person)
+        self.people_list.pop(position)
+        self._unindex_enrolments(person)
+        self._slot_indexes.pop(name, None)
+
+        def undo():
+            self.people_list.insert(position, person)
+        self._log(undo, PEOPLE, record={"op": "remove_person", "name": name},
+                  redo=command("remove_person", name),
+                  inverse=[command("add_person", name, list(person.schedule), position=position)])
+        return person
+
+    @_mutation
+    def update_person_schedule(self, name, new_schedule):
+        """Replace a person's schedule with a copy of new_schedule"""
+        person = self.people.get(name)
+        if person is None:
+            raise ValueError(f"Person with name '{name}' not found")
+        old_schedule = person.schedule
+        self._unindex_enrolments(person)
+        person.schedule = list(new_schedule)
+        self._index_enrolments(person)
+        self._touch(person)
+        entry = self._slot_indexes.get(name)
+        if entry is not None:
+            entry[1].sync(person.schedule)
+
+        def undo():
+            person.schedule = old_schedule
+        self._log(undo, SCHEDULES, record={
+            "op": "set_schedule", "name": name, "courses": self.person_course_names(person),
+        }, redo=command("update_person_schedule", name, list(person.schedule)),
+            inverse=[command("update_person_schedule", name, list(old_schedule))])
+        return person
+
+    @_mutation
+    def add_personal_period(self, person_name, time_slots, allow_conflicts=False):
+        """Add a personal period (a slot list that is not a course) to a person's schedule"""
+        person = self.people.get(person_name)
+        if person is None:
+            raise ValueError(f"Person '{person_name}' not found")
+        if not allow_conflicts:
+            conflicts = self.person_conflicts(person_name, time_slots)
+            if conflicts:
+                raise ValueError(
+                    f"This time slot overlaps {describe_conflict(conflicts[0])} "
+                    f"for {person_name}."
+                )
+        period = list(time_slots)
+        person.schedule.append(period)
+        self._touch(person)
+        self._indexed_slots(person_name, "add_group", period)
+
+        def undo():
+            person.schedule.pop()
+        # Redone by restoring the schedule, so the period keeps its identity
+        self._log(undo, SCHEDULES,
+                  redo=command("update_person_schedule", person_name, list(person.schedule)),
+                  inverse=[command("update_person_schedule", person_name, person.schedule[:-1])])
+        return period
+
+    # Courses
+
+    @_mutation
+    def add_course(self, course_name, time_slots, overlap_index=None, position=None):
+        """Add a new course with time slots (at the end, or at `position` in the dict)"""
+        if course_name in self.courses:
+            raise ValueError(f"Course '{course_name}' already exists")
+
+        if position is None or position >= len(self.courses):
+            position = len(self.courses)
+            self.courses[course_name] = time_slots
+        else:
+            self._insert_course(position, course_name, time_slots)
+        self._index_course(course_name)
+        self._touch_course(overlap_index, course_name)
+
+        def undo():
+            del self.courses[course_name]
+        record = {"op": "add_course", "name": course_name, "slots": slot_rows(time_slots)}
+        if position < len(self.courses) - 1:
+            record["position"] = position
+        self._log(undo, COURSES, record=record,
+                  redo=command("add_course", course_name, time_slots,
+                               overlap_index=overlap_index, position=position),
+                  inverse=[command("remove_course", course_name, overlap_index=overlap_index)])
+        return time_slots
+
+    def _insert_course(self, position, course_name, time_slots):
+        """Put a course at a position in the (ordered) courses dict, keeping the dict object"""
+        items = list(self.courses.items())
+        items.insert(position, (course_name, time_slots))
+        self.courses.clear()
+        self.courses.update(items)
+
+    @_mutation
+    def remove_course(self, course_name, overlap_index=None):
+        """Remove a course and take it out of everyone's schedule"""
+        if course_name not in self.courses:
+            raise ValueError(f"Course '{course_name}' not found")
+
+        enrolled = []  # (person, position in their schedule)
+        for name in self._enrolled[course_name]:
+            person = self.people[name]
+            enrolled.append((person, unenroll(person, self.courses, course_name, rebuild_busy=False)))
+            self._touch(person)
+            self._indexed_slots(name, "remove_group", self.courses[course_name])
+        position = list(self.courses).index(course_name)
+        self._unindex_course(course_name)
+        removed = self.courses.pop(course_name)
+        self._course_slot_indexes.pop(course_name, None)
+        self._touch_course(overlap_index, course_name)
+
+        def undo():
+            self._insert_course(position, course_name, removed)
+            for person, schedule_position in enrolled:
+                person.schedule.insert(schedule_position, removed)
+        self._log(undo, COURSES, SCHEDULES, record={"op": "remove_course", "name": course_name},
+                  redo=command("remove_course", course_name, overlap_index=overlap_index),
+                  inverse=[command("add_course", course_name, removed,
+                                   overlap_index=overlap_index, position=position)] + [
+                      command("assign_course_to_person", person.name, course_name,
+                              allow_conflicts=True, position=schedule_position)
+                      for person, schedule_position in enrolled
+                  ])
+        return removed
+
+    @_mutation
+    def update_course(self, course_name, new_time_slots, overlap_index=None):
+        """Replace a course's time slots (in place, so schedules keep pointing at it)"""
+        if course_name not in self.courses:
+            raise ValueError(f"Course '{course_name}' not found")
+
+        course_slots = self.courses[course_name]
+        old_slots = list(course_slots)
+        course_slots[:] = new_time_slots
+        self._touch_enrolled(course_name)
+        self._touch_course(overlap_index, course_name)
+
+        def undo():
+            course_slots[:] = old_slots
+        self._log(undo, SCHEDULES, record=self._slots_record(course_name),
+                  **self._slots_commands(course_name, old_slots, overlap_index))
+        return course_slots
+
+    @_mutation
+    def add_course_slot(self, course_name, time_slot, overlap_index=None):
+        """Add one time slot to a course"""
+        if course_name not in self.courses:
+            raise ValueError(f"Course '{course_name}' not found")
+
+        course_slots = self.courses[course_name]
+        course_slots.append(time_slot)
+        self._touch_enrolled(course_name)
+        self._touch_course(overlap_index, course_name)
+
+        def undo():
+            course_slots.pop()
+        self._log(undo, SCHEDULES, record=self._slots_record(course_name),
+                  **self._slots_commands(course_name, course_slots[:-1], overlap_index))
+        return time_slot
+
+    def _slots_record(self, course_name):
+        return {"op": "set_slots", "name": course_name, "slots": slot_rows(self.courses[course_name])}
+
+    def _slots_commands(self, course_name, old_slots, overlap_index):
+        """History commands setting a course's slots to their new and old contents"""
+        return {
+            "redo": command("update_course", course_name, list(self.courses[course_name]),
+                            overlap_index=overlap_index),
+            "inverse": [command("update_course", course_name, list(old_slots),
+                                overlap_index=overlap_index)],
+        }
+
+    # Enrolments
+
+    @_mutation
+    def assign_course_to_person(self, person_name, course_name, allow_conflicts=True,
+                                overlap_index=None, position=None):
+        """Assign a course to a person (refusing clashes with their schedule if
+        allow_conflicts is False; see enrollment_conflicts()).
+
+        The course is added at the end of their schedule, or at `position`.
+        """
+        if course_name not in self.courses:
+            raise ValueError(f"Course '{course_name}' not found")
+        person = self.people.get(person_name)
+        if person is None:
+            raise ValueError(f"Person '{person_name}' not found")
+
+        if overlap_index is not None and not allow_conflicts:
+            # The clash check reads the overlap graph, which must include this transaction's edits
+            self._update_stale_courses(overlap_index)
+        enroll(person, self.courses, course_name, allow_conflicts, overlap_index,
+               rebuild_busy=False, position=position,
+               slot_index=None if allow_conflicts else self.slot_index(person))
+        self._enrolled[course_name][person_name] = None
+        self._touch(person)
+        self._indexed_slots(person_name, "add_group", self.courses[course_name])
+        if position is None or position >= len(person.schedule):
+            position = len(person.schedule) - 1
+
+        def undo():
+            person.schedule.pop(position)
+        record = {"op": "enroll", "person": person_name, "course": course_name}
+        if position < len(person.schedule) - 1:
+            record["position"] = position
+        self._log(undo, SCHEDULES, record=record,
+                  redo=command("assign_course_to_person", person_name, course_name,
+                               allow_conflicts=True, position=position),
+                  inverse=[command("remove_course_from_person", person_name, course_name)])
+        return person
+
+    @_mutation
+    def remove_course_from_person(self, person_name, course_name):
+        """Remove a course from a person's schedule"""
+        if course_name not in self.courses:
+            raise ValueError(f"Course '{course_name}' not found")
+        person = self.people.get(person_name)
+        if person is None:
+            raise ValueError(f"Person '{person_name}' not found")
+
+        course_slots = self.courses[course_name]
+        position = unenroll(person, self.courses, course_name, rebuild_busy=False)
+        self._enrolled[course_name].pop(person_name, None)
+        self._touch(person)
+        self._indexed_slots(person_name, "remove_group", course_slots)
+
+        def undo():
+            person.schedule.insert(position, course_slots)
+        self._log(undo, SCHEDULES, record={
+            "op": "unenroll", "person": person_name, "course": course_name,
+        }, redo=command("remove_course_from_person", person_name, course_name),
+            inverse=[command("assign_course_to_person", person_name, course_name,
+                             allow_conflicts=True, position=position)])
+        return person
+
+    @_mutation
+    @timed("datastore.import_ics_file")
+    def import_ics_file(self, filename, person_name, overlap_index=None):
+        """Import an ICS file for a person, creating or extending courses as needed"""
+        courses_from_ics = read_ics_courses(filename)
+
+        if person_name not in self.people:
+            self.add_person(person_name, [])
+
+        for course_name, time_slots in courses_from_ics.items():
+            if course_name not in self.courses:
+                self.add_course(course_name, time_slots, overlap_index)
+            else:
+                self._merge_course_slots(course_name, time_slots, overlap_index)
+
+            if person_name not in self._enrolled[course_name]:
+                self.assign_course_to_person(person_name, course_name, allow_conflicts=True)
+        return self.people[person_name]
+
+    def _merge_course_slots(self, course_name, time_slots, overlap_index):
+        course_slots = self.courses[course_name]
+        old_count = len(course_slots)
+        if not merge_course_slots(course_slots, time_slots):
+            return
+        self._touch_enrolled(course_name)
+        self._touch_course(overlap_index, course_name)
+
+        def undo():
+            del course_slots[old_count:]
+        self._log(undo, SCHEDULES, record=self._slots_record(course_name),
+                  **self._slots_commands(course_name, course_slots[:old_count], overlap_index))
+
+    # Persistence
+
+    def save(self, filename=None):
+        """Write people and courses with the store's saver (to data_file by default)"""
+        if self.journal is not None:
+            # A full save replaces the journal, so let a compaction finish first
+            self.journal.wait()
+        self.saver(self.people_list, self.courses, filename or self.data_file)
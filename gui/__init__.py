@@ -1,17 +1,40 @@
 """
 Schedule Manager GUI Package
 Modern PyQt6-based GUI components
+
+Submodules are imported on first attribute access so that importing the
+package (or `from gui import launch_gui`) does not pull in every tab.
 """
 
-from .main_window import ScheduleManagerPyQt6, launch_pyqt6_gui
-from .time_picker import TimePickerWidget
-from .schedule_tab import ScheduleTab
-from .people_tab import PeopleTab
-from .courses_tab import CoursesTab
-from .common_times_tab import CommonTimesTab
+import importlib
+
+# Exported name -> submodule that defines it
+_EXPORTS = {
+    'ScheduleManagerPyQt6': '.main_window',
+    'launch_pyqt6_gui': '.main_window',
+    'TimePickerWidget': '.time_picker',
+    'ScheduleTab': '.schedule_tab',
+    'PeopleTab': '.people_tab',
+    'CoursesTab': '.courses_tab',
+    'CommonTimesTab': '.common_times_tab',
+    'HeatmapTab': '.heatmap_tab',
+}
 
 # Export the main function for backward compatibility
-launch_gui = launch_pyqt6_gui
+_ALIASES = {
+    'launch_gui': 'launch_pyqt6_gui',
+}
+
+
+def __getattr__(name):
+    target = _ALIASES.get(name, name)
+    if target not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(_EXPORTS[target], __name__)
+    value = getattr(module, target)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     'ScheduleManagerPyQt6',
@@ -21,5 +44,6 @@ __all__ = [
     'ScheduleTab',
     'PeopleTab',
     'CoursesTab',
-    'CommonTimesTab'
+    'CommonTimesTab',
+    'HeatmapTab'
 ]
@@ -7,7 +7,9 @@ from PyQt6.QtWidgets import (
     QPushButton, QTextEdit, QCheckBox, QGroupBox, QGridLayout
 )
 from PyQt6.QtCore import Qt
-from schedule import common_free_times
+from schedule import common_free_times, unique_schedules
+from .time_picker import TimePickerWidget
+from instrumentation import timed
 
 
 class CommonTimesTab(QWidget):
@@ -58,6 +60,29 @@ class CommonTimesTab(QWidget):
         
         layout.addWidget(controls_group)
         
+        # Who is free for a whole time window, across everyone
+        free_at_group = QGroupBox("Who's Free")
+        free_at_layout = QGridLayout(free_at_group)
+        
+        free_at_layout.addWidget(QLabel("Day:"), 0, 0)
+        self.free_at_day_combo = QComboBox()
+        self.free_at_day_combo.addItems(self.main_window.days)
+        free_at_layout.addWidget(self.free_at_day_combo, 0, 1)
+        
+        free_at_layout.addWidget(QLabel("From:"), 0, 2)
+        self.free_at_start = TimePickerWidget("14:00")
+        free_at_layout.addWidget(self.free_at_start, 0, 3)
+        
+        free_at_layout.addWidget(QLabel("To:"), 0, 4)
+        self.free_at_end = TimePickerWidget("15:30")
+        free_at_layout.addWidget(self.free_at_end, 0, 5)
+        
+        self.find_free_people_btn = QPushButton("Who's Free?")
+        self.find_free_people_btn.clicked.connect(self.find_free_people)
+        free_at_layout.addWidget(self.find_free_people_btn, 0, 6)
+        
+        layout.addWidget(free_at_group)
+        
         # People selection
         people_selection_group = QGroupBox("Select People")
         people_selection_layout = QVBoxLayout(people_selection_group)
@@ -108,6 +133,7 @@ class CommonTimesTab(QWidget):
         
         layout.addWidget(results_group)
     
+    @timed("gui.CommonTimesTab.refresh_people_checkboxes")
     def refresh_people_checkboxes(self):
         """Refresh the people selection checkboxes"""
         # Clear existing checkboxes
@@ -127,7 +153,7 @@ class CommonTimesTab(QWidget):
             checkbox = self.people_checkboxes_layout.itemAt(i).widget()
             if isinstance(checkbox, QCheckBox) and checkbox.isChecked():
                 person_name = checkbox.text()
-                person = next((p for p in self.main_window.people_list if p.name == person_name), None)
+                person = self.main_window.store.get_person(person_name)
                 if person:
                     selected_people.append(person)
         return selected_people
@@ -283,7 +309,8 @@ class CommonTimesTab(QWidget):
         
         result_text = "Common Free Times - Weekly Summary\n"
         result_text += "=" * 50 + "\n"
-        result_text += f"Analyzing schedules for {len(selected_people)} selected people:\n"
+        distinct = len(unique_schedules(selected_people))
+        result_text += f"Analyzing schedules for {len(selected_people)} selected people ({distinct} distinct schedules):\n"
         for person in selected_people:
             result_text += f"  - {person.name}\n"
         result_text += "\n"
@@ -308,6 +335,25 @@ class CommonTimesTab(QWidget):
         
         self.results_text.setPlainText(result_text)
     
+    def find_free_people(self):
+        """List everyone free for the whole of the chosen window"""
+        day = self.free_at_day_combo.currentText()
+        start = self.free_at_start.get_time()
+        end = self.free_at_end.get_time()
+        if end <= start:
+            self.results_text.setPlainText("The end time must be after the start time.")
+            return
+        
+        free_names = self.main_window.free_at_index().free_at(day, start, end)
+        total = len(self.main_window.people_list)
+        
+        result_text = f"Free for the whole of {day} {start} - {end}\n"
+        result_text += "=" * 50 + "\n"
+        result_text += f"{len(free_names)} of {total} people are free:\n\n"
+        for name in free_names:
+            result_text += f"  - {name}\n"
+        self.results_text.setPlainText(result_text)
+    
     def select_all_people(self):
         """Select all people checkboxes"""
         for i in range(self.people_checkboxes_layout.count()):
@@ -8,6 +8,7 @@ from PyQt6.QtWidgets import (
     QGroupBox, QGridLayout, QSplitter, QDialog, QMessageBox
 )
 from PyQt6.QtCore import Qt
+from instrumentation import timed
 
 
 class CoursesTab(QWidget):
@@ -95,6 +96,11 @@ class CoursesTab(QWidget):
         """)
         details_layout.addWidget(self.course_name_label)
         
+        self.clashes_label = QLabel("")
+        self.clashes_label.setWordWrap(True)
+        self.clashes_label.setStyleSheet("color: #cccccc; padding: 0 4px;")
+        details_layout.addWidget(self.clashes_label)
+        
         # Course slots table with balanced styling
         self.course_slots_table = QTableWidget()
         self.course_slots_table.setColumnCount(3)
@@ -138,6 +144,7 @@ class CoursesTab(QWidget):
         # Connect signals
         self.courses_list_widget.currentItemChanged.connect(self.on_course_select)
     
+    @timed("gui.CoursesTab.refresh_courses_list")
     def refresh_courses_list(self):
         """Refresh the courses list widget"""
         self.courses_list_widget.clear()
@@ -166,6 +173,12 @@ class CoursesTab(QWidget):
             self.course_slots_table.setItem(row, 0, QTableWidgetItem(slot.day))
             self.course_slots_table.setItem(row, 1, QTableWidgetItem(slot.start_time))
             self.course_slots_table.setItem(row, 2, QTableWidgetItem(slot.end_time))
+        
+        clashes = self.main_window.course_overlaps().clashes_with(course_name)
+        if clashes:
+            self.clashes_label.setText(f"Clashes with {len(clashes)} course(s): " + ", ".join(clashes))
+        else:
+            self.clashes_label.setText("No clashing courses")
     
     def add_time_slot_to_course(self):
         """Add a time slot to the selected course"""
@@ -190,32 +203,43 @@ class CoursesTab(QWidget):
             end_time = data['end_time']
             
             # Create the time slot
-            from models import TimeSlot
-            time_slot = TimeSlot(start_time, end_time, day)
+            from models import intern_time_slot
+            time_slot = intern_time_slot(start_time, end_time, day)
             
-            # Check for conflicts with existing time slots
+            # Check for overlaps with the course's existing time slots
+            from conflicts import describe_conflict
+            store = self.main_window.store
             course_slots = self.main_window.courses[course_name]
-            for existing_slot in course_slots:
-                if (existing_slot.day == day and 
-                    existing_slot.start_time == start_time and 
-                    existing_slot.end_time == end_time):
-                    QMessageBox.warning(self, "Duplicate Time Slot", 
-                                      f"This time slot already exists for {course_name}.")
-                    return
-            
-            # Add the time slot to the course
-            course_slots.append(time_slot)
+            overlapping = store.course_conflicts(course_name, time_slot)
+            if overlapping:
+                existing_slot = overlapping[0]
+                QMessageBox.warning(self, "Overlapping Time Slot",
+                                  f"This time slot overlaps {existing_slot.day} "
+                                  f"{existing_slot.start_time}-{existing_slot.end_time} "
+                                  f"of {course_name}.")
+                return
             
-            # Update all people who have this course
-            for person in self.main_window.people_list:
-                for person_course in person.schedule:
-                    if person_course == course_slots:
-                        person.busy_time = person._create_busy_time_dict()
-                        break
+            # Check whether enrolled people would get a clash with their other courses
+            clashes = []
+            for name in store.get_people_in_course(course_name):
+                conflicts = store.person_conflicts(name, [time_slot], ignore=course_slots)
+                if conflicts:
+                    clashes.append(f"{name}: {describe_conflict(conflicts[0])}")
+            if clashes:
+                reply = QMessageBox.question(
+                    self, "Schedule Clash",
+                    f"This time slot clashes for {len(clashes)} enrolled "
+                    f"{'person' if len(clashes) == 1 else 'people'}:\n\n"
+                    + "\n".join(clashes[:10])
+                    + ("\n..." if len(clashes) > 10 else "")
+                    + "\n\nAdd it anyway?",
+                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                )
+                if reply != QMessageBox.StandardButton.Yes:
+                    return
             
-            # Save data
-            import storage as st
-            st.save_data(self.main_window.people_list, self.main_window.courses, self.main_window.data_file)
+            # Add the time slot to the course (updates everyone who takes it)
+            store.add_course_slot(course_name, time_slot)
             
             # Refresh display
             self.show_course_details(course_name)
@@ -227,10 +251,7 @@ class CoursesTab(QWidget):
         name, ok = QInputDialog.getText(self, "Add Course", "Enter course name:")
         if ok and name.strip():
             try:
-                import storage as st
-                st.add_course(self.main_window.courses, name.strip(), [])
-                st.save_data(self.main_window.people_list, self.main_window.courses, self.main_window.data_file)
-                self.main_window.refresh_displays()
+                self.main_window.store.add_course(name.strip(), [])
                 self.main_window.statusBar().showMessage(f"Added course: {name.strip()}")
             except ValueError as e:
                 QMessageBox.warning(self, "Error", str(e))
@@ -245,10 +266,7 @@ class CoursesTab(QWidget):
                                        QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
             if reply == QMessageBox.StandardButton.Yes:
                 try:
-                    import storage as st
-                    st.remove_course(self.main_window.courses, name)
-                    st.save_data(self.main_window.people_list, self.main_window.courses, self.main_window.data_file)
-                    self.main_window.refresh_displays()
+                    self.main_window.store.remove_course(name)
                     self.main_window.statusBar().showMessage(f"Removed course: {name}")
                 except ValueError as e:
                     QMessageBox.warning(self, "Error", str(e))
@@ -0,0 +1,277 @@
+"""
+Availability Heatmap Tab
+"""
+
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+    QCheckBox, QGroupBox, QScrollArea, QToolTip
+)
+from PyQt6.QtCore import Qt, QRect
+from PyQt6.QtGui import QPainter, QColor, QFont
+from schedule import free_count_grid, to_minutes, to_time
+from instrumentation import timed
+
+
+class HeatmapWidget(QWidget):
+    """Paints a day x time-bucket grid of free counts"""
+
+    LABEL_WIDTH = 90
+    HEADER_HEIGHT = 24
+    ROW_HEIGHT = 36
+    MIN_CELL_WIDTH = 8
+
+    def __init__(self, days, start="09:00", end="23:00", step=10, parent=None):
+        super().__init__(parent)
+        self.days = days
+        self.start = start
+        self.end = end
+        self.step = step
+        self.people = []
+        self.grid = {}
+        self.bucket_count = 0
+        self._hover_cell = None
+
+        self.setMouseTracking(True)
+        self.setMinimumHeight(self.HEADER_HEIGHT + self.ROW_HEIGHT * len(days) + 8)
+
+    def set_people(self, people):
+        """Recompute the free-count grid for the given people"""
+        self.people = list(people)
+        self.grid = free_count_grid(self.people, self.days, self.start, self.end, self.step)
+        self.bucket_count = len(next(iter(self.grid.values()), []))
+        self._hover_cell = None
+        self.update()
+
+    def cell_width(self):
+        """Width of one bucket column in pixels"""
+        if not self.bucket_count:
+            return self.MIN_CELL_WIDTH
+        available = self.width() - self.LABEL_WIDTH - 8
+        return max(self.MIN_CELL_WIDTH, available / self.bucket_count)
+
+    def cell_at(self, pos):
+        """Return (day, bucket) under a widget position, or None"""
+        x = pos.x() - self.LABEL_WIDTH
+        y = pos.y() - self.HEADER_HEIGHT
+        if x < 0 or y < 0:
+            return None
+        row = int(y // self.ROW_HEIGHT)
+        col = int(x // self.cell_width())
+        if row >= len(self.days) or col >= self.bucket_count:
+            return None
+        return self.days[row], col
+
+    def bucket_range(self, bucket):
+        """Return the (start, end) minutes covered by a bucket"""
+        start_m = to_minutes(self.start) + bucket * self.step
+        return start_m, min(start_m + self.step, to_minutes(self.end))
+
+    def busy_people_at(self, day, bucket):
+        """Names of people busy at any point during the given bucket"""
+        bucket_start, bucket_end = self.bucket_range(bucket)
+        names = []
+        for person in self.people:
+            for s, e, d in person.busy_time.values():
+                if d == day and to_minutes(s) < bucket_end and to_minutes(e) > bucket_start:
+                    names.append(person.name)
+                    break
+        return names
+
+    def cell_color(self, free):
+        """Blend from the background fill to the accent colour by free ratio"""
+        total = len(self.people)
+        ratio = free / total if total else 0
+        low = QColor("#2a2a2a")
+        high = QColor("#007ACC")
+        return QColor(
+            int(low.red() + (high.red() - low.red()) * ratio),
+            int(low.green() + (high.green() - low.green()) * ratio),
+            int(low.blue() + (high.blue() - low.blue()) * ratio),
+        )
+
+    def paintEvent(self, event):
+        """Draw the heatmap from the precomputed grid"""
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#1e1e1e"))
+        painter.setFont(QFont("Segoe UI", 9))
+
+        cell_width = self.cell_width()
+        start_m = to_minutes(self.start)
+
+        # Hour labels along the top
+        painter.setPen(QColor("#aaaaaa"))
+        for bucket in range(self.bucket_count):
+            minute = start_m + bucket * self.step
+            if minute % 60 == 0:
+                x = int(self.LABEL_WIDTH + bucket * cell_width)
+                painter.drawText(x + 2, self.HEADER_HEIGHT - 6, to_time(minute))
+
+        for row, day in enumerate(self.days):
+            y = self.HEADER_HEIGHT + row * self.ROW_HEIGHT
+
+            painter.setPen(QColor("#ffffff"))
+            painter.drawText(
+                QRect(0, y, self.LABEL_WIDTH - 6, self.ROW_HEIGHT),
+                Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter,
+                day,
+            )
+
+            for bucket, free in enumerate(self.grid.get(day, [])):
+                x = self.LABEL_WIDTH + bucket * cell_width
+                rect = QRect(int(x), y + 1, int(x + cell_width) - int(x) - 1, self.ROW_HEIGHT - 2)
+                painter.fillRect(rect, self.cell_color(free))
+
+        if self._hover_cell:
+            day, bucket = self._hover_cell
+            row = self.days.index(day)
+            x = self.LABEL_WIDTH + bucket * cell_width
+            painter.setPen(QColor("#ffffff"))
+            painter.drawRect(QRect(int(x), self.HEADER_HEIGHT + row * self.ROW_HEIGHT + 1,
+                                   max(1, int(cell_width) - 1), self.ROW_HEIGHT - 2))
+
+        painter.end()
+
+    def mouseMoveEvent(self, event):
+        """Show who is busy in the hovered cell"""
+        cell = self.cell_at(event.position().toPoint())
+        if cell == self._hover_cell:
+            return
+        self._hover_cell = cell
+        self.update()
+
+        if not cell:
+            QToolTip.hideText()
+            return
+
+        day, bucket = cell
+        bucket_start, bucket_end = self.bucket_range(bucket)
+        free = self.grid[day][bucket]
+        busy_names = self.busy_people_at(day, bucket)
+
+        text = f"{day} {to_time(bucket_start)} - {to_time(bucket_end)}\n"
+        text += f"Free: {free} / {len(self.people)}"
+        if busy_names:
+            text += "\nBusy: " + ", ".join(busy_names)
+        QToolTip.showText(event.globalPosition().toPoint(), text, self)
+
+    def leaveEvent(self, event):
+        """Clear hover highlight when the mouse leaves"""
+        self._hover_cell = None
+        self.update()
+        super().leaveEvent(event)
+
+
+class HeatmapTab(QWidget):
+    """Weekly availability heatmap tab"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.main_window = parent
+        self.setup_ui()
+
+    def setup_ui(self):
+        """Setup the heatmap tab UI"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(8, 8, 8, 8)
+        layout.setSpacing(8)
+
+        # Title
+        title = QLabel("Availability Heatmap")
+        title.setStyleSheet("""
+            font-size: 14px;
+            font-weight: 600;
+            color: #ffffff;
+            margin: 1px 0;
+            padding: 4px 8px;
+            background-color: #404040;
+            border-radius: 3px;
+        """)
+        layout.addWidget(title)
+
+        # People selection
+        people_selection_group = QGroupBox("Select People")
+        people_selection_layout = QVBoxLayout(people_selection_group)
+
+        select_btn_layout = QHBoxLayout()
+        self.select_all_btn = QPushButton("Select All")
+        self.select_all_btn.clicked.connect(self.select_all_people)
+        self.select_none_btn = QPushButton("Select None")
+        self.select_none_btn.clicked.connect(self.select_none_people)
+        self.update_btn = QPushButton("Update Heatmap")
+        self.update_btn.clicked.connect(self.update_heatmap)
+
+        select_btn_layout.addWidget(self.select_all_btn)
+        select_btn_layout.addWidget(self.select_none_btn)
+        select_btn_layout.addWidget(self.update_btn)
+        select_btn_layout.addStretch()
+        people_selection_layout.addLayout(select_btn_layout)
+
+        self.people_checkboxes_frame = QWidget()
+        self.people_checkboxes_layout = QVBoxLayout(self.people_checkboxes_frame)
+        scroll = QScrollArea()
+        scroll.setWidgetResizable(True)
+        scroll.setMaximumHeight(160)
+        scroll.setWidget(self.people_checkboxes_frame)
+        people_selection_layout.addWidget(scroll)
+
+        layout.addWidget(people_selection_group)
+
+        # Heatmap
+        heatmap_group = QGroupBox("Free People per 10 Minutes")
+        heatmap_layout = QVBoxLayout(heatmap_group)
+        heatmap_layout.setContentsMargins(8, 8, 8, 8)
+
+        self.heatmap = HeatmapWidget(self.main_window.days)
+        heatmap_layout.addWidget(self.heatmap)
+
+        self.summary_label = QLabel("")
+        self.summary_label.setStyleSheet("color: #888888;")
+        heatmap_layout.addWidget(self.summary_label)
+
+        layout.addWidget(heatmap_group)
+        layout.addStretch()
+
+    @timed("gui.HeatmapTab.refresh_people_checkboxes")
+    def refresh_people_checkboxes(self):
+        """Refresh the people selection checkboxes and redraw"""
+        for i in reversed(range(self.people_checkboxes_layout.count())):
+            self.people_checkboxes_layout.itemAt(i).widget().setParent(None)
+
+        for person in self.main_window.people_list:
+            checkbox = QCheckBox(person.name)
+            checkbox.setChecked(True)
+            self.people_checkboxes_layout.addWidget(checkbox)
+
+        self.update_heatmap()
+
+    def get_selected_people(self):
+        """Get list of selected people from checkboxes"""
+        selected_names = set()
+        for i in range(self.people_checkboxes_layout.count()):
+            checkbox = self.people_checkboxes_layout.itemAt(i).widget()
+            if isinstance(checkbox, QCheckBox) and checkbox.isChecked():
+                selected_names.add(checkbox.text())
+        return [p for p in self.main_window.people_list if p.name in selected_names]
+
+    def update_heatmap(self):
+        """Recompute the heatmap for the selected people"""
+        selected_people = self.get_selected_people()
+        self.heatmap.set_people(selected_people)
+        self.summary_label.setText(
+            f"{len(selected_people)} people selected. "
+            "Brighter cells mean more people are free; hover a cell to see who is busy."
+        )
+
+    def select_all_people(self):
+        """Select all people checkboxes"""
+        for i in range(self.people_checkboxes_layout.count()):
+            checkbox = self.people_checkboxes_layout.itemAt(i).widget()
+            if isinstance(checkbox, QCheckBox):
+                checkbox.setChecked(True)
+
+    def select_none_people(self):
+        """Deselect all people checkboxes"""
+        for i in range(self.people_checkboxes_layout.count()):
+            checkbox = self.people_checkboxes_layout.itemAt(i).widget()
+            if isinstance(checkbox, QCheckBox):
+                checkbox.setChecked(False)
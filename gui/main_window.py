@@ -4,25 +4,44 @@ Main Window - PyQt6 Schedule Manager
 
 import sys
 import os
+import time
+import importlib
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QTabWidget,
                             QMenuBar, QFileDialog, QMessageBox, QHBoxLayout, QPushButton, QLabel)
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QKeySequence
 
-from .schedule_tab import ScheduleTab
-from .people_tab import PeopleTab
-from .courses_tab import CoursesTab
-from .common_times_tab import CommonTimesTab
 from storage import load_data, save_data, save_data_encrypted, export_data_plain
+from datastore import DataStore, PEOPLE, COURSES
+from journal import Journal
+from history import UndoStack
+import instrumentation
+
+# Wait this long after the data file changes before reloading, so a writer can finish
+RELOAD_DELAY_MS = 500
+# ...and this long before trying again if the reload failed (e.g. a half-written file)
+RELOAD_RETRY_MS = 2000
 
 
 class ScheduleManagerPyQt6(QMainWindow):
     """Main PyQt6 application window"""
     
+    # Tabs are built on first activation:
+    # (attribute, label, module, class, refresh method)
+    TABS = [
+        ("schedule_tab", "Schedule", ".schedule_tab", "ScheduleTab", "refresh_people_list"),
+        ("people_tab", "People", ".people_tab", "PeopleTab", "refresh_people_table"),
+        ("courses_tab", "Courses", ".courses_tab", "CoursesTab", "refresh_courses_list"),
+        ("common_times_tab", "Common Times", ".common_times_tab", "CommonTimesTab", "refresh_people_checkboxes"),
+        ("heatmap_tab", "Heatmap", ".heatmap_tab", "HeatmapTab", "refresh_people_checkboxes"),
+    ]
+    
     def __init__(self, people_list, courses, data_file="schedule_data.json"):
         super().__init__()
-        self.people_list = people_list
-        self.courses = courses
         self.data_file = data_file
+        self.set_store(people_list, courses)
+        self._free_at_index = None
+        self._file_system_watcher = None
         
         # Days of the week
         self.days = [
@@ -30,9 +49,35 @@ class ScheduleManagerPyQt6(QMainWindow):
             "Friday", "Saturday", "Sunday"
         ]
         
-        self.setup_ui()
+        # Apply the stylesheet before any widgets exist so they are
+        # polished once instead of re-polished after creation
         self.setup_modern_style()
-        self.refresh_displays()
+        self.setup_ui()
+        self.ensure_tab(self.tab_widget.currentIndex())
+        self.watch_data_file()
+    
+    def set_store(self, people_list, courses):
+        """Replace the data store; each committed edit is appended to data_file's journal
+        and can be undone"""
+        self.store = DataStore(people_list, courses, self.data_file,
+                               journal=Journal(self.data_file), history=UndoStack())
+        self.store.subscribe(self.on_store_changed)
+    
+    def on_store_changed(self, changes):
+        """Refresh the tabs after edits that add or remove people or courses"""
+        if changes & {PEOPLE, COURSES}:
+            self.refresh_displays()
+        self.update_undo_actions()
+    
+    @property
+    def people_list(self):
+        """People in display order (owned by the data store)"""
+        return self.store.people_list
+    
+    @property
+    def courses(self):
+        """Course name -> time slots (owned by the data store)"""
+        return self.store.courses
     
     def setup_ui(self):
         """Setup the main UI"""
@@ -93,22 +138,42 @@ class ScheduleManagerPyQt6(QMainWindow):
             }
         """)
         
-        # Create tabs
-        self.schedule_tab = ScheduleTab(self)
-        self.people_tab = PeopleTab(self)
-        self.courses_tab = CoursesTab(self)
-        self.common_times_tab = CommonTimesTab(self)
-        
-        self.tab_widget.addTab(self.schedule_tab, "Schedule")
-        self.tab_widget.addTab(self.people_tab, "People")
-        self.tab_widget.addTab(self.courses_tab, "Courses")
-        self.tab_widget.addTab(self.common_times_tab, "Common Times")
+        # Create placeholder tabs; the real widgets are built on first activation
+        for attribute, label, _, _, _ in self.TABS:
+            setattr(self, attribute, None)
+            self.tab_widget.addTab(QWidget(), label)
+        self.tab_widget.currentChanged.connect(self.ensure_tab)
         
         main_layout.addWidget(self.tab_widget)
         
         # Status bar
         self.statusBar().showMessage("Ready")
     
+    def ensure_tab(self, index):
+        """Build the tab at index if it has not been constructed yet"""
+        if index < 0:
+            return None
+        attribute, label, module_name, class_name, refresh = self.TABS[index]
+        tab = getattr(self, attribute)
+        if tab is not None:
+            return tab
+        
+        module = importlib.import_module(module_name, __package__)
+        tab = getattr(module, class_name)(self)
+        setattr(self, attribute, tab)
+        
+        # Swap the placeholder for the real tab without re-entering this slot
+        placeholder = self.tab_widget.widget(index)
+        self.tab_widget.blockSignals(True)
+        self.tab_widget.removeTab(index)
+        self.tab_widget.insertTab(index, tab, label)
+        self.tab_widget.setCurrentIndex(index)
+        self.tab_widget.blockSignals(False)
+        placeholder.deleteLater()
+        
+        getattr(tab, refresh)()
+        return tab
+    
     def setup_modern_style(self):
         """Setup modern dark theme styling for the application"""
         # Set application style with dark theme
@@ -355,6 +420,30 @@ class ScheduleManagerPyQt6(QMainWindow):
         # Exit action
         exit_action = file_menu.addAction('Exit')
         exit_action.triggered.connect(self.close)
+        
+        # Edit menu
+        edit_menu = menubar.addMenu('Edit')
+        
+        self.undo_action = edit_menu.addAction('Undo')
+        self.undo_action.setShortcut(QKeySequence.StandardKey.Undo)
+        self.undo_action.triggered.connect(self.undo)
+        
+        self.redo_action = edit_menu.addAction('Redo')
+        self.redo_action.setShortcuts([QKeySequence("Ctrl+Y"), QKeySequence("Ctrl+Shift+Z")])
+        self.redo_action.triggered.connect(self.redo)
+        self.update_undo_actions()
+        
+        # Tools menu
+        tools_menu = menubar.addMenu('Tools')
+        
+        audit_action = tools_menu.addAction('Conflict Audit...')
+        audit_action.triggered.connect(self.show_conflict_audit)
+        
+        # Help menu
+        help_menu = menubar.addMenu('Help')
+        
+        timing_action = help_menu.addAction('Timing Summary...')
+        timing_action.triggered.connect(self.show_timing_summary)
     
     def create_toolbar(self):
         """Create toolbar with file operation buttons"""
@@ -401,12 +490,15 @@ class ScheduleManagerPyQt6(QMainWindow):
                 # Load data from selected file
                 new_people_list, new_courses = load_data(file_path)
                 
-                # Update the current data
-                self.people_list = new_people_list
-                self.courses = new_courses
+                # Edits now go to the opened file's journal, and it is the file watched
+                self.store.journal.wait()
+                self.data_file = file_path
+                self.set_store(new_people_list, new_courses)
+                self.watch_data_file()
                 
                 # Refresh all displays
                 self.refresh_displays()
+                self.update_undo_actions()
                 
                 QMessageBox.information(
                     self, 
@@ -424,7 +516,10 @@ class ScheduleManagerPyQt6(QMainWindow):
     def save_data(self):
         """Save data to current file (encrypted)"""
         try:
+            self.store.journal.wait()
             save_data_encrypted(self.people_list, self.courses, self.data_file)
+            # The journal was folded into the snapshot; keep new records encrypted too
+            self.store.journal.encrypted = True
             QMessageBox.information(
                 self, 
                 "Save Successful", 
@@ -453,6 +548,9 @@ class ScheduleManagerPyQt6(QMainWindow):
                 
                 # Update the current data file path
                 self.data_file = file_path
+                self.store.data_file = file_path
+                self.store.journal = Journal(file_path, encrypted=True)
+                self.watch_data_file()
                 
                 QMessageBox.information(
                     self, 
@@ -494,16 +592,201 @@ class ScheduleManagerPyQt6(QMainWindow):
                     f"Failed to export data: {str(e)}"
                 )
 
+    def undo(self):
+        """Undo the last edit"""
+        self.replay_history(self.store.history.undo, "Undid")
+    
+    def redo(self):
+        """Redo the last undone edit"""
+        self.replay_history(self.store.history.redo, "Redid")
+    
+    def replay_history(self, replay, verb):
+        try:
+            edit = replay(self.store)
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+        finally:
+            # The stacks change after the replayed transaction has notified us
+            self.update_undo_actions()
+        if edit is None:
+            return
+        # Edits that added or removed people or courses already refreshed every tab
+        if not edit.changes & {PEOPLE, COURSES}:
+            self.refresh_details()
+        self.statusBar().showMessage(f"{verb}: {edit.label}")
+    
+    def update_undo_actions(self):
+        """Name the edits that Undo and Redo would apply, and disable them when there are none"""
+        history = self.store.history
+        undo_label, redo_label = history.undo_label(), history.redo_label()
+        self.undo_action.setEnabled(undo_label is not None)
+        self.undo_action.setText(f"Undo {undo_label}" if undo_label else "Undo")
+        self.redo_action.setEnabled(redo_label is not None)
+        self.redo_action.setText(f"Redo {redo_label}" if redo_label else "Redo")
+    
+    def refresh_details(self):
+        """Redraw the selected person or course after their schedule or time slots changed"""
+        if self.schedule_tab is not None:
+            current = self.schedule_tab.people_list_widget.currentItem()
+            if current:
+                self.schedule_tab.show_person_schedule(current.text())
+        if self.courses_tab is not None:
+            current = self.courses_tab.courses_list_widget.currentItem()
+            if current:
+                self.courses_tab.show_course_details(current.text())
+        if self.people_tab is not None:
+            self.people_tab.refresh_people_table()
+    
+    def show_timing_summary(self):
+        """Show the instrumentation summary collected so far"""
+        if not instrumentation.is_enabled():
+            QMessageBox.information(
+                self,
+                "Timing Summary",
+                "Timing is disabled. Start the application with --timing "
+                "or set SCHEDULER_TIMING=1 to record it."
+            )
+            return
+        
+        self.show_text_dialog("Timing Summary", instrumentation.format_summary())
+    
+    def show_conflict_audit(self):
+        """Report everyone whose courses or personal periods overlap"""
+        from conflicts import audit_clashes, format_clash
+        lines = []
+        affected = 0
+        for person, clashes in audit_clashes(self.people_list, self.courses):
+            affected += 1
+            lines.append(person.name)
+            lines.extend(f"    {format_clash(clash)}" for clash in clashes)
+            lines.append("")
+        
+        header = f"{affected} of {len(self.people_list)} people have schedule clashes."
+        self.show_text_dialog("Conflict Audit", "\n".join([header, ""] + lines))
+        self.statusBar().showMessage(header)
+    
+    def show_text_dialog(self, title, content):
+        """Show read-only text in a dialog"""
+        from PyQt6.QtWidgets import QDialog, QTextEdit, QDialogButtonBox
+        dialog = QDialog(self)
+        dialog.setWindowTitle(title)
+        dialog.resize(760, 420)
+        layout = QVBoxLayout(dialog)
+        
+        text = QTextEdit()
+        text.setReadOnly(True)
+        text.setPlainText(content)
+        layout.addWidget(text)
+        
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        buttons.rejected.connect(dialog.reject)
+        layout.addWidget(buttons)
+        dialog.exec()
+    
+    def watch_data_file(self):
+        """Reload data_file when another program changes it. The directory is
+        watched too, as atomic replaces and new journal files only show up there."""
+        from PyQt6.QtCore import QFileSystemWatcher
+        from watcher import FileWatcher
+        if self._file_system_watcher is None:
+            self._file_system_watcher = QFileSystemWatcher(self)
+            self._file_system_watcher.fileChanged.connect(self.on_data_file_event)
+            self._file_system_watcher.directoryChanged.connect(self.on_data_file_event)
+            # Writers often touch the files several times; check once they are done
+            self._reload_timer = QTimer(self)
+            self._reload_timer.setSingleShot(True)
+            self._reload_timer.timeout.connect(self.check_data_file)
+        else:
+            watched = self._file_system_watcher.files() + self._file_system_watcher.directories()
+            if watched:
+                self._file_system_watcher.removePaths(watched)
+        self.file_watcher = FileWatcher(self.data_file, self.reload_data_file)
+        self._file_system_watcher.addPath(os.path.dirname(os.path.abspath(self.data_file)))
+        self.add_watched_files()
+    
+    def add_watched_files(self):
+        """Watch the data and journal files that exist (a replaced file drops its watch)"""
+        from watcher import watched_files
+        watched = set(self._file_system_watcher.files())
+        paths = [path for path in watched_files(self.data_file)
+                 if path not in watched and os.path.exists(path)]
+        if paths:
+            self._file_system_watcher.addPaths(paths)
+    
+    def on_data_file_event(self, path):
+        self.add_watched_files()
+        self._reload_timer.start(RELOAD_DELAY_MS)
+    
+    def check_data_file(self):
+        """Apply the data file's changes if it was changed by someone else"""
+        try:
+            self.file_watcher.check()
+        except Exception as e:
+            # Probably caught mid-write: try again shortly, whether or not the file changes again
+            self.file_watcher.forget()
+            self.statusBar().showMessage(f"Could not reload {os.path.basename(self.data_file)}: {e}")
+            self._reload_timer.start(RELOAD_RETRY_MS)
+    
+    def reload_data_file(self):
+        """Apply only what changed in data_file to the store, keeping views and caches"""
+        from watcher import apply_file_changes, count_changes
+        people_list, courses = load_data(self.data_file)
+        summary = apply_file_changes(self.store, people_list, courses)
+        changes = count_changes(summary)
+        if not changes:
+            return
+        # Recorded edits may no longer apply to the changed data
+        self.store.history.clear()
+        self.update_undo_actions()
+        # Adding or removing people or courses already refreshed every tab
+        if not any(kind["added"] or kind["removed"] for kind in summary.values()):
+            self.refresh_details()
+        self.statusBar().showMessage(
+            f"Reloaded {os.path.basename(self.data_file)}: "
+            f"{changes} change{'s' if changes != 1 else ''} made by another program"
+        )
+    
+    def course_overlaps(self):
+        """Course overlap index for the current courses, kept up to date by the store"""
+        return self.store.course_overlaps()
+    
+    def free_at_index(self):
+        """Who-is-free index over everyone, built on first use and updated per change"""
+        from availability import FreeAtIndex
+        if self._free_at_index is None:
+            self._free_at_index = FreeAtIndex(self.people_list)
+        else:
+            self._free_at_index.update(self.people_list)
+        return self._free_at_index
+    
     def refresh_displays(self):
-        """Refresh all displays"""
-        self.schedule_tab.refresh_people_list()
-        self.people_tab.refresh_people_table()
-        self.courses_tab.refresh_courses_list()
-        self.common_times_tab.refresh_people_checkboxes()
+        """Refresh all constructed tabs (unbuilt tabs refresh when first shown)"""
+        for attribute, _, _, _, refresh in self.TABS:
+            tab = getattr(self, attribute)
+            if tab is not None:
+                getattr(tab, refresh)()
+
+
+def report_startup_time(window, started_at):
+    """Show how long it took to get the first window on screen"""
+    elapsed = time.perf_counter() - started_at
+    instrumentation.record("startup.first_window", elapsed)
+    elapsed_ms = elapsed * 1000
+    window.statusBar().showMessage(f"Ready (started in {elapsed_ms:.0f} ms)")
+    if os.environ.get("SCHEDULER_STARTUP_TIMING"):
+        print(f"startup: first window shown after {elapsed_ms:.1f} ms", file=sys.stderr)
 
 
-def launch_pyqt6_gui(people_list, courses, data_file="schedule_data.json"):
-    """Launch the PyQt6 schedule manager GUI"""
+def launch_pyqt6_gui(people_list, courses, data_file="schedule_data.json", started_at=None,
+                     watchdog=None):
+    """Launch the PyQt6 schedule manager GUI
+
+    `watchdog` is a stall threshold in seconds for the event-loop watchdog;
+    by default it is taken from the SCHEDULER_WATCHDOG environment variable.
+    """
+    if started_at is None:
+        started_at = time.perf_counter()
     app = QApplication(sys.argv)
     
     # Set application properties
@@ -515,5 +798,15 @@ def launch_pyqt6_gui(people_list, courses, data_file="schedule_data.json"):
     window = ScheduleManagerPyQt6(people_list, courses, data_file)
     window.show()
     
+    if watchdog is None:
+        from .watchdog import watchdog_settings
+        watchdog = watchdog_settings(os.environ.get("SCHEDULER_WATCHDOG"))
+    if watchdog:
+        from .watchdog import start_watchdog
+        window.watchdog = start_watchdog(window, data_file, watchdog)
+    
+    # Runs once the event loop has painted the first frame
+    QTimer.singleShot(0, lambda: report_startup_time(window, started_at))
+    
     # Run the application
     sys.exit(app.exec())
@@ -7,6 +7,7 @@ from PyQt6.QtWidgets import (
     QPushButton, QTableWidget, QTableWidgetItem, QGroupBox, QGridLayout
 )
 from PyQt6.QtCore import Qt
+from instrumentation import timed
 
 
 class PeopleTab(QWidget):
@@ -77,6 +78,7 @@ class PeopleTab(QWidget):
         people_layout.addLayout(people_btn_layout)
         layout.addWidget(people_group)
     
+    @timed("gui.PeopleTab.refresh_people_table")
     def refresh_people_table(self):
         """Refresh the people table"""
         self.people_table.setRowCount(len(self.main_window.people_list))
@@ -87,12 +89,7 @@ class PeopleTab(QWidget):
             self.people_table.setItem(row, 0, name_item)
             
             # Courses
-            course_names = []
-            for course_slots in person.schedule:
-                for course_name, stored_slots in self.main_window.courses.items():
-                    if stored_slots == course_slots:
-                        course_names.append(course_name)
-                        break
+            course_names = self.main_window.store.person_course_names(person)
             
             courses_item = QTableWidgetItem(", ".join(course_names))
             self.people_table.setItem(row, 1, courses_item)
@@ -102,10 +99,7 @@ class PeopleTab(QWidget):
         name = self.new_person_name.text().strip()
         if name:
             try:
-                import storage as st
-                st.add_person(self.main_window.people_list, name)
-                st.save_data(self.main_window.people_list, self.main_window.courses, self.main_window.data_file)
-                self.main_window.refresh_displays()
+                self.main_window.store.add_person(name)
                 self.new_person_name.clear()
                 self.main_window.statusBar().showMessage(f"Added person: {name}")
             except ValueError as e:
@@ -125,10 +119,7 @@ class PeopleTab(QWidget):
                                        QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
             if reply == QMessageBox.StandardButton.Yes:
                 try:
-                    import storage as st
-                    st.remove_person(self.main_window.people_list, name)
-                    st.save_data(self.main_window.people_list, self.main_window.courses, self.main_window.data_file)
-                    self.main_window.refresh_displays()
+                    self.main_window.store.remove_person(name)
                     self.main_window.statusBar().showMessage(f"Removed person: {name}")
                 except ValueError as e:
                     QMessageBox.warning(self, "Error", str(e))
@@ -147,10 +138,9 @@ class PeopleTab(QWidget):
             name, ok = QInputDialog.getText(self, "Import ICS", "Enter person name:")
             if ok and name.strip():
                 try:
-                    import storage as st
-                    st.import_ics_file(file_path, self.main_window.courses, name.strip(), self.main_window.people_list)
-                    st.save_data(self.main_window.people_list, self.main_window.courses, self.main_window.data_file)
-                    self.main_window.refresh_displays()
+                    self.main_window.store.import_ics_file(file_path, name.strip())
+                    # An existing person may only have gained enrolments
+                    self.refresh_people_table()
                     self.main_window.statusBar().showMessage(f"Imported ICS file for: {name.strip()}")
                 except Exception as e:
                     QMessageBox.critical(self, "Error", f"Failed to import ICS file: {str(e)}")
@@ -4,11 +4,13 @@ Schedule Management Tab
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QListWidget, 
-    QPushButton, QTextEdit, QGroupBox, QSplitter, QComboBox,
-    QGridLayout, QMessageBox, QDialog
+    QPushButton, QGroupBox, QSplitter, QComboBox,
+    QGridLayout, QMessageBox, QDialog, QScrollArea
 )
 from PyQt6.QtCore import Qt
 from .time_picker import TimePickerWidget
+from .timetable_widget import TimetableWidget, build_timetable_layout
+from instrumentation import timed
 
 
 class ScheduleTab(QWidget):
@@ -17,6 +19,10 @@ class ScheduleTab(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.main_window = parent
+        # person name -> (schedule signature, timetable layout)
+        self._layout_cache = {}
+        self._course_names = {}
+        self._courses_key = None
         self.setup_ui()
     
     def setup_ui(self):
@@ -84,114 +90,74 @@ class ScheduleTab(QWidget):
         schedule_layout.setContentsMargins(8, 8, 8, 8)
         schedule_layout.setSpacing(8)
         
-        # Schedule text with beautiful styling
-        self.schedule_text = QTextEdit()
-        self.schedule_text.setReadOnly(True)
-        self.schedule_text.setMinimumHeight(200)
-        self.schedule_text.setStyleSheet("""
-            QTextEdit {
-                font-family: 'Segoe UI', 'Arial', sans-serif;
-                font-size: 12px;
-                line-height: 1.4;
-                padding: 12px;
-                background-color: #2a2a2a;
-                color: #ffffff;
-                border: none;
-                border-radius: 6px;
-                selection-background-color: #007ACC;
-            }
+        self.schedule_title = QLabel("Select a person to view their schedule")
+        self.schedule_title.setStyleSheet("""
+            font-size: 16px;
+            font-weight: 600;
+            color: #007ACC;
+            padding: 4px 0;
         """)
-        schedule_layout.addWidget(self.schedule_text)
+        schedule_layout.addWidget(self.schedule_title)
+        
+        # Timetable grid rendered from a cached per-person layout
+        self.timetable = TimetableWidget(self.main_window.days)
+        timetable_scroll = QScrollArea()
+        timetable_scroll.setWidgetResizable(True)
+        timetable_scroll.setMinimumHeight(200)
+        timetable_scroll.setWidget(self.timetable)
+        schedule_layout.addWidget(timetable_scroll)
         
         layout.addWidget(schedule_group)
         
         # Connect signals
         self.people_list_widget.currentItemChanged.connect(self.on_person_select)
     
+    @timed("gui.ScheduleTab.refresh_people_list")
     def refresh_people_list(self):
         """Refresh the people list widget"""
+        self.refresh_course_names()
         self.people_list_widget.clear()
         for person in self.main_window.people_list:
             from PyQt6.QtWidgets import QListWidgetItem
             item = QListWidgetItem(person.name)
             self.people_list_widget.addItem(item)
     
+    def refresh_course_names(self):
+        """Rebuild the slot-list -> course name map when the course set changes"""
+        courses = self.main_window.courses
+        courses_key = tuple((name, id(slots)) for name, slots in courses.items())
+        if courses_key != self._courses_key:
+            self._courses_key = courses_key
+            self._course_names = {id(slots): name for name, slots in courses.items()}
+            # Course names feed every cached layout
+            self._layout_cache.clear()
+    
     def on_person_select(self, current, previous):
         """Handle person selection"""
         if current:
             self.show_person_schedule(current.text())
     
+    def get_timetable_layout(self, person):
+        """Return the cached layout for a person, rebuilding it if their schedule changed"""
+        signature = person.schedule_signature()
+        cached = self._layout_cache.get(person.name)
+        if cached and cached[0] == signature:
+            return cached[1]
+        
+        timetable = build_timetable_layout(person, self._course_names, self.main_window.days)
+        self._layout_cache[person.name] = (signature, timetable)
+        return timetable
+    
     def show_person_schedule(self, person_name):
         """Show selected person's schedule"""
-        self.schedule_text.clear()
-        
-        person = next((p for p in self.main_window.people_list if p.name == person_name), None)
+        person = self.main_window.store.get_person(person_name)
         if not person:
+            self.schedule_title.setText("Select a person to view their schedule")
+            self.timetable.set_timetable(None)
             return
         
-        # Start building HTML content
-        html_content = f"""
-        <div style="margin-bottom: 20px;">
-            <h2 style="color: #007ACC; margin: 0 0 10px 0; font-size: 24px; font-weight: 600;">
-                Schedule for {person_name}
-            </h2>
-        </div>
-        """
-        
-        # Group schedule by day
-        schedule_by_day = {}
-        course_names = {}
-        
-        # Find course names for each set of slots
-        for course_name, course_slots in self.main_window.courses.items():
-            for person_course in person.schedule:
-                if person_course == course_slots:
-                    course_names[id(person_course)] = course_name
-        
-        # Organize by day
-        for course_slots in person.schedule:
-            course_name = course_names.get(id(course_slots), "Individual Slots")
-            for slot in course_slots:
-                if slot.day not in schedule_by_day:
-                    schedule_by_day[slot.day] = []
-                schedule_by_day[slot.day].append({
-                    "time": f"{slot.start_time} - {slot.end_time}",
-                    "course": course_name,
-                })
-        
-        # Display schedule with beautiful HTML formatting
-        for day in self.main_window.days:
-            html_content += f"""
-            <div style="margin-bottom: 16px;">
-                <h3 style="color: #ffffff; margin: 0 0 8px 0; font-size: 18px; font-weight: 600;">
-                    {day}
-                </h3>
-            """
-            
-            if day in schedule_by_day:
-                # Sort by start time
-                day_slots = sorted(schedule_by_day[day], key=lambda x: x["time"])
-                html_content += '<div style="margin-left: 20px;">'
-                for slot_info in day_slots:
-                    html_content += f"""
-                    <div style="margin-bottom: 8px; padding: 8px 0;">
-                        <span style="color: #007ACC; font-weight: 600; font-size: 14px;">{slot_info['time']}</span>
-                        <span style="color: #ffffff; margin-left: 12px;">{slot_info['course']}</span>
-                    </div>
-                    """
-                html_content += '</div>'
-            else:
-                html_content += """
-                <div style="margin-left: 20px; padding: 8px 0;">
-                    <span style="color: #666666; font-style: italic;">Free day</span>
-                </div>
-                """
-            
-            html_content += '</div>'
-        
-        html_content += '</div>'
-        
-        self.schedule_text.setHtml(html_content)
+        self.schedule_title.setText(f"Schedule for {person_name}")
+        self.timetable.set_timetable(self.get_timetable_layout(person))
     
     def add_personal_period(self):
         """Add a personal period to the selected person"""
@@ -201,7 +167,7 @@ class ScheduleTab(QWidget):
             return
         
         person_name = current_item.text()
-        person = next((p for p in self.main_window.people_list if p.name == person_name), None)
+        person = self.main_window.store.get_person(person_name)
         if not person:
             return
         
@@ -217,27 +183,15 @@ class ScheduleTab(QWidget):
             end_time = data['end_time']
             
             # Create the time slot
-            from models import TimeSlot
-            time_slot = TimeSlot(start_time, end_time, day)
+            from models import intern_time_slot
+            time_slot = intern_time_slot(start_time, end_time, day)
             
-            # Check for conflicts with existing schedule
-            for course_slots in person.schedule:
-                for existing_slot in course_slots:
-                    if (existing_slot.day == day and 
-                        existing_slot.start_time == start_time and 
-                        existing_slot.end_time == end_time):
-                        QMessageBox.warning(self, "Duplicate Period", 
-                                          f"This time slot already exists for {person_name}.")
-                        return
-            
-            # Create a new individual course for this personal period
-            individual_slots = [time_slot]
-            person.schedule.append(individual_slots)
-            person.busy_time = person._create_busy_time_dict()
-            
-            # Save data
-            import storage as st
-            st.save_data(self.main_window.people_list, self.main_window.courses, self.main_window.data_file)
+            # Add it as an individual slot list, refusing overlaps with the existing schedule
+            try:
+                self.main_window.store.add_personal_period(person_name, [time_slot])
+            except ValueError as e:
+                QMessageBox.warning(self, "Overlapping Period", str(e))
+                return
             
             # Refresh display
             self.show_person_schedule(person_name)
@@ -249,10 +203,7 @@ class ScheduleTab(QWidget):
         name, ok = QInputDialog.getText(self, "Add Person", "Enter person name:")
         if ok and name.strip():
             try:
-                import storage as st
-                st.add_person(self.main_window.people_list, name.strip())
-                st.save_data(self.main_window.people_list, self.main_window.courses, self.main_window.data_file)
-                self.main_window.refresh_displays()
+                self.main_window.store.add_person(name.strip())
                 self.main_window.statusBar().showMessage(f"Added person: {name.strip()}")
             except ValueError as e:
                 from PyQt6.QtWidgets import QMessageBox
@@ -268,10 +219,7 @@ class ScheduleTab(QWidget):
                                        QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
             if reply == QMessageBox.StandardButton.Yes:
                 try:
-                    import storage as st
-                    st.remove_person(self.main_window.people_list, name)
-                    st.save_data(self.main_window.people_list, self.main_window.courses, self.main_window.data_file)
-                    self.main_window.refresh_displays()
+                    self.main_window.store.remove_person(name)
                     self.main_window.statusBar().showMessage(f"Removed person: {name}")
                 except ValueError as e:
                     QMessageBox.warning(self, "Error", str(e))
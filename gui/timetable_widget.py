@@ -0,0 +1,131 @@
+"""
+Timetable Widget - Lightweight weekly grid for a single person's schedule
+"""
+
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtCore import Qt, QRectF
+from PyQt6.QtGui import QPainter, QColor, QFont
+from schedule import to_minutes, to_time
+
+
+def build_timetable_layout(person, course_names, days, start="09:00", end="20:00"):
+    """Build the drawable layout for a person's schedule.
+
+    Returns a dict with the visible minute range and a list of blocks
+    (day_index, start_minutes, end_minutes, time_text, course_name).
+    `course_names` maps id(course_slots) -> course name.
+    """
+    blocks = []
+    first_m, last_m = to_minutes(start), to_minutes(end)
+    for course_slots in person.schedule:
+        course_name = course_names.get(id(course_slots), "Individual Slots")
+        for slot in course_slots:
+            if slot.day not in days:
+                continue
+            slot_start, slot_end = to_minutes(slot.start_time), to_minutes(slot.end_time)
+            blocks.append((
+                days.index(slot.day),
+                slot_start,
+                slot_end,
+                f"{slot.start_time} - {slot.end_time}",
+                course_name,
+            ))
+            first_m = min(first_m, slot_start)
+            last_m = max(last_m, slot_end)
+
+    blocks.sort()
+    # Snap the visible range to whole hours
+    return {
+        "start": first_m - first_m % 60,
+        "end": last_m + (-last_m % 60),
+        "blocks": blocks,
+    }
+
+
+class TimetableWidget(QWidget):
+    """Paints a day-column timetable from a prebuilt layout"""
+
+    HEADER_HEIGHT = 28
+    LABEL_WIDTH = 52
+    HOUR_HEIGHT = 44
+
+    def __init__(self, days, parent=None):
+        super().__init__(parent)
+        self.days = days
+        self.timetable = None
+
+    def set_timetable(self, timetable):
+        """Show a layout from build_timetable_layout (or None to clear)"""
+        self.timetable = timetable
+        if timetable:
+            hours = (timetable["end"] - timetable["start"]) // 60
+            self.setMinimumHeight(self.HEADER_HEIGHT + hours * self.HOUR_HEIGHT + 4)
+        self.update()
+
+    def paintEvent(self, event):
+        """Draw the day grid and course blocks"""
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#2a2a2a"))
+        if not self.timetable:
+            painter.end()
+            return
+
+        start_m = self.timetable["start"]
+        end_m = self.timetable["end"]
+        column_width = (self.width() - self.LABEL_WIDTH) / len(self.days)
+        minute_height = self.HOUR_HEIGHT / 60
+
+        def y_for(minute):
+            return self.HEADER_HEIGHT + (minute - start_m) * minute_height
+
+        # Day headers and column separators
+        painter.setFont(QFont("Segoe UI", 9, QFont.Weight.DemiBold))
+        busy_days = {block[0] for block in self.timetable["blocks"]}
+        for i, day in enumerate(self.days):
+            x = self.LABEL_WIDTH + i * column_width
+            painter.setPen(QColor("#ffffff"))
+            painter.drawText(
+                QRectF(x, 0, column_width, self.HEADER_HEIGHT),
+                Qt.AlignmentFlag.AlignCenter,
+                day,
+            )
+            painter.setPen(QColor("#404040"))
+            painter.drawLine(int(x), self.HEADER_HEIGHT, int(x), int(y_for(end_m)))
+            if i not in busy_days:
+                painter.setPen(QColor("#666666"))
+                painter.drawText(
+                    QRectF(x, self.HEADER_HEIGHT, column_width, self.HOUR_HEIGHT),
+                    Qt.AlignmentFlag.AlignCenter,
+                    "Free day",
+                )
+
+        # Hour lines and labels
+        painter.setFont(QFont("Segoe UI", 8))
+        for minute in range(start_m, end_m + 1, 60):
+            y = y_for(minute)
+            painter.setPen(QColor("#404040"))
+            painter.drawLine(self.LABEL_WIDTH, int(y), self.width(), int(y))
+            painter.setPen(QColor("#aaaaaa"))
+            painter.drawText(QRectF(0, y - 8, self.LABEL_WIDTH - 6, 16),
+                             Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter,
+                             to_time(minute))
+
+        # Course blocks
+        for day_index, slot_start, slot_end, time_text, course_name in self.timetable["blocks"]:
+            rect = QRectF(
+                self.LABEL_WIDTH + day_index * column_width + 2,
+                y_for(slot_start) + 1,
+                column_width - 4,
+                max(2, (slot_end - slot_start) * minute_height - 2),
+            )
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor("#007ACC"))
+            painter.drawRoundedRect(rect, 4, 4)
+            painter.setPen(QColor("#ffffff"))
+            painter.drawText(
+                rect.adjusted(4, 2, -4, -2),
+                Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop | Qt.TextFlag.TextWordWrap,
+                f"{time_text}\n{course_name}",
+            )
+
+        painter.end()
@@ -0,0 +1,140 @@
+"""
+Event Loop Watchdog - detects handlers that block the Qt event loop
+
+A QTimer heartbeat fires every few milliseconds on the GUI thread. A
+background thread watches for the heartbeat going quiet; when it does, it
+samples the GUI thread's stack to find the slot that is running (e.g.
+CommonTimesTab.find_all_common_times). When the loop recovers, the stall
+length, slot and stack are written to a rotating log file.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from logging.handlers import RotatingFileHandler
+
+from PyQt6.QtCore import QObject, QTimer
+
+import instrumentation
+
+LOG_FILE_NAME = "scheduler_watchdog.log"
+
+
+def running_slot(frame):
+    """Name the outermost Qt method on the stack, e.g. 'PeopleTab.import_ics_file'"""
+    slot = None
+    while frame is not None:
+        owner = frame.f_locals.get("self")
+        if isinstance(owner, QObject) and not isinstance(owner, EventLoopWatchdog):
+            slot = f"{type(owner).__name__}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return slot
+
+
+class EventLoopWatchdog(QObject):
+    """Measures event-loop latency and logs stalls above a threshold"""
+
+    def __init__(self, log_path, threshold=0.25, interval_ms=20, parent=None):
+        super().__init__(parent)
+        self.threshold = threshold
+        self.interval = interval_ms / 1000
+        self.logger = self._create_logger(log_path)
+        self._main_thread_id = threading.get_ident()
+        self._lock = threading.Lock()
+        self._last_beat = time.monotonic()
+        self._sample = None
+        self._stop = threading.Event()
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._beat)
+        self._monitor = threading.Thread(
+            target=self._watch, name="event-loop-watchdog", daemon=True
+        )
+
+    @staticmethod
+    def _create_logger(log_path):
+        logger = logging.getLogger("scheduler.watchdog")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        if not logger.handlers:
+            handler = RotatingFileHandler(log_path, maxBytes=1_000_000, backupCount=3,
+                                          encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logger.addHandler(handler)
+        return logger
+
+    def start(self):
+        """Start the heartbeat and the monitoring thread"""
+        self._last_beat = time.monotonic()
+        self._timer.start()
+        self._monitor.start()
+
+    def stop(self):
+        """Stop monitoring"""
+        self._stop.set()
+        self._timer.stop()
+
+    def _beat(self):
+        """Heartbeat on the GUI thread; reports the stall that just ended"""
+        now = time.monotonic()
+        with self._lock:
+            gap = now - self._last_beat
+            self._last_beat = now
+            sample = self._sample
+            self._sample = None
+
+        # The heartbeat itself accounts for one interval of the gap
+        stall = gap - self.interval
+        if stall < self.threshold:
+            return
+
+        instrumentation.count("gui.event_loop_stalls")
+        instrumentation.record("gui.event_loop_stall", stall)
+        slot, stack = sample if sample else (None, "")
+        self.logger.info(
+            "event loop blocked for %.0f ms in %s\n%s",
+            stall * 1000,
+            slot or "unknown handler",
+            stack,
+        )
+
+    def _watch(self):
+        """Background thread: sample the GUI thread's stack while it is stalled"""
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                stalled = time.monotonic() - self._last_beat > self.threshold
+                already_sampled = self._sample is not None
+            if not stalled or already_sampled:
+                continue
+
+            frame = sys._current_frames().get(self._main_thread_id)
+            if frame is None:
+                continue
+            sample = (running_slot(frame), "".join(traceback.format_stack(frame)))
+            with self._lock:
+                # Only keep it if the stall is still in progress
+                if time.monotonic() - self._last_beat > self.threshold:
+                    self._sample = sample
+
+
+def watchdog_settings(value):
+    """Parse SCHEDULER_WATCHDOG: '1' uses the default threshold, a number is milliseconds"""
+    if not value or value == "0":
+        return None
+    try:
+        threshold_ms = float(value)
+    except ValueError:
+        threshold_ms = 0
+    return threshold_ms / 1000 if threshold_ms > 1 else 0.25
+
+
+def start_watchdog(window, data_file, threshold=0.25):
+    """Attach a watchdog to the main window, logging next to the data file"""
+    log_dir = os.path.dirname(os.path.abspath(data_file))
+    watchdog = EventLoopWatchdog(os.path.join(log_dir, LOG_FILE_NAME), threshold, parent=window)
+    watchdog.start()
+    return watchdog
@@ -0,0 +1,120 @@
+"""
+Undo History - multi-level undo and redo of DataStore edits
+
+Each committed DataStore transaction becomes one history entry made of
+delta commands: for every mutation, the DataStore call that redoes it and
+the calls that reverse it (removing a course is reversed by adding it back
+and restoring the schedules of the people who took it). Commands hold names
+and references to the slot lists they touch, never copies of the data set,
+so the history grows with the size of the edits, not of the data.
+
+Undo and redo run the commands as a new transaction on the store, so indexes,
+busy times, the journal and subscribers are updated exactly as for the
+original edit.
+"""
+
+from collections import deque
+
+HISTORY_LIMIT = 100
+
+# DataStore method -> how an edit starting with it is named in the Edit menu
+LABELS = {
+    "add_person": "Add Person",
+    "remove_person": "Remove Person",
+    "update_person_schedule": "Edit Schedule",
+    "add_personal_period": "Add Personal Period",
+    "add_course": "Add Course",
+    "remove_course": "Remove Course",
+    "update_course": "Edit Course",
+    "add_course_slot": "Add Time Slot",
+    "assign_course_to_person": "Enroll",
+    "remove_course_from_person": "Unenroll",
+    "import_ics_file": "Import ICS",
+}
+
+
+def describe_edit(method_name, args):
+    """Menu label for an edit, e.g. "Remove Course 'Physics'" """
+    label = LABELS.get(method_name, method_name.replace("_", " ").title())
+    if args and isinstance(args[0], str):
+        return f"{label} '{args[0]}'"
+    return label
+
+
+def command(method_name, *args, **kwargs):
+    """A DataStore call to replay later"""
+    return (method_name, args, kwargs)
+
+
+def run_commands(store, commands):
+    for method_name, args, kwargs in commands:
+        getattr(store, method_name)(*args, **kwargs)
+
+
+class Edit:
+    """One committed transaction: its label, change kinds and (redo, undo commands) steps"""
+
+    __slots__ = ("label", "changes", "steps")
+
+    def __init__(self, label, changes, steps):
+        self.label = label
+        self.changes = changes
+        self.steps = steps
+
+
+class UndoStack:
+    """Undo and redo stacks of Edits for one DataStore"""
+
+    def __init__(self, limit=HISTORY_LIMIT):
+        self.undo_edits = deque(maxlen=limit)
+        self.redo_edits = []
+        self.replaying = False
+
+    def record(self, edit):
+        """Add a newly committed edit; it replaces anything that could be redone"""
+        self.undo_edits.append(edit)
+        self.redo_edits.clear()
+
+    def clear(self):
+        self.undo_edits.clear()
+        self.redo_edits.clear()
+
+    def can_undo(self):
+        return bool(self.undo_edits)
+
+    def can_redo(self):
+        return bool(self.redo_edits)
+
+    def undo_label(self):
+        return self.undo_edits[-1].label if self.undo_edits else None
+
+    def redo_label(self):
+        return self.redo_edits[-1].label if self.redo_edits else None
+
+    def undo(self, store):
+        """Reverse the last edit; returns it, or None if there is nothing to undo"""
+        if not self.undo_edits:
+            return None
+        edit = self.undo_edits[-1]
+        commands = [undo for _, undo_commands in reversed(edit.steps) for undo in undo_commands]
+        self._replay(store, edit.label, commands)
+        self.redo_edits.append(self.undo_edits.pop())
+        return edit
+
+    def redo(self, store):
+        """Repeat the last undone edit; returns it, or None if there is nothing to redo"""
+        if not self.redo_edits:
+            return None
+        edit = self.redo_edits[-1]
+        self._replay(store, edit.label, [redo for redo, _ in edit.steps])
+        self.undo_edits.append(self.redo_edits.pop())
+        return edit
+
+    def _replay(self, store, label, commands):
+        # A failing command rolls the whole transaction back and leaves both stacks as they were
+        self.replaying = True
+        try:
+            with store.transaction(label):
+                run_commands(store, commands)
+        finally:
+            self.replaying = False
@@ -0,0 +1,184 @@
+"""
+Instrumentation - named timing spans and counters
+
+Disabled by default; when disabled a span is a shared no-op object and a
+timed function costs one flag check. Enable with the SCHEDULER_TIMING
+environment variable or the --timing command-line flag. A p50/p95/max
+summary per span is printed to stderr on exit and is available from the
+GUI Help menu.
+
+    from instrumentation import span, timed, count
+
+    @timed("storage.load_data")
+    def load_data(filename): ...
+
+    with span("gui.render"):
+        ...
+    count("cache.hit")
+"""
+
+import atexit
+import os
+import sys
+import threading
+import time
+from functools import wraps
+
+_enabled = False
+_atexit_registered = False
+_lock = threading.Lock()
+_spans = {}
+_counters = {}
+
+
+def enable(dump_on_exit=True):
+    """Start recording spans and counters"""
+    global _enabled, _atexit_registered
+    _enabled = True
+    if dump_on_exit and not _atexit_registered:
+        atexit.register(dump)
+        _atexit_registered = True
+
+
+def disable():
+    """Stop recording (collected data is kept)"""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    """Forget everything recorded so far"""
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+def record(name, seconds):
+    """Add one duration sample to a span"""
+    if not _enabled:
+        return
+    with _lock:
+        _spans.setdefault(name, []).append(seconds)
+
+
+def count(name, amount=1):
+    """Increment a named counter"""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name):
+    """Context manager timing its body under `name`"""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def timed(name=None):
+    """Decorator timing every call of a function as a span"""
+    def decorate(func):
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(span_name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def _percentile(sorted_values, fraction):
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summary():
+    """Return ({span: stats}, {counter: value}) with times in seconds"""
+    with _lock:
+        spans = {name: sorted(values) for name, values in _spans.items()}
+        counters = dict(_counters)
+    stats = {}
+    for name, values in spans.items():
+        stats[name] = {
+            "count": len(values),
+            "total": sum(values),
+            "p50": _percentile(values, 0.50),
+            "p95": _percentile(values, 0.95),
+            "max": values[-1],
+        }
+    return stats, counters
+
+
+def format_summary():
+    """Human-readable summary table"""
+    stats, counters = summary()
+    if not stats and not counters:
+        return "No timing data recorded."
+
+    lines = []
+    if stats:
+        width = max(len(name) for name in stats)
+        lines.append(f"{'span':{width}}  {'count':>7}  {'p50 ms':>9}  {'p95 ms':>9}  {'max ms':>9}  {'total ms':>10}")
+        for name in sorted(stats):
+            s = stats[name]
+            lines.append(
+                f"{name:{width}}  {s['count']:>7}  {s['p50'] * 1000:>9.2f}  "
+                f"{s['p95'] * 1000:>9.2f}  {s['max'] * 1000:>9.2f}  {s['total'] * 1000:>10.1f}"
+            )
+    if counters:
+        if lines:
+            lines.append("")
+        width = max(len(name) for name in counters)
+        for name in sorted(counters):
+            lines.append(f"{name:{width}}  {counters[name]:>9}")
+    return "\n".join(lines)
+
+
+def dump(stream=None):
+    """Print the summary (to stderr by default)"""
+    stream = stream or sys.stderr
+    stream.write("Timing summary\n" + format_summary() + "\n")
+    stream.flush()
+
+
+if os.environ.get("SCHEDULER_TIMING"):
+    enable()
@@ -0,0 +1,199 @@
+"""
+Interval Tree - overlap queries over time slots
+
+IntervalTree is a treap ordered by (start, end) where every node also
+tracks the largest end in its subtree, so an overlap query visits
+O(log n + k) nodes. Intervals are half-open: [09:00, 10:00) does not
+overlap [10:00, 11:00).
+
+DayIntervalIndex keeps one tree per day and accepts "HH:MM" times.
+"""
+
+import random
+
+from schedule import to_minutes
+
+
+class _Node:
+    __slots__ = ("start", "end", "values", "priority", "max_end", "left", "right")
+
+    def __init__(self, start, end, value, priority):
+        self.start = start
+        self.end = end
+        self.values = [value]
+        self.priority = priority
+        self.max_end = end
+        self.left = None
+        self.right = None
+
+
+def _update(node):
+    max_end = node.end
+    if node.left is not None and node.left.max_end > max_end:
+        max_end = node.left.max_end
+    if node.right is not None and node.right.max_end > max_end:
+        max_end = node.right.max_end
+    node.max_end = max_end
+
+
+def _rotate_right(node):
+    left = node.left
+    node.left = left.right
+    left.right = node
+    _update(node)
+    _update(left)
+    return left
+
+
+def _rotate_left(node):
+    right = node.right
+    node.right = right.left
+    right.left = node
+    _update(node)
+    _update(right)
+    return right
+
+
+def _merge(left, right):
+    """Join two treaps where every key in left is below every key in right"""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+
+class IntervalTree:
+    """Set of (start, end, value) intervals supporting overlap queries"""
+
+    def __init__(self, seed=None):
+        self._root = None
+        self._size = 0
+        self._random = random.Random(seed)
+
+    def __len__(self):
+        return self._size
+
+    def insert(self, start, end, value):
+        """Add an interval; the same (start, end) may hold several values"""
+        self._root = self._insert(self._root, start, end, value)
+        self._size += 1
+
+    def _insert(self, node, start, end, value):
+        if node is None:
+            return _Node(start, end, value, self._random.random())
+        key = (start, end)
+        node_key = (node.start, node.end)
+        if key == node_key:
+            node.values.append(value)
+            return node
+        if key < node_key:
+            node.left = self._insert(node.left, start, end, value)
+            if node.left.priority > node.priority:
+                return _rotate_right(node)
+        else:
+            node.right = self._insert(node.right, start, end, value)
+            if node.right.priority > node.priority:
+                return _rotate_left(node)
+        _update(node)
+        return node
+
+    def remove(self, start, end, value):
+        """Remove one interval whose value is `value` (compared by identity)"""
+        self._root, removed = self._remove(self._root, (start, end), value)
+        if not removed:
+            raise ValueError(f"Interval {start}-{end} not found")
+        self._size -= 1
+
+    def _remove(self, node, key, value):
+        if node is None:
+            return None, False
+        node_key = (node.start, node.end)
+        if key < node_key:
+            node.left, removed = self._remove(node.left, key, value)
+        elif key > node_key:
+            node.right, removed = self._remove(node.right, key, value)
+        else:
+            for i, existing in enumerate(node.values):
+                if existing is value:
+                    node.values.pop(i)
+                    break
+            else:
+                return node, False
+            if not node.values:
+                return _merge(node.left, node.right), True
+            return node, True
+        if removed:
+            _update(node)
+        return node, removed
+
+    def overlapping(self, start, end):
+        """All (start, end, value) intervals overlapping [start, end)"""
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            # Nothing in this subtree ends after the query starts
+            if node is None or node.max_end <= start:
+                continue
+            stack.append(node.left)
+            # Right subtree only holds intervals starting at or after node.start
+            if node.start < end:
+                if node.end > start:
+                    found.extend((node.start, node.end, value) for value in node.values)
+                stack.append(node.right)
+        return found
+
+    def __iter__(self):
+        """Intervals in (start, end) order"""
+        stack = []
+        node = self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            for value in node.values:
+                yield node.start, node.end, value
+            node = node.right
+
+
+class DayIntervalIndex:
+    """One IntervalTree per day, keyed by "HH:MM" times"""
+
+    def __init__(self):
+        self.trees = {}
+
+    def __len__(self):
+        return sum(len(tree) for tree in self.trees.values())
+
+    def add(self, day, start_time, end_time, value):
+        tree = self.trees.get(day)
+        if tree is None:
+            tree = self.trees[day] = IntervalTree()
+        tree.insert(to_minutes(start_time), to_minutes(end_time), value)
+
+    def remove(self, day, start_time, end_time, value):
+        tree = self.trees.get(day)
+        if tree is None:
+            raise ValueError(f"Interval {day} {start_time}-{end_time} not found")
+        tree.remove(to_minutes(start_time), to_minutes(end_time), value)
+
+    def add_slot(self, slot, value):
+        self.add(slot.day, slot.start_time, slot.end_time, value)
+
+    def remove_slot(self, slot, value):
+        self.remove(slot.day, slot.start_time, slot.end_time, value)
+
+    def overlapping(self, day, start_time, end_time):
+        """Values of all intervals on `day` overlapping [start_time, end_time)"""
+        tree = self.trees.get(day)
+        if tree is None:
+            return []
+        return [value for _, _, value in tree.overlapping(to_minutes(start_time), to_minutes(end_time))]
@@ -0,0 +1,248 @@
+"""
+Change journal - append-only log of edits next to the data file
+
+Instead of rewriting the whole data file on every edit, a DataStore with a
+Journal appends one record per change (add person, enroll, add slot, ...)
+to `<data_file>.journal` and fsyncs it, so an edit costs the same whatever
+the size of the data set. load_data replays the journal on top of the
+snapshot, which also recovers edits made before a crash.
+
+Once the journal passes `max_bytes`, compact() folds it into a new snapshot
+in the snapshot's own format (plain or encrypted JSON). The journal is
+renamed to `<data_file>.journal.compacting` and the snapshot is written on a
+background thread; edits made meanwhile go to a fresh journal. Replay is
+idempotent (adding an existing person updates them, removing a missing
+course does nothing, ...), so if a crash leaves the renamed journal behind,
+replaying it over the new snapshot gives the same result.
+
+Records are JSON objects, one per line. If the snapshot is encrypted each
+line is a Fernet token instead.
+"""
+
+import json
+import os
+import threading
+
+from models import intern_time_slot
+from storage import build_save_data, write_snapshot, get_fernet, note_own_write
+from instrumentation import timed, count
+
+COMPACT_BYTES = 1024 * 1024
+
+
+def journal_path(data_file):
+    return f"{data_file}.journal"
+
+
+def compacting_path(data_file):
+    return f"{data_file}.journal.compacting"
+
+
+def journal_files(data_file):
+    """Journal files to replay over the snapshot, oldest first"""
+    return [compacting_path(data_file), journal_path(data_file)]
+
+
+def discard_journal(data_file):
+    """Delete the journal after a full save made it redundant"""
+    for path in journal_files(data_file):
+        if os.path.exists(path):
+            os.remove(path)
+            note_own_write(path)
+
+
+def snapshot_is_encrypted(data_file):
+    """True if the data file exists and is not plain JSON"""
+    try:
+        with open(data_file, "r") as file:
+            start = file.read(64).lstrip()
+    except OSError:
+        return False
+    return bool(start) and not start.startswith("{")
+
+
+def slot_rows(time_slots):
+    """Time slots in the data file's [start, end, day] form"""
+    return [[slot.start_time, slot.end_time, slot.day] for slot in time_slots]
+
+
+def encode_record(record, encrypted=False):
+    """One journal line (without the newline)"""
+    line = json.dumps(record, separators=(",", ":"))
+    if encrypted:
+        return get_fernet().encrypt(line.encode()).decode()
+    return line
+
+
+def decode_record(line):
+    """Parse a plain or encrypted journal line"""
+    if not line.startswith("{"):
+        line = get_fernet().decrypt(line.encode()).decode()
+    return json.loads(line)
+
+
+def read_records(path, digest=None):
+    """Records in a journal file. A torn last line (a crash mid-append) is skipped.
+
+    The file's bytes are added to digest (a hashlib object), if given.
+    """
+    with open(path, "rb") as file:
+        raw = file.read()
+    if digest is not None:
+        digest.update(raw)
+    lines = [line.strip() for line in raw.decode("utf-8").splitlines()]
+    lines = [line for line in lines if line]
+    records = []
+    for number, line in enumerate(lines, 1):
+        try:
+            records.append(decode_record(line))
+        except Exception as e:
+            if number == len(lines):
+                break
+            raise ValueError(f"Corrupt journal {path} at line {number}: {e}")
+    return records
+
+
+def apply_record(store, record):
+    """Apply one journal record to a DataStore, tolerating changes already applied"""
+    op = record.get("op")
+    if op in ("add_person", "set_schedule"):
+        name = record["name"]
+        schedule = [store.courses[course] for course in record["courses"] if course in store.courses]
+        if name in store.people:
+            store.update_person_schedule(name, schedule)
+        else:
+            store.add_person(name, schedule, position=record.get("position"))
+    elif op == "remove_person":
+        if record["name"] in store.people:
+            store.remove_person(record["name"])
+    elif op in ("add_course", "set_slots"):
+        name = record["name"]
+        slots = [intern_time_slot(*row) for row in record["slots"]]
+        if name in store.courses:
+            store.update_course(name, slots)
+        else:
+            store.add_course(name, slots, position=record.get("position"))
+    elif op == "remove_course":
+        if record["name"] in store.courses:
+            store.remove_course(record["name"])
+    elif op == "enroll":
+        person, course = record["person"], record["course"]
+        if (person in store.people and course in store.courses
+                and not store.is_enrolled(person, course)):
+            store.assign_course_to_person(person, course, allow_conflicts=True,
+                                          position=record.get("position"))
+    elif op == "unenroll":
+        person, course = record["person"], record["course"]
+        if store.is_enrolled(person, course):
+            store.remove_course_from_person(person, course)
+    else:
+        raise ValueError(f"Unknown journal record: {op}")
+
+
+@timed("journal.replay_journal")
+def replay_journal(data_file, people_list, courses, digest=None):
+    """Apply the journal files of data_file to loaded data in place; returns the record count.
+
+    Each file is read once and its bytes added to digest, if given, so the
+    hash covers exactly what was replayed.
+    """
+    paths = [path for path in journal_files(data_file) if os.path.exists(path)]
+    if not paths:
+        return 0
+
+    from datastore import DataStore
+    store = DataStore(people_list, courses)
+    applied = 0
+    with store.transaction():
+        for path in paths:
+            for record in read_records(path, digest):
+                apply_record(store, record)
+                applied += 1
+    count("journal.replayed_records", applied)
+    return applied
+
+
+class Journal:
+    """Append-only change log for one data file, with background compaction"""
+
+    def __init__(self, data_file, encrypted=None, max_bytes=COMPACT_BYTES):
+        self.data_file = data_file
+        self.path = journal_path(data_file)
+        self.encrypted = snapshot_is_encrypted(data_file) if encrypted is None else encrypted
+        self.max_bytes = max_bytes
+        self._compaction = None
+
+    def append(self, records):
+        """Durably append records (one write and fsync per call)"""
+        if not records:
+            return
+        lines = "".join(encode_record(record, self.encrypted) + "\n" for record in records)
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(lines)
+            file.flush()
+            os.fsync(file.fileno())
+        note_own_write(self.path)
+        count("journal.appended_records", len(records))
+
+    def size(self):
+        """Bytes waiting to be compacted"""
+        total = 0
+        for path in journal_files(self.data_file):
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                pass
+        return total
+
+    def compacting(self):
+        return self._compaction is not None and self._compaction.is_alive()
+
+    def maybe_compact(self, people_list, courses):
+        """Start a background compaction once the journal is over max_bytes"""
+        if self.size() > self.max_bytes and not self.compacting():
+            self.compact(people_list, courses)
+
+    def compact(self, people_list, courses, background=True):
+        """Fold the journal into a new snapshot of people_list and courses.
+
+        The snapshot data is taken now, on the caller's thread; encrypting and
+        writing it happen on a background thread unless background is False.
+        """
+        self.wait()
+        data = build_save_data(people_list, courses)
+        # People change after this returns, so an existing sidecar's fingerprints are taken now
+        from availability import cache_fingerprints
+        fingerprints = cache_fingerprints(self.data_file, people_list, courses)
+
+        # Everything journalled so far is in `data`; later edits start a new journal
+        pending = compacting_path(self.data_file)
+        if os.path.exists(self.path):
+            if os.path.exists(pending):
+                # Left over from an interrupted compaction: keep both in order
+                with open(self.path, "r", encoding="utf-8") as source, \
+                        open(pending, "a", encoding="utf-8") as target:
+                    target.write(source.read())
+                os.remove(self.path)
+            else:
+                os.replace(self.path, pending)
+            note_own_write(self.path, pending)
+
+        def run():
+            write_snapshot(data, self.data_file, self.encrypted, fingerprints)
+            if os.path.exists(pending):
+                os.remove(pending)
+                note_own_write(pending)
+            count("journal.compactions")
+
+        if background:
+            self._compaction = threading.Thread(target=run, name="journal-compaction")
+            self._compaction.start()
+        else:
+            run()
+
+    def wait(self):
+        """Block until a running compaction has finished"""
+        if self._compaction is not None:
+            self._compaction.join()
+            self._compaction = None
@@ -3,12 +3,16 @@
 Schedule Manager - A tool for managing schedules and finding common free times
 """
 
+import time
+
+# Taken before any other import so the GUI can report total startup time
+STARTED_AT = time.perf_counter()
+
 import os
 import sys
 import json
 from storage import load_data
-from gui import launch_gui
-from schedule import print_common_free_times
+from schedule import DAYS, print_common_free_times
 
 
 def get_data_file():
@@ -25,6 +29,22 @@ def get_data_file():
 def main():
     """Main function to run the schedule manager"""
     data_file = get_data_file()
+
+    # --timing works for both the GUI and the subcommands
+    if "--timing" in sys.argv:
+        sys.argv.remove("--timing")
+        import instrumentation
+        instrumentation.enable()
+
+    # --watchdog logs GUI event-loop stalls (see gui/watchdog.py)
+    if "--watchdog" in sys.argv:
+        sys.argv.remove("--watchdog")
+        os.environ.setdefault("SCHEDULER_WATCHDOG", "1")
+
+    # Subcommands run headless and never import the GUI
+    if len(sys.argv) > 1 and not getattr(sys, "frozen", False):
+        from cli import run_cli
+        sys.exit(run_cli(sys.argv[1:], data_file))
     
     # Create blank data if no file exists
     if not os.path.exists(data_file):
@@ -36,16 +56,11 @@ def main():
     people_list, courses = load_data(data_file)
 
     if getattr(sys, "frozen", False):
-        launch_gui(people_list, courses, data_file)
+        launch(people_list, courses, data_file)
     else:
         print("Schedule Manager")
         print("=" * 50)
-
-        # Load existing data or create sample data
-        if os.path.exists(data_file):
-            print(f"Loading data from {data_file}...")
-            people_list, courses = load_data(data_file)
-            print(f"Loaded {len(people_list)} people and {len(courses)} courses.")
+        print(f"Loaded {len(people_list)} people and {len(courses)} courses from {data_file}.")
 
         # Show current people
         if people_list:
@@ -65,7 +80,7 @@ def main():
 
             if choice == "1":
                 print("Launching GUI...")
-                launch_gui(people_list, courses, data_file)
+                launch(people_list, courses, data_file)
                 break
 
             elif choice == "2":
@@ -82,26 +97,22 @@ def main():
                 print("Invalid choice. Please try again.")
 
 
+def launch(people_list, courses, data_file):
+    """Import the GUI only when it is actually needed and start it"""
+    from gui import launch_gui
+    launch_gui(people_list, courses, data_file, started_at=STARTED_AT)
+
+
 def show_common_times_console(people_list):
     """Show common free times in console"""
     if not people_list:
         print("No people in the system.")
         return
 
-    days = [
-        "Monday",
-        "Tuesday",
-        "Wednesday",
-        "Thursday",
-        "Friday",
-        "Saturday",
-        "Sunday",
-    ]
-
     print("\nCommon Free Times:")
     print("=" * 50)
 
-    for day in days:
+    for day in DAYS:
         print_common_free_times(people_list, day)
 
 
@@ -118,17 +129,7 @@ def show_all_schedules(people_list):
         print(f"\n{person.name}'s Schedule:")
         print("-" * (len(person.name) + 12))
 
-        days = [
-            "Monday",
-            "Tuesday",
-            "Wednesday",
-            "Thursday",
-            "Friday",
-            "Saturday",
-            "Sunday",
-        ]
-
-        for day in days:
+        for day in DAYS:
             day_slots = []
             for course_slots in person.schedule:
                 for slot in course_slots:
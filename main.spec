@@ -14,6 +14,9 @@ a = Analysis(
         'gui.people_tab',
         'gui.courses_tab',
         'gui.common_times_tab',
+        'gui.heatmap_tab',
+        'gui.timetable_widget',
+        'gui.watchdog',
         'gui.time_picker'
     ],
     hookspath=[],
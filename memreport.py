@@ -0,0 +1,177 @@
+"""
+Memory report - where the memory of a loaded data file goes
+
+Loads a data file under tracemalloc and reports:
+  * total and peak memory of storage.load_data, with the top allocation sites
+  * memory held by TimeSlot objects, course slot lists, Person objects,
+    their schedule lists and busy_time dicts (shared objects counted once)
+  * peak memory while running save_data_encrypted and, optionally, ICS imports
+
+Run with `python main.py memory [--ics FILE ...]`.
+"""
+
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from models import Person, TimeSlot
+from storage import load_data, save_data_encrypted, import_ics_file
+
+
+def _sizeof(obj, seen):
+    """Shallow size of obj unless it was already counted"""
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    return sys.getsizeof(obj)
+
+
+def _instance_size(obj, seen):
+    """Object plus its attribute dict and attribute values"""
+    size = _sizeof(obj, seen)
+    attributes = getattr(obj, "__dict__", None)
+    if attributes is not None:
+        size += _sizeof(attributes, seen)
+        values = list(attributes.values())
+    else:
+        # __slots__ classes such as TimeSlot have no attribute dict
+        values = [getattr(obj, name) for name in getattr(type(obj), "__slots__", ()) if hasattr(obj, name)]
+    for value in values:
+        if isinstance(value, (str, int, tuple)):
+            size += _sizeof(value, seen)
+    return size
+
+
+def measure_structures(people_list, courses):
+    """Bytes and object counts per data structure category.
+
+    Categories are measured in order and shared objects (such as the time
+    strings referenced by both TimeSlots and busy_time tuples) are charged
+    to the first category that reaches them.
+    """
+    seen = set()
+    report = {}
+
+    def add(category, count, size):
+        entry = report.setdefault(category, {"count": 0, "bytes": 0})
+        entry["count"] += count
+        entry["bytes"] += size
+
+    # TimeSlots reachable from courses and from personal periods
+    for slots in courses.values():
+        for slot in slots:
+            if id(slot) not in seen:
+                add("TimeSlot", 1, _instance_size(slot, seen))
+    for person in people_list:
+        for course_slots in person.schedule:
+            for slot in course_slots:
+                if isinstance(slot, TimeSlot) and id(slot) not in seen:
+                    add("TimeSlot", 1, _instance_size(slot, seen))
+
+    for name, slots in courses.items():
+        add("course slot lists", 1, _sizeof(slots, seen) + _sizeof(name, seen))
+    add("courses dict", 1, _sizeof(courses, seen))
+
+    for person in people_list:
+        if isinstance(person, Person):
+            add("Person", 1, _instance_size(person, seen))
+        add("schedule lists", 1, _sizeof(person.schedule, seen))
+        # Personal periods are lists that are not part of `courses`
+        for course_slots in person.schedule:
+            if id(course_slots) not in seen:
+                add("personal period lists", 1, _sizeof(course_slots, seen))
+
+        busy_size = _sizeof(person.busy_time, seen)
+        for key, value in person.busy_time.items():
+            busy_size += _sizeof(key, seen) + _sizeof(value, seen)
+            for part in value:
+                busy_size += _sizeof(part, seen)
+        add("busy_time dicts", 1, busy_size)
+    add("people list", 1, _sizeof(people_list, seen))
+
+    return report
+
+
+def traced_peak(func, *args):
+    """Run func and return (result, bytes retained, peak bytes above the start)"""
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    result = func(*args)
+    after, peak = tracemalloc.get_traced_memory()
+    return result, after - before, peak - before
+
+
+def memory_report(data_file, ics_files=(), top=10):
+    """Collect the full memory report as a dict"""
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start()
+    try:
+        snapshot_before = tracemalloc.take_snapshot()
+        (people_list, courses), retained, peak = traced_peak(load_data, data_file)
+        snapshot_after = tracemalloc.take_snapshot()
+
+        sites = snapshot_after.compare_to(snapshot_before, "lineno")[:top]
+        report = {
+            "file": data_file,
+            "file_bytes": os.path.getsize(data_file),
+            "people": len(people_list),
+            "courses": len(courses),
+            "load": {"retained": retained, "peak": peak},
+            "top_sites": [
+                {"site": str(stat.traceback[0]), "bytes": stat.size_diff, "count": stat.count_diff}
+                for stat in sites
+            ],
+            "structures": measure_structures(people_list, courses),
+        }
+
+        with tempfile.TemporaryDirectory() as workdir:
+            target = os.path.join(workdir, "schedule_data.json")
+            _, _, peak = traced_peak(save_data_encrypted, people_list, courses, target)
+            report["save_data_encrypted"] = {"peak": peak}
+
+        imports = []
+        for index, ics_file in enumerate(ics_files):
+            _, retained, peak = traced_peak(
+                import_ics_file, ics_file, courses, f"memreport-import-{index}", people_list
+            )
+            imports.append({"file": ics_file, "retained": retained, "peak": peak})
+        report["ics_imports"] = imports
+        return report
+    finally:
+        if started_here:
+            tracemalloc.stop()
+
+
+def _mb(size):
+    return f"{size / (1024 * 1024):9.2f} MB"
+
+
+def format_report(report):
+    """Human-readable report text"""
+    lines = [
+        f"Memory report for {report['file']} ({_mb(report['file_bytes']).strip()} on disk)",
+        f"{report['people']} people, {report['courses']} courses",
+        "",
+        f"load_data retained {_mb(report['load']['retained'])}, peak {_mb(report['load']['peak'])}",
+        "",
+        "Data structures:",
+    ]
+    structures = report["structures"]
+    total = sum(entry["bytes"] for entry in structures.values())
+    for category, entry in sorted(structures.items(), key=lambda item: -item[1]["bytes"]):
+        lines.append(f"  {category:24} {entry['count']:>10} objects {_mb(entry['bytes'])}")
+    lines.append(f"  {'total':24} {'':>10}         {_mb(total)}")
+
+    lines += ["", "Top allocation sites during load:"]
+    for site in report["top_sites"]:
+        lines.append(f"  {_mb(site['bytes'])} {site['count']:>9} blocks  {site['site']}")
+
+    lines += ["", f"save_data_encrypted peak {_mb(report['save_data_encrypted']['peak'])}"]
+    for entry in report["ics_imports"]:
+        lines.append(
+            f"import_ics_file {os.path.basename(entry['file'])}: "
+            f"retained {_mb(entry['retained']).strip()}, peak {_mb(entry['peak']).strip()}"
+        )
+    return "\n".join(lines)
@@ -1,13 +1,47 @@
+import itertools
+import weakref
+
+from schedule import normalized_busy
+
+# Stamps for Person.generation; never reused, so a stamp identifies one busy_time
+_generations = itertools.count(1)
+
+
 class TimeSlot:
+    """Immutable (start_time, end_time, day); create shared instances with intern_time_slot"""
+
+    __slots__ = ("start_time", "end_time", "day", "__weakref__")
+
     def __init__(self, start_time, end_time, day):
-        self.start_time = start_time
-        self.end_time = end_time
-        self.day = day
+        object.__setattr__(self, "start_time", start_time)
+        object.__setattr__(self, "end_time", end_time)
+        object.__setattr__(self, "day", day)
+
+    def __setattr__(self, name, value):
+        # Interned slots are shared between courses, so editing one would edit them all
+        raise AttributeError("TimeSlot is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("TimeSlot is immutable")
 
     def __str__(self):
         return f'("{self.start_time}", "{self.end_time}", "{self.day}")'
 
 
+# (start_time, end_time, day) -> the shared TimeSlot, dropped once nothing uses it
+_interned_slots = weakref.WeakValueDictionary()
+
+
+def intern_time_slot(start_time, end_time, day):
+    """The one TimeSlot for this start, end and day, so equal slots are identical"""
+    key = (start_time, end_time, day)
+    slot = _interned_slots.get(key)
+    if slot is None:
+        slot = TimeSlot(start_time, end_time, day)
+        _interned_slots[key] = slot
+    return slot
+
+
 class Person:
     def __init__(self, name, schedule=None):
         self.name = name
@@ -16,7 +50,12 @@ class Person:
         self.busy_time = self._create_busy_time_dict()
 
     def _create_busy_time_dict(self):
-        """Convert schedule to busy_time format expected by the functions"""
+        """Convert schedule to busy_time format expected by the functions.
+
+        Also bumps `generation`, which results cached per person (see
+        schedule.common_free_times) compare to tell they are out of date.
+        """
+        self.generation = next(_generations)
         busy_dict = {}
         counter = 0
         for course in self.schedule:
@@ -25,6 +64,28 @@ class Person:
                 counter += 1
         return busy_dict
 
+    def schedule_signature(self):
+        """Cheap key that changes whenever courses or slots are added, removed or replaced.
+
+        It holds the (immutable, interned) slots themselves, so an in-place edit
+        such as `course[:] = new_slots` changes it even if the count stays the same.
+        """
+        return tuple((id(course), tuple(course)) for course in self.schedule)
+
+    def busy_fingerprint(self):
+        """Merged busy intervals; people with equal fingerprints are free at the same times"""
+        # busy_time is replaced, never edited in place, whenever the schedule changes
+        cached = self.__dict__.get("_fingerprint")
+        if cached is not None and cached[0] is self.busy_time:
+            return cached[1]
+        fingerprint = normalized_busy(self.busy_time.values())
+        self._fingerprint = (self.busy_time, fingerprint)
+        return fingerprint
+
+    def seed_busy_fingerprint(self, fingerprint):
+        """Use a fingerprint known to match the current busy_time (e.g. from a cache)"""
+        self._fingerprint = (self.busy_time, fingerprint)
+
     def __getitem__(self, key):
         if key == self.name:
             return self.schedule
@@ -1,3 +1,19 @@
+import threading
+from collections import OrderedDict
+
+from instrumentation import timed, count
+
+DAYS = [
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+    "Saturday",
+    "Sunday",
+]
+
+
 def to_minutes(time_str):
     """Convert time string (HH:MM) to minutes since midnight"""
     h, m = map(int, time_str.split(":"))
@@ -15,7 +31,11 @@ def invert_busy(busy_times, day, start="09:00", end="20:00"):
     intervals = [t for t in busy_times if t[2] == day]  # filter by day
     intervals_m = [(to_minutes(s), to_minutes(e)) for s, e, d in intervals]
     intervals_m.sort()
+    return invert_minutes(intervals_m, start_m, end_m)
 
+
+def invert_minutes(intervals_m, start_m, end_m):
+    """Free (start, end) minutes between start_m and end_m around sorted busy intervals"""
     free = []
     current = start_m
     for s, e in intervals_m:
@@ -43,10 +63,82 @@ def intersect_intervals(list1, list2):
     return result
 
 
+def normalized_busy(busy_times):
+    """Busy (start, end, day) tuples as sorted (day, start_m, end_m) with
+    overlapping and touching intervals merged, as a hashable tuple"""
+    by_day = {}
+    for s, e, d in busy_times:
+        by_day.setdefault(d, []).append((to_minutes(s), to_minutes(e)))
+
+    result = []
+    for day in sorted(by_day):
+        merged = []
+        for s, e in sorted(by_day[day]):
+            if merged and s <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], e)
+            else:
+                merged.append([s, e])
+        result.extend((day, s, e) for s, e in merged)
+    return tuple(result)
+
+
+def unique_schedules(people_list):
+    """Group people with identical busy patterns, in first-appearance order.
+
+    Returns a list of lists of Person objects; everyone in a group is free at
+    exactly the same times, so group queries only need one of them.
+    """
+    groups = {}
+    for person in people_list:
+        groups.setdefault(person.busy_fingerprint(), []).append(person)
+    return list(groups.values())
+
+
+FREE_TIMES_CACHE_SIZE = 256
+
+# (frozenset of names, day, start, end) -> ({name: generation}, result), least recent first
+_free_times_cache = OrderedDict()
+_free_times_lock = threading.Lock()
+
+
+def clear_free_times_cache():
+    """Forget every memoised common_free_times result"""
+    with _free_times_lock:
+        _free_times_cache.clear()
+
+
+@timed("schedule.common_free_times")
 def common_free_times(people_list, day, start="09:00", end="23:00"):
-    """Find common free times for multiple Person objects on a given day"""
+    """Find common free times for multiple Person objects on a given day.
+
+    Results are kept in a small LRU cache per set of names, day and window,
+    and reused until one of those people's schedules changes (their
+    `generation` moves on). Building and checking the key still reads every
+    person's generation, so a hit costs O(n) in the group size; that is
+    cheap next to inverting and intersecting n schedules on a miss.
+    """
+    generations = {person.name: person.generation for person in people_list}
+    key = (frozenset(generations), day, start, end)
+    with _free_times_lock:
+        cached = _free_times_cache.get(key)
+        if cached is not None and cached[0] == generations:
+            _free_times_cache.move_to_end(key)
+            count("schedule.common_free_times.hit")
+            return list(cached[1])
+    count("schedule.common_free_times.miss")
+
+    result = _common_free_times(people_list, day, start, end)
+    with _free_times_lock:
+        _free_times_cache[key] = (generations, result)
+        _free_times_cache.move_to_end(key)
+        if len(_free_times_cache) > FREE_TIMES_CACHE_SIZE:
+            _free_times_cache.popitem(last=False)
+    return list(result)
+
+
+def _common_free_times(people_list, day, start, end):
     all_free = []
-    for person in people_list:
+    for person in [group[0] for group in unique_schedules(people_list)]:
         free = invert_busy(list(person.busy_time.values()), day, start, end)
         all_free.append(free)
 
@@ -73,3 +165,152 @@ def print_common_free_times(people_list, day):
         print("\n")
     else:
         print(f"No common free time on {day}\n")
+
+
+def free_count_grid(people_list, days, start="09:00", end="23:00", step=10):
+    """Count how many people are free in each time bucket of each day.
+
+    Returns a dict mapping day -> list of free counts, one per `step`-minute
+    bucket between `start` and `end`. A person counts as busy in a bucket if
+    any of their busy intervals touches it. The counts come from a single
+    sweep over everyone's busy_time using per-day difference arrays.
+    """
+    start_m, end_m = to_minutes(start), to_minutes(end)
+    bucket_count = max(0, -(-(end_m - start_m) // step))
+    diffs = {day: [0] * (bucket_count + 1) for day in days}
+
+    # People with identical schedules are swept once and weighted
+    for group in unique_schedules(people_list):
+        person = group[0]
+        weight = len(group)
+        # Merge each person's intervals per day so overlapping slots
+        # are only counted once
+        by_day = {}
+        for s, e, d in person.busy_time.values():
+            if d in diffs:
+                by_day.setdefault(d, []).append((to_minutes(s), to_minutes(e)))
+
+        for day, intervals in by_day.items():
+            intervals.sort()
+            diff = diffs[day]
+            last_bucket = 0
+            for s, e in intervals:
+                first = max((s - start_m) // step, last_bucket, 0)
+                stop = min(-(-(e - start_m) // step), bucket_count)
+                if first < stop:
+                    diff[first] += weight
+                    diff[stop] -= weight
+                    last_bucket = stop
+
+    total = len(people_list)
+    grid = {}
+    for day, diff in diffs.items():
+        counts = []
+        busy = 0
+        for i in range(bucket_count):
+            busy += diff[i]
+            counts.append(total - busy)
+        grid[day] = counts
+    return grid
+
+
+def quorum_intervals(free_lists, min_count, weights=None):
+    """Find intervals where at least `min_count` of the free lists are free.
+
+    `free_lists` holds one list of (start, end) minute intervals per person,
+    or per group of identical schedules with the group sizes in `weights`.
+    Returns (start, end, count) tuples where count is the lowest number of
+    free people anywhere inside that interval.
+    """
+    if weights is None:
+        weights = [1] * len(free_lists)
+    events = []
+    for free, weight in zip(free_lists, weights):
+        for s, e in free:
+            events.append((s, weight))
+            events.append((e, -weight))
+    # Ends sort before starts at the same minute so touching intervals
+    # do not count as overlapping
+    events.sort()
+
+    result = []
+    count = 0
+    run_start = None
+    run_min = 0
+    for i, (minute, delta) in enumerate(events):
+        count += delta
+        next_minute = events[i + 1][0] if i + 1 < len(events) else None
+        if next_minute == minute:
+            continue
+        if count >= min_count and next_minute is not None:
+            if run_start is None:
+                run_start, run_min = minute, count
+            else:
+                run_min = min(run_min, count)
+        elif run_start is not None:
+            result.append((run_start, minute, run_min))
+            run_start = None
+    return result
+
+
+def quorum_free_times(people_list, day, min_count, start="09:00", end="23:00"):
+    """Find times on a day when at least `min_count` of the people are free"""
+    groups = unique_schedules(people_list)
+    free_lists = [
+        invert_busy(list(group[0].busy_time.values()), day, start, end)
+        for group in groups
+    ]
+    weights = [len(group) for group in groups]
+    return [
+        (to_time(s), to_time(e), count)
+        for s, e, count in quorum_intervals(free_lists, min_count, weights)
+    ]
+
+
+# Week bitmasks: bit (day index * MINUTES_PER_DAY + minute) is one minute of
+# the week, so intersecting availability is a single integer AND
+MINUTES_PER_DAY = 24 * 60
+
+
+def minutes_mask(day, start_m, end_m, days=DAYS):
+    """Bitmask of the minutes [start_m, end_m) on a day"""
+    if end_m <= start_m:
+        return 0
+    offset = days.index(day) * MINUTES_PER_DAY
+    return ((1 << (end_m - start_m)) - 1) << (offset + start_m)
+
+
+def window_mask(days, start="09:00", end="23:00", all_days=DAYS):
+    """Bitmask of the same daily window on each of the given days"""
+    start_m, end_m = to_minutes(start), to_minutes(end)
+    mask = 0
+    for day in days:
+        mask |= minutes_mask(day, start_m, end_m, all_days)
+    return mask
+
+
+def busy_mask(busy_times, days=DAYS):
+    """Bitmask of the minutes covered by (start, end, day) busy tuples"""
+    mask = 0
+    for s, e, d in busy_times:
+        if d in days:
+            mask |= minutes_mask(d, to_minutes(s), to_minutes(e), days)
+    return mask
+
+
+def mask_free_times(mask, days=DAYS):
+    """Decode a bitmask into {day: [(start, end), ...]} HH:MM intervals"""
+    day_bits = (1 << MINUTES_PER_DAY) - 1
+    result = {}
+    for index, day in enumerate(days):
+        bits = (mask >> (index * MINUTES_PER_DAY)) & day_bits
+        intervals = []
+        while bits:
+            first = (bits & -bits).bit_length() - 1
+            shifted = bits >> first
+            length = (shifted ^ (shifted + 1)).bit_length() - 1
+            intervals.append((to_time(first), to_time(first + length)))
+            bits &= ~(((1 << length) - 1) << first)
+        if intervals:
+            result[day] = intervals
+    return result
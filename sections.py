@@ -0,0 +1,272 @@
+"""
+Section Optimizer - pick course sections that give a group the most common free time
+
+Sections of the same course share a code up to the two-digit class number
+at the end (e.g. "Calculus (11410MATH101001)" and "Calculus (11410MATH101002)").
+Each person's other commitments are fixed; for every course a person may
+switch, one section must be chosen. Availability is a week bitmask (one bit
+per minute), so the group's common free time is the AND of everyone's masks.
+
+The search is branch-and-bound: a branch is cut when even the most
+favourable remaining choices (each only blocking the minutes that all of its
+sections block) cannot beat the best assignment found so far.
+"""
+
+import re
+
+from schedule import DAYS, busy_mask, window_mask, mask_free_times
+from instrumentation import timed
+
+_NAME_CODE = re.compile(r"^(.*) \(([^()]*)\)$")
+
+
+def course_code(course_name):
+    """The code from a "Name (code)" course name, or None"""
+    match = _NAME_CODE.match(course_name)
+    return match.group(2) if match else None
+
+
+def section_key(course_name):
+    """Key shared by all sections of a course: the code without its class number"""
+    code = course_code(course_name)
+    if code is None:
+        return None
+    return code[:-2] if len(code) > 2 and code[-2:].isdigit() else code
+
+
+def section_groups(courses):
+    """Map section key -> course names, for courses offered in more than one section"""
+    groups = {}
+    for name in courses:
+        key = section_key(name)
+        if key is not None:
+            groups.setdefault(key, []).append(name)
+    return {key: sorted(names) for key, names in groups.items() if len(names) > 1}
+
+
+def slots_mask(slots):
+    """Busy bitmask of a list of TimeSlots"""
+    return busy_mask([(slot.start_time, slot.end_time, slot.day) for slot in slots])
+
+
+def section_choices(people, courses, vary=None):
+    """(person, current section, alternative sections) for every switchable enrolment.
+
+    Only people whose names are in `vary` (default: everyone) may switch.
+    """
+    groups = section_groups(courses)
+    names_by_id = {id(slots): name for name, slots in courses.items()}
+    choices = []
+    for person in people:
+        if vary is not None and person.name not in vary:
+            continue
+        for group in person.schedule:
+            name = names_by_id.get(id(group))
+            sections = groups.get(section_key(name)) if name else None
+            if sections:
+                choices.append((person, name, sections))
+    return choices
+
+
+def _minimise_blocked(options):
+    """Branch-and-bound over one (busy mask, label) option per choice, minimising
+    the minutes blocked by the union of the chosen masks.
+
+    Returns (minutes blocked, chosen labels, nodes explored).
+    """
+    count = len(options)
+    # forced[i]: minutes blocked by choices i.. whichever section they take
+    forced = [0] * (count + 1)
+    for i in range(count - 1, -1, -1):
+        always = -1
+        for mask, _ in options[i]:
+            always &= mask
+        forced[i] = forced[i + 1] | always
+
+    best_count = float("inf")
+    best_labels = None
+    explored = 0
+    chosen = []
+
+    def search(depth, blocked):
+        nonlocal best_count, best_labels, explored
+        explored += 1
+        if (blocked | forced[depth]).bit_count() >= best_count:
+            return
+        if depth == count:
+            best_count = blocked.bit_count()
+            best_labels = list(chosen)
+            return
+        # Each remaining choice blocks at least its cheapest section's new
+        # minutes; choices that cannot touch the same minutes add up
+        costs = []
+        for k in range(depth, count):
+            reach = 0
+            cheapest = None
+            for mask, _ in options[k]:
+                new = mask & ~blocked
+                reach |= new
+                if cheapest is None or new.bit_count() < cheapest:
+                    cheapest = new.bit_count()
+            if cheapest:
+                costs.append((cheapest, reach))
+        costs.sort(key=lambda cost: -cost[0])
+        bound = blocked.bit_count()
+        used = 0
+        for cheapest, reach in costs:
+            if not reach & used:
+                bound += cheapest
+                used |= reach
+        if bound >= best_count:
+            return
+
+        ranked = sorted(options[depth], key=lambda option: (option[0] & ~blocked).bit_count())
+        for mask, label in ranked:
+            chosen.append(label)
+            search(depth + 1, blocked | mask)
+            chosen.pop()
+
+    search(0, 0)
+    return best_count, best_labels, explored
+
+
+def _independent_groups(reaches):
+    """Partition choice indices into groups whose reachable minutes overlap"""
+    groups = []  # [reach mask, indices]
+    for index, reach in enumerate(reaches):
+        merged_reach, merged = reach, [index]
+        remaining = []
+        for group_reach, indices in groups:
+            if group_reach & merged_reach:
+                merged_reach |= group_reach
+                merged.extend(indices)
+            else:
+                remaining.append((group_reach, indices))
+        groups = remaining + [(merged_reach, merged)]
+    return [sorted(indices) for _, indices in groups]
+
+
+def _joint_options(person_choices, course_mask, fixed_busy, base):
+    """(busy mask within base, section names) for every combination of sections
+    for one person's (current section, sections) choices in which no newly
+    chosen section clashes with their fixed commitments or another chosen
+    section. Combinations blocking the same minutes are kept once, with the
+    fewest changes; keeping every current section is always an option.
+    """
+    best = {}  # busy mask within base -> (changes, names)
+    names = []
+
+    def extend(depth, busy, new_busy, changes):
+        if depth == len(person_choices):
+            key = busy & base
+            if key not in best or changes < best[key][0]:
+                best[key] = (changes, tuple(names))
+            return
+        current, sections = person_choices[depth]
+        for name in [current] + [section for section in sections if section != current]:
+            mask = course_mask(name)
+            if name == current:
+                # Clashes the person already has are kept, but nothing new may join them
+                if mask & new_busy:
+                    continue
+                extend_with = (busy | mask, new_busy, changes)
+            else:
+                if mask & (fixed_busy | busy):
+                    continue
+                extend_with = (busy | mask, new_busy | mask, changes + 1)
+            names.append(name)
+            extend(depth + 1, *extend_with)
+            names.pop()
+
+    extend(0, 0, 0, 0)
+    return [(mask, labels) for mask, (_, labels) in best.items()]
+
+
+@timed("sections.optimize_sections")
+def optimize_sections(people, courses, vary=None, days=DAYS, start="09:00", end="23:00"):
+    """Choose sections that maximise the group's common free time in a window.
+
+    The window is `start`-`end` on each of `days`; pass a single day and a
+    short window to target one meeting slot. Sections that clash with the
+    person's other commitments, or with the other sections chosen for them,
+    are not considered. Returns a dict with the chosen section per switchable
+    enrolment, the changes from the current sections, free minutes before and
+    after, and the resulting free times.
+    """
+    window = window_mask(days, start, end)
+    choices = section_choices(people, courses, vary)
+    switchable = {(id(person), current) for person, current, _ in choices}
+    masks = {}
+
+    def course_mask(name):
+        if name not in masks:
+            masks[name] = slots_mask(courses[name])
+        return masks[name]
+
+    # Minutes the group is free whatever sections are chosen
+    names_by_id = {id(slots): name for name, slots in courses.items()}
+    base = window
+    fixed_busy = {}
+    for person in people:
+        busy = 0
+        for group in person.schedule:
+            if (id(person), names_by_id.get(id(group))) not in switchable:
+                busy |= busy_mask([(slot.start_time, slot.end_time, slot.day) for slot in group])
+        fixed_busy[id(person)] = busy
+        base &= ~busy
+
+    # One joint option per person covering all their switchable courses, so a
+    # person never ends up in two sections that clash with each other. People
+    # with identical options (same courses) are merged: taking the same
+    # sections is never worse than taking different ones.
+    by_person = {}
+    for index, (person, current, sections) in enumerate(choices):
+        by_person.setdefault(id(person), (person, []))[1].append(index)
+    merged = {}
+    for person, indices in by_person.values():
+        person_options = _joint_options(
+            [choices[index][1:] for index in indices], course_mask, fixed_busy[id(person)], base
+        )
+        key = tuple(sorted(person_options, key=lambda option: option[1]))
+        merged.setdefault(key, (person_options, []))[1].append(indices)
+    merged_options = [options for options, _ in merged.values()]
+    merged_members = [members for _, members in merged.values()]
+
+    # Choices whose sections never touch the same minutes are solved separately
+    reaches = []
+    for options in merged_options:
+        reach = 0
+        for mask, _ in options:
+            reach |= mask
+        reaches.append(reach)
+
+    chosen = [None] * len(choices)
+    blocked_total = 0
+    explored = 0
+    for group in _independent_groups(reaches):
+        group = sorted(group, key=lambda i: -max(mask.bit_count() for mask, _ in merged_options[i]))
+        blocked, labels, nodes = _minimise_blocked([merged_options[i] for i in group])
+        blocked_total += blocked
+        explored += nodes
+        for i, label in zip(group, labels):
+            for indices in merged_members[i]:
+                for index, name in zip(indices, label):
+                    chosen[index] = name
+
+    baseline = base
+    best = base
+    for (_, current, _), name in zip(choices, chosen):
+        baseline &= ~course_mask(current)
+        best &= ~course_mask(name)
+    assignment = [
+        (person.name, current, name)
+        for (person, current, _), name in zip(choices, chosen)
+    ]
+    return {
+        "assignment": assignment,
+        "changes": [entry for entry in assignment if entry[1] != entry[2]],
+        "baseline_minutes": baseline.bit_count(),
+        "free_minutes": best.bit_count(),
+        "free_times": mask_free_times(best),
+        "explored": explored,
+    }
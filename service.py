@@ -0,0 +1,199 @@
+"""
+Query service - local HTTP/JSON server over a warm availability index
+
+Loads the data file once, keeps per-person availability in memory and
+reloads when the file or its change journal changes on disk. Busy
+fingerprints are read from an up-to-date `.avail` sidecar (see
+availability.py) if there is one, so a restart on an unchanged file skips
+recomputing them; `write_cache` also creates or refreshes it on each load.
+Standard library only.
+
+Endpoints (GET with query parameters, or POST with a JSON body):
+    GET  /health
+    GET  /people
+    /common  people=a,b,c  day=Monday  [start=HH:MM end=HH:MM]
+    /quorum  people=a,b,c  day=Monday  min=2  [start=HH:MM end=HH:MM]
+    /free-at day=Monday  start=HH:MM  end=HH:MM  [people=a,b,c]
+
+`people` may be omitted to query everyone, and `day` to query every day.
+Results over everyone report how many people they cover rather than
+listing every name.
+"""
+
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from schedule import DAYS
+from availability import AvailabilityIndex, FreeAtIndex, load_availability
+from watcher import FileWatcher
+
+
+class ScheduleService:
+    """Owns the loaded data and its availability index"""
+
+    def __init__(self, data_file, start="09:00", end="23:00", write_cache=False):
+        self.data_file = data_file
+        self.write_cache = write_cache
+        self.lock = threading.RLock()
+        self.index = AvailabilityIndex(start=start, end=end)
+        self.free_at = FreeAtIndex()
+        self.watcher = FileWatcher(data_file, self._report_reload)
+        self.reload()
+
+    def reload(self):
+        """Re-read the data file and update only the people that changed"""
+        people_list, _ = load_availability(self.data_file, self.write_cache)
+        # Free intervals of new schedules are computed before taking the lock,
+        # so queries are not held up while a large file is indexed
+        free = self.index.compute_free(people_list)
+        with self.lock:
+            added, changed, removed = self.index.update(people_list, free)
+            self.free_at.update(people_list)
+        return added, changed, removed
+
+    def check_for_changes(self):
+        """Reload if the data file changed since the last load"""
+        if not self.watcher.changed():
+            return None
+        return self.reload()
+
+    def watch(self, interval=2.0, stop_event=None):
+        """Poll the data file in a background thread"""
+        self.watcher.interval = interval
+        return self.watcher.start(stop_event)
+
+    def _report_reload(self):
+        added, changed, removed = self.reload()
+        print(
+            f"reloaded {self.data_file}: {len(added)} added, "
+            f"{len(changed)} changed, {len(removed)} removed",
+            file=sys.stderr,
+        )
+
+    def query(self, path, params):
+        """Dispatch a query and return a JSON-serialisable result"""
+        names = params.get("people")
+        if isinstance(names, str):
+            names = [name.strip() for name in names.split(",") if name.strip()]
+        day = params.get("day")
+        if day is not None and day not in DAYS:
+            raise ValueError(f"Unknown day: {day}")
+        days = [day] if day else DAYS
+        start = params.get("start")
+        end = params.get("end")
+
+        with self.lock:
+            if path == "/health":
+                return {"status": "ok", "people": len(self.index.people)}
+            if path == "/people":
+                return {"people": self.index.names()}
+            if path == "/common":
+                return {
+                    **self._cohort(names),
+                    "days": {
+                        d: [[s, e] for s, e in self.index.common(names, d, start, end)]
+                        for d in days
+                    },
+                }
+            if path == "/quorum":
+                if "min" not in params:
+                    raise ValueError("Missing parameter: min")
+                min_count = int(params["min"])
+                return {
+                    **self._cohort(names),
+                    "min": min_count,
+                    "days": {
+                        d: [
+                            {"start": s, "end": e, "free": count}
+                            for s, e, count in self.index.quorum(names, d, min_count, start, end)
+                        ]
+                        for d in days
+                    },
+                }
+            if path == "/free-at":
+                for required in ("day", "start", "end"):
+                    if required not in params:
+                        raise ValueError(f"Missing parameter: {required}")
+                return {
+                    "day": day,
+                    "start": start,
+                    "end": end,
+                    "free": self.free_at.free_at(day, start, end, names),
+                }
+        raise LookupError(path)
+
+    def _cohort(self, names):
+        """Who a result covers: the names asked for, or just a count for everyone"""
+        if names:
+            return {"people": names, "count": len(names)}
+        return {"count": len(self.index.people)}
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """Translates HTTP requests into ScheduleService queries"""
+
+    service = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        self.respond(url.path, params)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            params = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self.send_json(400, {"error": "Request body is not valid JSON"})
+            return
+        if not isinstance(params, dict):
+            self.send_json(400, {"error": "Request body must be a JSON object"})
+            return
+        self.respond(url.path, params)
+
+    def respond(self, path, params):
+        try:
+            self.send_json(200, self.service.query(path, params))
+        except KeyError as e:
+            self.send_json(400, {"error": e.args[0]})
+        except LookupError:
+            self.send_json(404, {"error": "Not found"})
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep stdout clean; access logs go to stderr
+        sys.stderr.write(f"{self.address_string()} - {format % args}\n")
+
+
+def serve(data_file, host="127.0.0.1", port=8765, poll_interval=2.0, write_cache=False):
+    """Run the query service until interrupted"""
+    service = ScheduleService(data_file, write_cache=write_cache)
+    stop_event = service.watch(poll_interval)
+
+    handler = type("BoundQueryHandler", (QueryHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(
+        f"Serving {len(service.index.people)} people from {data_file} "
+        f"on http://{host}:{server.server_port}",
+        file=sys.stderr,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_event.set()
+        server.server_close()
@@ -2,21 +2,49 @@ import json
 import os
 import base64
 import hashlib
-from cryptography.fernet import Fernet
-from models import Person, TimeSlot
+from models import Person, intern_time_slot
+from instrumentation import timed
+from conflicts import (
+    person_conflicts, period_conflicts, slot_conflicts, build_slot_index, describe_conflict
+)
 from datetime import datetime, timedelta
-from zoneinfo import ZoneInfo
 import re
 import urllib.parse
 
+# cryptography and zoneinfo are imported where they are used so that
+# plain-JSON loads and the console modes do not pay for them at startup
 
-TAIPEI = ZoneInfo("Asia/Taipei")
+TAIPEI_TZ_NAME = "Asia/Taipei"
 DAY_OFFSET = +1  # shift days manually
 
 # Encryption key (in production, this should be more secure)
 ENCRYPTION_KEY = b'schedule_manager_key_2024_secure_32bytes!'
 
 
+_timezones = {}
+
+
+def get_timezone(name):
+    """Return a cached ZoneInfo, importing zoneinfo on first use"""
+    if name not in _timezones:
+        from zoneinfo import ZoneInfo
+        _timezones[name] = ZoneInfo(name)
+    return _timezones[name]
+
+
+def __getattr__(name):
+    # storage.TAIPEI is still available, but zoneinfo is only imported when it is used
+    if name == "TAIPEI":
+        return get_timezone(TAIPEI_TZ_NAME)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_fernet():
+    """Return a Fernet instance for the application key"""
+    from cryptography.fernet import Fernet
+    return Fernet(get_encryption_key())
+
+
 def get_encryption_key():
     """Generate encryption key from the base key"""
     key = hashlib.sha256(ENCRYPTION_KEY).digest()
@@ -26,8 +54,7 @@ def get_encryption_key():
 def encrypt_json_data(data):
     """Encrypt JSON data"""
     try:
-        key = get_encryption_key()
-        fernet = Fernet(key)
+        fernet = get_fernet()
         json_str = json.dumps(data, indent=2)
         encrypted_data = fernet.encrypt(json_str.encode())
         return base64.b64encode(encrypted_data).decode()
@@ -38,8 +65,7 @@ def encrypt_json_data(data):
 def decrypt_json_data(encrypted_data):
     """Decrypt JSON data"""
     try:
-        key = get_encryption_key()
-        fernet = Fernet(key)
+        fernet = get_fernet()
         encrypted_bytes = base64.b64decode(encrypted_data.encode())
         decrypted_data = fernet.decrypt(encrypted_bytes)
         return json.loads(decrypted_data.decode())
@@ -70,7 +96,7 @@ def parse_ics_datetime(datetime_str):
 
     if datetime_str.endswith("Z"):
         dt = datetime.strptime(datetime_str[:-1], "%Y%m%dT%H%M%S")
-        dt = dt.replace(tzinfo=ZoneInfo("UTC")).astimezone(TAIPEI)
+        dt = dt.replace(tzinfo=get_timezone("UTC")).astimezone(get_timezone(TAIPEI_TZ_NAME))
         return dt + timedelta(days=DAY_OFFSET)
 
     raise ValueError(f"Unable to parse datetime: {datetime_str}")
@@ -158,11 +184,11 @@ def create_time_slot_from_event(event):
     start_time = start_dt.strftime("%H:%M")
     end_time = end_dt.strftime("%H:%M")
 
-    return TimeSlot(start_time, end_time, day_name)
+    return intern_time_slot(start_time, end_time, day_name)
 
 
-def import_ics_file(filename, courses, person_name, people_list):
-    """Import ICS file and create courses using description first line as course name"""
+def read_ics_courses(filename):
+    """Course name -> time slots for the events in an ICS file"""
     with open(filename, "r", encoding="utf-8") as f:
         ics_content = f.read()
 
@@ -184,6 +210,24 @@ def import_ics_file(filename, courses, person_name, people_list):
 
         time_slot = create_time_slot_from_event(event)
         courses_from_ics[course_name].append(time_slot)
+    return courses_from_ics
+
+
+def merge_course_slots(existing_slots, time_slots):
+    """Append the slots a course does not have yet; returns True if any were added"""
+    added = False
+    # Slots are interned, so equal slots are identical
+    for slot in time_slots:
+        if slot not in existing_slots:
+            existing_slots.append(slot)
+            added = True
+    return added
+
+
+@timed("storage.import_ics_file")
+def import_ics_file(filename, courses, person_name, people_list):
+    """Import ICS file and create courses using description first line as course name"""
+    courses_from_ics = read_ics_courses(filename)
 
     # Add courses and assign to person
     person = get_person(people_list, person_name)
@@ -196,31 +240,43 @@ def import_ics_file(filename, courses, person_name, people_list):
             add_course(courses, course_name, time_slots)
         else:
             # If course exists, merge time slots
-            existing_slots = courses[course_name]
-            for slot in time_slots:
-                if not any(
-                    existing_slot.start_time == slot.start_time
-                    and existing_slot.end_time == slot.end_time
-                    and existing_slot.day == slot.day
-                    for existing_slot in existing_slots
-                ):
-                    existing_slots.append(slot)
+            merge_course_slots(courses[course_name], time_slots)
 
         # Assign course to person if not already assigned
         try:
-            assign_course_to_person(people_list, person_name, courses, course_name)
+            assign_course_to_person(
+                people_list, person_name, courses, course_name, allow_conflicts=True
+            )
         except ValueError:
             # Person already has this course
             pass
 
 
-def load_data(filename):
-    """Load people and courses from JSON file (handles both encrypted and plain JSON)"""
+def snapshot_digest(content=""):
+    """sha256 hash object of a snapshot's content as load_data reads it"""
+    return hashlib.sha256(content.strip().encode())
+
+
+@timed("storage.load_data")
+def load_data(filename, digest=None):
+    """Load people and courses from JSON file (handles both encrypted and plain JSON).
+
+    What is read (snapshot, then journal) is hashed into digest, if given.
+    People's busy fingerprints are seeded from the availability sidecar if
+    it was written for exactly this data.
+    """
     if not os.path.exists(filename):
         return [], {}
 
     with open(filename, "r") as file:
         content = file.read().strip()
+
+    from availability import read_availability_cache, seed_cached_fingerprints
+    cache = read_availability_cache(filename)
+    if digest is None and cache is not None:
+        digest = snapshot_digest()
+    if digest is not None:
+        digest.update(content.encode())
     
     # Try to determine if it's encrypted or plain JSON
     try:
@@ -236,7 +292,7 @@ def load_data(filename):
     # Load courses
     courses = {}
     for cname, slots in data.get("courses", {}).items():
-        courses[cname] = [TimeSlot(*slot) for slot in slots]
+        courses[cname] = [intern_time_slot(*slot) for slot in slots]
 
     # Load people
     people = []
@@ -248,11 +304,17 @@ def load_data(filename):
                 person_courses.append(courses[course_name])  # Keep as list of courses
         people.append(Person(name, person_courses))
 
+    # Apply changes recorded since the snapshot was written
+    from journal import replay_journal
+    replay_journal(filename, people, courses, digest)
+
+    if cache is not None and cache.get("source") == digest.hexdigest():
+        seed_cached_fingerprints(cache, people)
     return people, courses
 
 
-def save_data(people_list, courses, filename):
-    """Save people and courses to JSON file"""
+def build_save_data(people_list, courses):
+    """Convert people and courses into the JSON-serialisable file structure"""
     # Convert courses to saveable format
     courses_data = {}
     for course_name, slots in courses.items():
@@ -260,76 +322,96 @@ def save_data(people_list, courses, filename):
             (slot.start_time, slot.end_time, slot.day) for slot in slots
         ]
 
-    # Create people data with course names
+    # Create people data with course names (personal periods are not saved)
+    names_by_id = {}
+    for course_name, slots in courses.items():
+        names_by_id.setdefault(id(slots), course_name)
     people_data = {}
     for person in people_list:
-        course_names = []
-        for course_slots in person.schedule:
-            # Find the course name that matches these slots
-            for course_name, stored_slots in courses.items():
-                if stored_slots == course_slots:
-                    course_names.append(course_name)
-                    break
-        people_data[person.name] = course_names
+        people_data[person.name] = [
+            names_by_id[id(course_slots)]
+            for course_slots in person.schedule
+            if id(course_slots) in names_by_id
+        ]
 
-    data = {"courses": courses_data, "people": people_data}
+    return {"courses": courses_data, "people": people_data}
 
-    with open(filename, "w") as file:
-        json.dump(data, file, indent=2)
 
+# Path -> file_state() right after this process last wrote or deleted it, so
+# file watchers can tell this program's own writes from other programs'
+_own_writes = {}
+
+
+def file_state(path):
+    """(mtime_ns, size) of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def note_own_write(*paths):
+    """Remember the state of files this process has just written or deleted"""
+    for path in paths:
+        _own_writes[os.path.abspath(path)] = file_state(path)
+
+
+def is_own_write(path, state):
+    """True if the file is still in the state this process last left it in"""
+    key = os.path.abspath(path)
+    return key in _own_writes and _own_writes[key] == state
+
+
+def write_snapshot(data, filename, encrypted=False, fingerprints=None):
+    """Write saved data to filename atomically (a crash leaves the old file intact).
+
+    An existing availability sidecar is rewritten for the new snapshot, with
+    fingerprints (availability.saved_fingerprints) if the caller has them.
+    """
+    content = encrypt_json_data(data) if encrypted else json.dumps(data, indent=2)
+    temp_file = f"{filename}.tmp"
+    with open(temp_file, "w") as file:
+        file.write(content)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_file, filename)
+    note_own_write(filename)
 
+    from availability import refresh_availability_cache
+    refresh_availability_cache(data, filename, content, fingerprints)
+
+
+@timed("storage.save_data")
+def save_data(people_list, courses, filename):
+    """Save people and courses to JSON file"""
+    from availability import cache_fingerprints
+    data = build_save_data(people_list, courses)
+    write_snapshot(data, filename, fingerprints=cache_fingerprints(filename, people_list, courses))
+
+    # The snapshot now holds every journalled change
+    from journal import discard_journal
+    discard_journal(filename)
+
+
+@timed("storage.save_data_encrypted")
 def save_data_encrypted(people_list, courses, filename):
     """Save people and courses to encrypted JSON file"""
-    # Convert courses to saveable format
-    courses_data = {}
-    for course_name, slots in courses.items():
-        courses_data[course_name] = [
-            (slot.start_time, slot.end_time, slot.day) for slot in slots
-        ]
+    from availability import cache_fingerprints
+    data = build_save_data(people_list, courses)
+    write_snapshot(
+        data, filename, encrypted=True,
+        fingerprints=cache_fingerprints(filename, people_list, courses),
+    )
 
-    # Create people data with course names
-    people_data = {}
-    for person in people_list:
-        course_names = []
-        for course_slots in person.schedule:
-            # Find the course name that matches these slots
-            for course_name, stored_slots in courses.items():
-                if stored_slots == course_slots:
-                    course_names.append(course_name)
-                    break
-        people_data[person.name] = course_names
-
-    data = {"courses": courses_data, "people": people_data}
-    
-    # Encrypt the data
-    encrypted_data = encrypt_json_data(data)
-    
-    with open(filename, "w") as file:
-        file.write(encrypted_data)
+    from journal import discard_journal
+    discard_journal(filename)
 
 
+@timed("storage.export_data_plain")
 def export_data_plain(people_list, courses, filename):
     """Export people and courses to plain JSON file"""
-    # Convert courses to saveable format
-    courses_data = {}
-    for course_name, slots in courses.items():
-        courses_data[course_name] = [
-            (slot.start_time, slot.end_time, slot.day) for slot in slots
-        ]
-
-    # Create people data with course names
-    people_data = {}
-    for person in people_list:
-        course_names = []
-        for course_slots in person.schedule:
-            # Find the course name that matches these slots
-            for course_name, stored_slots in courses.items():
-                if stored_slots == course_slots:
-                    course_names.append(course_name)
-                    break
-        people_data[person.name] = course_names
-
-    data = {"courses": courses_data, "people": people_data}
+    data = build_save_data(people_list, courses)
 
     with open(filename, "w") as file:
         json.dump(data, file, indent=2)
@@ -387,7 +469,7 @@ def create_time_slot(start_time, end_time, day):
             f"Invalid end_time format: {end_time}. Expected HH:MM (24-hour format)"
         )
 
-    return TimeSlot(start_time, end_time, day)
+    return intern_time_slot(start_time, end_time, day)
 
 
 def load_courses(filename):
@@ -400,7 +482,7 @@ def load_courses(filename):
 
     courses = {}
     for cname, slots in data.get("courses", {}).items():
-        courses[cname] = [TimeSlot(*slot) for slot in slots]
+        courses[cname] = [intern_time_slot(*slot) for slot in slots]
 
     return courses
 
@@ -425,29 +507,36 @@ def save_courses(courses, filename):
         json.dump(data, file, indent=2)
 
 
-def add_course(courses, course_name, time_slots):
+def add_course(courses, course_name, time_slots, overlap_index=None):
     """Add a new course with time slots"""
     if course_name in courses:
         raise ValueError(f"Course '{course_name}' already exists")
 
     courses[course_name] = time_slots
+    if overlap_index is not None:
+        overlap_index.add_course(course_name)
     return courses[course_name]
 
 
-def remove_course(courses, course_name):
+def remove_course(courses, course_name, overlap_index=None):
     """Remove a course"""
     if course_name not in courses:
         raise ValueError(f"Course '{course_name}' not found")
 
-    return courses.pop(course_name)
+    removed = courses.pop(course_name)
+    if overlap_index is not None:
+        overlap_index.remove_course(course_name)
+    return removed
 
 
-def update_course(courses, course_name, new_time_slots):
+def update_course(courses, course_name, new_time_slots, overlap_index=None):
     """Update a course's time slots"""
     if course_name not in courses:
         raise ValueError(f"Course '{course_name}' not found")
 
     courses[course_name] = new_time_slots
+    if overlap_index is not None:
+        overlap_index.update_course(course_name)
     return courses[course_name]
 
 
@@ -456,25 +545,65 @@ def get_course(courses, course_name):
     return courses.get(course_name)
 
 
-def assign_course_to_person(people_list, person_name, courses, course_name):
-    """Assign a course to a person"""
+def assign_course_to_person(people_list, person_name, courses, course_name, allow_conflicts=True,
+                            overlap_index=None):
+    """Assign a course to a person (refusing clashes with their schedule if allow_conflicts is False)"""
     if course_name not in courses:
         raise ValueError(f"Course '{course_name}' not found")
 
     person = get_person(people_list, person_name)
     if not person:
         raise ValueError(f"Person '{person_name}' not found")
+    return enroll(person, courses, course_name, allow_conflicts, overlap_index)
+
 
-    # Check if person already has this course
+def enrollment_conflicts(person, courses, course_name, overlap_index=None, slot_index=None):
+    """Clashes taking a course would give a person, as (slot, course name, existing slot).
+
+    With an overlap_index, course-to-course clashes come from its graph and
+    only personal periods are checked slot by slot. slot_index is the
+    person's SlotGroupIndex if the caller keeps one (see DataStore.slot_index).
+    """
+    course_slots = courses[course_name]
+    if overlap_index is None:
+        return person_conflicts(person, course_slots, courses, index=slot_index)
+    clashing = overlap_index.enrolled_clashes(course_name, person.schedule)
+    if clashing:
+        # The graph does not say which slots overlap, so find them in the clashing course
+        other = build_slot_index([courses[clashing[0]]])
+        return slot_conflicts(other, course_slots, lambda group: clashing[0])
+    return period_conflicts(person, course_slots, overlap_index, slot_index)
+
+
+def enroll(person, courses, course_name, allow_conflicts=True, overlap_index=None,
+           rebuild_busy=True, position=None, slot_index=None):
+    """Add a course to a person's schedule, refusing duplicates and (if asked) clashes.
+
+    The course goes at the end of the schedule, or at `position`. With
+    rebuild_busy=False the caller is responsible for refreshing busy_time.
+    """
+    person_name = person.name
     course_slots = courses[course_name]
     for existing_course in person.schedule:
-        if existing_course == course_slots:
+        if existing_course is course_slots:
             raise ValueError(
                 f"Person '{person_name}' is already enrolled in '{course_name}'"
             )
 
-    person.schedule.append(course_slots)
-    person.busy_time = person._create_busy_time_dict()
+    if not allow_conflicts:
+        conflicts = enrollment_conflicts(person, courses, course_name, overlap_index, slot_index)
+        if conflicts:
+            raise ValueError(
+                f"'{course_name}' clashes with {describe_conflict(conflicts[0])} "
+                f"for '{person_name}'"
+            )
+
+    if position is None:
+        person.schedule.append(course_slots)
+    else:
+        person.schedule.insert(position, course_slots)
+    if rebuild_busy:
+        person.busy_time = person._create_busy_time_dict()
     return person
 
 
@@ -486,17 +615,23 @@ def remove_course_from_person(people_list, person_name, courses, course_name):
     person = get_person(people_list, person_name)
     if not person:
         raise ValueError(f"Person '{person_name}' not found")
+    unenroll(person, courses, course_name)
+    return person
+
 
+def unenroll(person, courses, course_name, rebuild_busy=True):
+    """Remove a course from a person's schedule; returns its former position"""
     course_slots = courses[course_name]
 
     # Find and remove the course from person's schedule
     for i, existing_course in enumerate(person.schedule):
-        if existing_course == course_slots:
+        if existing_course is course_slots:
             person.schedule.pop(i)
-            person.busy_time = person._create_busy_time_dict()
-            return person
+            if rebuild_busy:
+                person.busy_time = person._create_busy_time_dict()
+            return i
 
-    raise ValueError(f"Person '{person_name}' is not enrolled in '{course_name}'")
+    raise ValueError(f"Person '{person.name}' is not enrolled in '{course_name}'")
 
 
 def get_people_in_course(people_list, courses, course_name):
@@ -509,7 +644,7 @@ def get_people_in_course(people_list, courses, course_name):
 
     for person in people_list:
         for existing_course in person.schedule:
-            if existing_course == course_slots:
+            if existing_course is course_slots:
                 enrolled_people.append(person.name)
                 break
 
@@ -0,0 +1,17 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def write_data(tmp_path):
+    """Write a plain JSON data file from {course: [[start, end, day]]} and
+    {person: [course names]}; returns its path"""
+    path = tmp_path / "schedule_data.json"
+
+    def write(courses, people):
+        with open(path, "w") as file:
+            json.dump({"courses": courses, "people": people}, file)
+        return str(path)
+
+    return write
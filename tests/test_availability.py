@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+from availability import FreeAtIndex
+from models import Person, intern_time_slot
+from schedule import DAYS, to_minutes
+
+
+def time(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def random_people(rng, count):
+    """People with slots starting and ending on and off the 10-minute buckets"""
+    people = []
+    for i in range(count):
+        slots = []
+        for _ in range(rng.randint(0, 4)):
+            start = rng.randrange(0, 1440 - 5, 5)
+            end = min(start + rng.choice([5, 10, 15, 50, 90]), 1440)
+            slots.append(intern_time_slot(time(start), time(end), rng.choice(DAYS[:3])))
+        people.append(Person(f"P{i}", [slots]))
+    return people
+
+
+def free_by_scan(people, day, start, end):
+    """Names of the people with no busy slot overlapping [start, end) on day"""
+    start_m, end_m = to_minutes(start), to_minutes(end)
+    return [
+        person.name for person in people
+        if not any(
+            slot_day == day and to_minutes(s) < end_m and to_minutes(e) > start_m
+            for s, e, slot_day in person.busy_time.values()
+        )
+    ]
+
+
+@pytest.mark.parametrize("start, end", [
+    ("10:00", "11:00"),  # bucket-aligned
+    ("10:05", "11:00"),  # starts inside a bucket
+    ("10:00", "10:55"),  # ends inside a bucket
+    ("10:03", "10:07"),  # starts and ends inside one bucket
+    ("10:05", "10:15"),  # two partial buckets, no whole one
+    ("00:00", "24:00"),  # the whole day
+    ("23:55", "24:00"),
+])
+def test_free_at_matches_a_linear_scan(start, end):
+    rng = random.Random(0)
+    people = random_people(rng, 300)
+    index = FreeAtIndex(people)
+    for day in DAYS[:4]:
+        assert index.free_at(day, start, end) == free_by_scan(people, day, start, end)
+
+
+def test_random_windows_match_a_linear_scan():
+    rng = random.Random(1)
+    people = random_people(rng, 200)
+    index = FreeAtIndex(people)
+    for _ in range(300):
+        start = rng.randrange(0, 1440 - 1)
+        end = rng.randrange(start + 1, 1441)
+        day = rng.choice(DAYS[:3])
+        assert index.free_at(day, time(start), time(end)) == free_by_scan(people, day, time(start), time(end))
+
+
+def test_update_moves_and_removes_people():
+    rng = random.Random(2)
+    people = random_people(rng, 50)
+    index = FreeAtIndex(people)
+
+    people[0].schedule = [[intern_time_slot("10:05", "10:25", "Monday")]]
+    people[0].busy_time = people[0]._create_busy_time_dict()
+    removed = people.pop(1)
+    added, changed, gone = index.update(people)
+    assert (added, changed, gone) == ([], [people[0].name], [removed.name])
+
+    for start, end in [("10:00", "10:06"), ("10:24", "10:30"), ("10:25", "10:35"), ("00:00", "24:00")]:
+        assert index.free_at("Monday", start, end) == free_by_scan(people, "Monday", start, end)
+
+
+def test_names_limit_the_answer():
+    people = [
+        Person("alice", [[intern_time_slot("09:00", "10:00", "Monday")]]),
+        Person("bob", []),
+        Person("carol", []),
+    ]
+    index = FreeAtIndex(people)
+    assert index.free_at("Monday", "09:30", "10:30", ["alice", "bob"]) == ["bob"]
+    with pytest.raises(KeyError):
+        index.free_at("Monday", "09:30", "10:30", ["dave"])
+    with pytest.raises(ValueError):
+        index.free_at("Monday", "10:30", "09:30")
@@ -0,0 +1,124 @@
+import io
+import os
+
+import pytest
+
+import models
+from availability import availability_cache_path, load_availability, read_availability_cache
+from cli import run_cli
+from datastore import DataStore
+from journal import Journal
+from models import intern_time_slot
+from schedule import normalized_busy
+from storage import load_data, save_data, save_data_encrypted, snapshot_digest
+
+COURSES = {
+    "Calculus": [["09:00", "10:00", "Monday"], ["09:30", "11:00", "Monday"]],
+    "Physics": [["11:00", "12:00", "Tuesday"]],
+    "History": [["14:00", "15:00", "Thursday"]],
+}
+PEOPLE = {"alice": ["Calculus", "Physics"], "bob": ["Calculus"], "carol": [], "dave": ["Calculus"]}
+
+
+@pytest.fixture
+def computed(monkeypatch):
+    """Busy times whose fingerprint Person computed rather than had seeded"""
+    names = []
+    compute = models.normalized_busy
+
+    def counted(busy_times):
+        names.append(busy_times)
+        return compute(busy_times)
+
+    monkeypatch.setattr(models, "normalized_busy", counted)
+    return names
+
+
+def fingerprints(people_list):
+    return {person.name: person.busy_fingerprint() for person in people_list}
+
+
+def expected(people_list):
+    return {person.name: normalized_busy(person.busy_time.values()) for person in people_list}
+
+
+def test_an_up_to_date_sidecar_seeds_every_fingerprint(write_data, computed):
+    path = write_data(COURSES, PEOPLE)
+    load_availability(path, write_cache=True)
+    assert read_availability_cache(path)["people"] == [0, 1, 2, 1]
+    computed.clear()
+
+    people_list, _ = load_data(path)
+    assert fingerprints(people_list) == expected(people_list)
+    assert computed == []
+
+
+def test_a_changed_file_or_journal_is_recomputed(write_data, computed):
+    path = write_data(COURSES, PEOPLE)
+    load_availability(path, write_cache=True)
+
+    # A journalled edit: the snapshot alone still matches, but not with the journal
+    store = DataStore(*load_data(path), path, journal=Journal(path))
+    store.assign_course_to_person("carol", "History")
+    computed.clear()
+    people_list, _ = load_data(path)
+    assert fingerprints(people_list) == expected(people_list)
+    assert len(computed) == len(people_list)
+
+    # Rewritten by another program with the same people in another order
+    write_data(COURSES, dict(reversed(list(PEOPLE.items()))))
+    os.remove(path + ".journal")
+    computed.clear()
+    people_list, _ = load_data(path)
+    assert fingerprints(people_list) == expected(people_list)
+    assert len(computed) == len(people_list)
+
+
+def test_read_only_queries_do_not_write_the_sidecar(write_data):
+    path = write_data(COURSES, PEOPLE)
+    out = io.StringIO()
+    assert run_cli(["--data", path, "common", "--people", "alice,bob", "--day", "Monday"], out=out) == 0
+    assert run_cli(["--data", path, "free-at", "--day", "Monday", "--start", "09:00",
+                    "--end", "10:00"], out=out) == 0
+    load_availability(path)
+    assert not os.path.exists(availability_cache_path(path))
+
+    assert run_cli(["--data", path, "free-at", "--day", "Monday", "--start", "12:00",
+                    "--end", "13:00", "--write-cache"], out=out) == 0
+    assert read_availability_cache(path)["source"] == snapshot_digest(open(path).read()).hexdigest()
+
+
+@pytest.mark.parametrize("saver", [save_data, save_data_encrypted])
+def test_saves_refresh_an_existing_sidecar(write_data, computed, saver):
+    path = write_data(COURSES, PEOPLE)
+    store = DataStore(*load_data(path), path, saver=saver)
+    store.save()
+    assert not os.path.exists(availability_cache_path(path))
+
+    load_availability(path, write_cache=True)
+    store.assign_course_to_person("carol", "History")
+    # Personal periods are not saved, so they must not reach the sidecar
+    store.add_personal_period("bob", [intern_time_slot("18:00", "19:00", "Friday")])
+    store.save()
+
+    computed.clear()
+    people_list, _ = load_data(path)
+    assert computed == []
+    assert fingerprints(people_list)["bob"] == (("Monday", 540, 660),)
+    assert fingerprints(people_list) == expected(people_list)
+
+
+def test_compaction_refreshes_an_existing_sidecar(write_data, computed):
+    path = write_data(COURSES, PEOPLE)
+    load_availability(path, write_cache=True)
+    journal = Journal(path)
+    store = DataStore(*load_data(path), path, journal=journal)
+    store.remove_person("alice")
+    store.add_person("erin", [store.courses["Physics"]])
+    journal.compact(store.people_list, store.courses, background=False)
+
+    computed.clear()
+    people_list, _ = load_data(path)
+    assert computed == []
+    assert [person.name for person in people_list] == ["bob", "carol", "dave", "erin"]
+    assert fingerprints(people_list) == expected(people_list)
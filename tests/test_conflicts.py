@@ -0,0 +1,130 @@
+import random
+
+import pytest
+
+from conflicts import CourseOverlapIndex, PERSONAL_PERIOD
+from datastore import DataStore
+from history import UndoStack
+from models import Person, intern_time_slot
+from schedule import to_minutes
+from storage import assign_course_to_person
+
+
+def make_store():
+    courses = {
+        "Calculus": [intern_time_slot("09:00", "10:00", "Monday")],
+        "Physics": [intern_time_slot("11:00", "12:00", "Monday")],
+        "Chemistry": [intern_time_slot("09:30", "10:30", "Monday")],
+    }
+    people = [Person("alice", [courses["Calculus"]])]
+    return DataStore(people, courses, history=UndoStack())
+
+
+def overlaps(a, b):
+    return (a.day == b.day and to_minutes(a.start_time) < to_minutes(b.end_time)
+            and to_minutes(b.start_time) < to_minutes(a.end_time))
+
+
+def test_clash_checks_see_each_edit():
+    store = make_store()
+    slot = intern_time_slot("11:30", "12:30", "Monday")
+    assert store.person_conflicts("alice", [slot]) == []
+
+    store.assign_course_to_person("alice", "Physics")
+    assert store.person_conflicts("alice", [slot]) == [(slot, "Physics", store.courses["Physics"][0])]
+
+    store.update_course("Physics", [intern_time_slot("14:00", "15:00", "Monday")])
+    assert store.person_conflicts("alice", [slot]) == []
+    store.history.undo(store)
+    assert [name for _, name, _ in store.person_conflicts("alice", [slot])] == ["Physics"]
+
+    store.remove_course_from_person("alice", "Physics")
+    period = store.add_personal_period("alice", [intern_time_slot("12:00", "13:00", "Monday")])
+    assert store.person_conflicts("alice", [slot]) == [(slot, PERSONAL_PERIOD, period[0])]
+
+
+def test_rolled_back_edits_leave_no_trace_in_the_indexes():
+    store = make_store()
+    slot = intern_time_slot("11:30", "12:30", "Monday")
+    store.person_conflicts("alice", [slot])
+    store.course_overlaps()
+    with pytest.raises(RuntimeError):
+        with store.transaction():
+            store.assign_course_to_person("alice", "Physics")
+            store.update_course("Chemistry", [intern_time_slot("11:00", "11:30", "Monday")])
+            raise RuntimeError("abort")
+
+    assert store.person_conflicts("alice", [slot]) == []
+    assert store.course_overlaps().clashes_with("Chemistry") == ["Calculus"]
+
+
+def test_enrollment_conflicts_and_the_checked_assign():
+    store = make_store()
+    assert [name for _, name, _ in store.enrollment_conflicts("alice", "Chemistry")] == ["Calculus"]
+    assert store.enrollment_conflicts("alice", "Physics") == []
+    with pytest.raises(ValueError, match="clashes with Calculus"):
+        store.assign_course_to_person("alice", "Chemistry", allow_conflicts=False)
+
+    # Clashes are allowed unless asked for, as before the check existed
+    store.assign_course_to_person("alice", "Chemistry")
+    assert store.is_enrolled("alice", "Chemistry")
+    people_list, courses = [Person("bob", [store.courses["Calculus"]])], store.courses
+    assign_course_to_person(people_list, "bob", courses, "Chemistry")
+    assert people_list[0].schedule[-1] is courses["Chemistry"]
+
+
+def test_course_conflicts_follow_added_slots():
+    store = make_store()
+    late = intern_time_slot("09:45", "10:15", "Monday")
+    assert store.course_conflicts("Physics", late) == []
+    store.add_course_slot("Physics", intern_time_slot("10:00", "11:00", "Monday"))
+    assert store.course_conflicts("Physics", late) == [intern_time_slot("10:00", "11:00", "Monday")]
+    assert store.course_conflicts("Calculus", intern_time_slot("10:00", "11:00", "Monday")) == []
+
+
+def test_random_edits_match_a_linear_scan():
+    rng = random.Random(0)
+
+    def random_slot():
+        start = rng.randrange(8 * 60, 18 * 60, 30)
+        end = start + rng.choice([30, 60, 90])
+        return intern_time_slot(f"{start // 60:02d}:{start % 60:02d}",
+                                f"{end // 60:02d}:{end % 60:02d}", rng.choice(["Monday", "Tuesday"]))
+
+    store = DataStore(history=UndoStack())
+    for i in range(6):
+        store.add_course(f"C{i}", [random_slot() for _ in range(2)])
+    for i in range(4):
+        store.add_person(f"P{i}", [store.courses[f"C{i}"]])
+    store.course_overlaps()
+
+    for step in range(500):
+        people, course_names = list(store.people), list(store.courses)
+        name, course = rng.choice(people), rng.choice(course_names)
+        edit = rng.randrange(6)
+        try:
+            if edit == 0:
+                store.assign_course_to_person(name, course, allow_conflicts=rng.random() < 0.5)
+            elif edit == 1:
+                store.remove_course_from_person(name, course)
+            elif edit == 2:
+                store.update_course(course, [random_slot() for _ in range(rng.randint(0, 3))])
+            elif edit == 3:
+                store.add_personal_period(name, [random_slot()], allow_conflicts=True)
+            elif edit == 4 and store.history.can_undo():
+                store.history.undo(store)
+            elif edit == 5:
+                store.update_person_schedule(name, [store.courses[c] for c in rng.sample(course_names, 2)])
+        except ValueError:
+            pass
+
+        slot = random_slot()
+        for name, person in store.people.items():
+            expected = sorted(
+                (id(existing), store.course_name(group) or PERSONAL_PERIOD)
+                for group in person.schedule for existing in group if overlaps(slot, existing)
+            )
+            found = sorted((id(existing), course) for _, course, existing in store.person_conflicts(name, [slot]))
+            assert found == expected
+        fresh = CourseOverlapIndex(store.courses)
+        assert store.course_overlaps().graph == fresh.graph
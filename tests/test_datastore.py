@@ -0,0 +1,94 @@
+import pytest
+
+import storage
+from datastore import DataStore
+from models import Person, intern_time_slot
+
+
+def make_store():
+    courses = {
+        "Calculus": [intern_time_slot("09:00", "10:00", "Monday")],
+        "Physics": [intern_time_slot("11:00", "12:00", "Tuesday")],
+        "History": [intern_time_slot("14:00", "15:00", "Thursday")],
+    }
+    people = [
+        Person("alice", [courses["Physics"], courses["Calculus"]]),
+        Person("bob", [courses["Calculus"]]),
+        Person("carol", []),
+    ]
+    return DataStore(people, courses)
+
+
+def test_lookups_by_name():
+    store = make_store()
+    assert store.get_person("bob") is store.people_list[1]
+    assert store.get_person("dave") is None
+    assert store.get_course("Physics") is store.courses["Physics"]
+    assert store.get_course("Chemistry") is None
+    assert [person.name for person in store] == ["alice", "bob", "carol"]
+    assert len(store) == 3
+
+
+def test_enrolments_per_course():
+    store = make_store()
+    assert store.get_people_in_course("Calculus") == ["alice", "bob"]
+    assert store.get_people_in_course("History") == []
+    assert store.is_enrolled("alice", "Physics")
+    assert not store.is_enrolled("bob", "Physics")
+    assert not store.is_enrolled("bob", "Chemistry")
+    with pytest.raises(ValueError):
+        store.get_people_in_course("Chemistry")
+
+
+def test_course_names_of_schedule_entries():
+    store = make_store()
+    alice = store.get_person("alice")
+    period = store.add_personal_period("alice", [intern_time_slot("18:00", "19:00", "Friday")])
+
+    assert store.course_name(store.courses["Physics"]) == "Physics"
+    assert store.course_name(period) is None
+    # In schedule order, without the personal period
+    assert store.person_course_names(alice) == ["Physics", "Calculus"]
+
+
+def test_indexes_follow_mutations():
+    store = make_store()
+    store.add_person("dave", [store.courses["History"]])
+    store.assign_course_to_person("carol", "Calculus")
+    store.remove_course_from_person("alice", "Calculus")
+    store.remove_person("bob")
+    store.add_course("Chemistry", [intern_time_slot("08:00", "09:00", "Monday")])
+    store.assign_course_to_person("dave", "Chemistry")
+    store.remove_course("Physics")
+
+    assert [person.name for person in store.people_list] == ["alice", "carol", "dave"]
+    assert store.get_person("bob") is None
+    assert store.get_person("dave").name == "dave"
+    assert store.get_people_in_course("Calculus") == ["carol"]
+    assert store.get_people_in_course("History") == ["dave"]
+    assert store.get_people_in_course("Chemistry") == ["dave"]
+    assert "Physics" not in store.courses
+    assert store.person_course_names(store.get_person("alice")) == []
+
+    # The list and dict stay usable with the functions in storage.py
+    for course_name in store.courses:
+        assert storage.get_people_in_course(store.people_list, store.courses, course_name) == \
+            store.get_people_in_course(course_name)
+
+
+def test_duplicate_and_missing_names_are_rejected():
+    store = make_store()
+    with pytest.raises(ValueError):
+        store.add_person("alice")
+    with pytest.raises(ValueError):
+        store.remove_person("dave")
+    with pytest.raises(ValueError):
+        store.add_course("Physics", [])
+    with pytest.raises(ValueError):
+        store.assign_course_to_person("alice", "Physics")
+    with pytest.raises(ValueError):
+        store.assign_course_to_person("dave", "Physics")
+    with pytest.raises(ValueError):
+        store.remove_course_from_person("bob", "Physics")
+    with pytest.raises(ValueError):
+        DataStore([Person("alice"), Person("alice")], {})
@@ -0,0 +1,134 @@
+import pytest
+
+from datastore import DataStore
+from history import UndoStack
+from journal import Journal
+from models import Person, intern_time_slot
+from storage import load_data, build_save_data
+
+
+def make_store():
+    courses = {
+        "Calculus": [intern_time_slot("09:00", "10:00", "Monday")],
+        "Physics": [intern_time_slot("11:00", "12:00", "Tuesday")],
+        "History": [intern_time_slot("14:00", "15:00", "Thursday")],
+    }
+    people = [
+        Person("alice", [courses["Physics"], courses["Calculus"], courses["History"]]),
+        Person("bob", [courses["Calculus"]]),
+        Person("carol", [courses["History"], courses["Physics"]]),
+        Person("dave", [courses["Physics"], courses["Calculus"]]),
+    ]
+    return DataStore(people, courses, history=UndoStack())
+
+
+def state(store, enrolment_order=True):
+    """People, their schedules (as course names, in order), courses and who takes each course.
+
+    The store lists a course's people in the order they enrolled; undoing
+    remove_person puts the person back in the list but enrols them last.
+    """
+    enrolled = {name: store.get_people_in_course(name) for name in store.courses}
+    if not enrolment_order:
+        enrolled = {name: set(names) for name, names in enrolled.items()}
+    return (
+        [(person.name, store.person_course_names(person)) for person in store.people_list],
+        list(store.courses.items()),
+        enrolled,
+        {person.name: sorted(person.busy_time.values()) for person in store.people_list},
+    )
+
+
+def test_undo_remove_course_restores_enrolments_and_their_order():
+    store = make_store()
+    before = state(store)
+
+    store.remove_course("Calculus")
+    assert "Calculus" not in store.courses
+    assert store.history.undo_label() == "Remove Course 'Calculus'"
+
+    store.history.undo(store)
+    assert state(store) == before
+    # The course is the same slot list the schedules point at
+    calculus = store.courses["Calculus"]
+    assert all(
+        any(group is calculus for group in store.get_person(name).schedule)
+        for name in ["alice", "bob", "dave"]
+    )
+
+    store.history.redo(store)
+    assert "Calculus" not in store.courses
+    assert store.person_course_names(store.get_person("alice")) == ["Physics", "History"]
+    store.history.undo(store)
+    assert state(store) == before
+
+
+def test_undo_and_redo_walk_through_several_edits():
+    store = make_store()
+    states = [state(store, enrolment_order=False)]
+    store.add_person("erin", [store.courses["History"]])
+    states.append(state(store, enrolment_order=False))
+    store.remove_course_from_person("alice", "Calculus")
+    states.append(state(store, enrolment_order=False))
+    store.update_course("Physics", [intern_time_slot("16:00", "17:00", "Friday")])
+    states.append(state(store, enrolment_order=False))
+    store.remove_person("bob")
+    states.append(state(store, enrolment_order=False))
+
+    for expected in reversed(states[:-1]):
+        store.history.undo(store)
+        assert state(store, enrolment_order=False) == expected
+    assert not store.history.can_undo()
+    for expected in states[1:]:
+        store.history.redo(store)
+        assert state(store, enrolment_order=False) == expected
+    assert not store.history.can_redo()
+
+
+def test_transaction_is_one_undo_step():
+    store = make_store()
+    before = state(store)
+    with store.transaction("Reorganise"):
+        store.remove_course("History")
+        store.add_course("Chemistry", [intern_time_slot("08:00", "09:00", "Monday")])
+        store.assign_course_to_person("bob", "Chemistry")
+    assert store.history.undo_label() == "Reorganise"
+    store.history.undo(store)
+    assert state(store) == before
+
+
+def test_new_edit_clears_redo():
+    store = make_store()
+    store.add_person("erin")
+    store.history.undo(store)
+    assert store.history.can_redo()
+    store.add_person("frank")
+    assert not store.history.can_redo()
+
+
+def test_failed_undo_leaves_data_and_stacks_unchanged():
+    store = make_store()
+    store.add_person("erin")
+    # Changed behind the history's back, so the undo (remove erin) no longer applies
+    store.history.replaying = True
+    store.remove_person("erin")
+    store.history.replaying = False
+    before = state(store)
+
+    with pytest.raises(ValueError):
+        store.history.undo(store)
+    assert state(store) == before
+    assert store.history.undo_label() == "Add Person 'erin'"
+
+
+def test_undo_is_journalled(write_data):
+    path = write_data(
+        {"Calculus": [["09:00", "10:00", "Monday"]], "Physics": [["11:00", "12:00", "Tuesday"]]},
+        {"alice": ["Physics", "Calculus"], "bob": ["Calculus"]},
+    )
+    store = DataStore(*load_data(path), path, journal=Journal(path), history=UndoStack())
+    store.remove_course("Calculus")
+    store.history.undo(store)
+
+    assert build_save_data(*load_data(path)) == build_save_data(store.people_list, store.courses)
+    assert build_save_data(*load_data(path))["people"]["alice"] == ["Physics", "Calculus"]
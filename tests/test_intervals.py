@@ -0,0 +1,88 @@
+import random
+
+import pytest
+
+from intervals import IntervalTree, DayIntervalIndex
+
+
+def by_key(found):
+    return sorted((start, end, id(value)) for start, end, value in found)
+
+
+def brute_overlapping(intervals, start, end):
+    return [(s, e, v) for s, e, v in intervals if s < end and e > start]
+
+
+def test_touching_intervals_do_not_overlap():
+    tree = IntervalTree(seed=0)
+    tree.insert(540, 600, "nine")
+    tree.insert(600, 660, "ten")
+
+    assert tree.overlapping(600, 660) == [(600, 660, "ten")]
+    assert tree.overlapping(480, 540) == []
+    assert tree.overlapping(660, 720) == []
+    assert sorted(tree.overlapping(599, 601)) == [(540, 600, "nine"), (600, 660, "ten")]
+
+
+def test_same_interval_holds_several_values():
+    tree = IntervalTree(seed=0)
+    first, second = ["first"], ["second"]
+    tree.insert(540, 600, first)
+    tree.insert(540, 600, second)
+    assert len(tree) == 2
+
+    # Removal is by identity, so an equal value does not match
+    with pytest.raises(ValueError):
+        tree.remove(540, 600, ["first"])
+    tree.remove(540, 600, first)
+    assert tree.overlapping(0, 1440) == [(540, 600, second)]
+    assert len(tree) == 1
+
+
+def test_remove_missing_interval_raises():
+    tree = IntervalTree(seed=0)
+    tree.insert(540, 600, "nine")
+    with pytest.raises(ValueError):
+        tree.remove(540, 601, "nine")
+    assert len(tree) == 1
+
+
+def test_random_inserts_and_removals_match_a_linear_scan():
+    rng = random.Random(0)
+    tree = IntervalTree(seed=1)
+    intervals = []
+    for step in range(2000):
+        if intervals and rng.random() < 0.4:
+            start, end, value = intervals.pop(rng.randrange(len(intervals)))
+            tree.remove(start, end, value)
+        else:
+            start = rng.randrange(0, 1440, 10)
+            interval = (start, start + rng.choice([10, 30, 60]), object())
+            tree.insert(*interval)
+            intervals.append(interval)
+
+        # Query edges land on interval edges often, so touching cases are covered
+        start = rng.randrange(0, 1440, 10)
+        end = start + rng.choice([10, 50, 120])
+        assert by_key(tree.overlapping(start, end)) == by_key(brute_overlapping(intervals, start, end))
+    assert len(tree) == len(intervals)
+    assert [interval[:2] for interval in tree] == sorted(interval[:2] for interval in intervals)
+
+
+def test_day_index_keeps_days_apart():
+    index = DayIntervalIndex()
+    index.add("Monday", "09:00", "10:00", "calculus")
+    index.add("Tuesday", "09:00", "10:00", "physics")
+
+    assert index.overlapping("Monday", "09:30", "09:45") == ["calculus"]
+    assert index.overlapping("Monday", "10:00", "11:00") == []
+    assert index.overlapping("Monday", "08:00", "09:00") == []
+    assert index.overlapping("Wednesday", "00:00", "23:59") == []
+    assert len(index) == 2
+
+    index.remove("Monday", "09:00", "10:00", "calculus")
+    assert index.overlapping("Monday", "09:30", "09:45") == []
+    with pytest.raises(ValueError):
+        index.remove("Wednesday", "09:00", "10:00", "calculus")
+    with pytest.raises(ValueError):
+        index.remove("Tuesday", "09:00", "10:00", "calculus")
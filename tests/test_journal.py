@@ -0,0 +1,114 @@
+import os
+import threading
+
+import journal
+from datastore import DataStore
+from journal import Journal, journal_path, compacting_path, replay_journal
+from models import intern_time_slot
+from storage import load_data, build_save_data, save_data_encrypted
+
+COURSES = {
+    "Calculus": [["09:00", "10:00", "Monday"]],
+    "Physics": [["11:00", "12:00", "Tuesday"]],
+}
+
+
+def open_store(path):
+    return DataStore(*load_data(path), path, journal=Journal(path))
+
+
+def edit(store):
+    store.add_person("carol", [store.courses["Physics"]])
+    store.assign_course_to_person("alice", "Physics")
+    store.add_course("Chemistry", [intern_time_slot("08:00", "09:00", "Friday")])
+    store.add_course_slot("Calculus", intern_time_slot("13:00", "14:00", "Wednesday"))
+    store.remove_course_from_person("bob", "Calculus")
+    store.remove_person("bob")
+
+
+def saved(store):
+    return build_save_data(store.people_list, store.courses)
+
+
+def test_edits_are_journalled_not_saved(write_data):
+    path = write_data(COURSES, {"alice": ["Calculus"], "bob": ["Calculus"]})
+    with open(path) as file:
+        snapshot = file.read()
+    store = open_store(path)
+    edit(store)
+
+    with open(path) as file:
+        assert file.read() == snapshot
+    assert os.path.exists(journal_path(path))
+    assert build_save_data(*load_data(path)) == saved(store)
+
+
+def test_replaying_the_journal_twice_changes_nothing(write_data):
+    path = write_data(COURSES, {"alice": ["Calculus"], "bob": ["Calculus"]})
+    store = open_store(path)
+    edit(store)
+
+    people_list, courses = load_data(path)
+    once = build_save_data(people_list, courses)
+    replay_journal(path, people_list, courses)
+    assert build_save_data(people_list, courses) == once == saved(store)
+
+
+def test_journal_left_by_an_interrupted_compaction_replays_cleanly(write_data):
+    path = write_data(COURSES, {"alice": ["Calculus"], "bob": ["Calculus"]})
+    store = open_store(path)
+    edit(store)
+
+    # Crash after the new snapshot was written but before the old journal was removed
+    os.replace(journal_path(path), compacting_path(path))
+    journal.write_snapshot(saved(store), path)
+    assert build_save_data(*load_data(path)) == saved(store)
+
+
+def test_append_during_compaction_is_kept(write_data, monkeypatch):
+    path = write_data(COURSES, {"alice": ["Calculus"], "bob": ["Calculus"]})
+    store = open_store(path)
+    store.add_person("carol")
+
+    started, release = threading.Event(), threading.Event()
+    write_snapshot = journal.write_snapshot
+
+    def slow_write_snapshot(*args, **kwargs):
+        started.set()
+        assert release.wait(5)
+        write_snapshot(*args, **kwargs)
+
+    monkeypatch.setattr(journal, "write_snapshot", slow_write_snapshot)
+    store.journal.compact(store.people_list, store.courses)
+    assert started.wait(5)
+    # Appended while the snapshot is still being written
+    store.assign_course_to_person("carol", "Physics")
+    store.add_person("dave")
+    release.set()
+    store.journal.wait()
+
+    assert not os.path.exists(compacting_path(path))
+    assert build_save_data(*load_data(path)) == saved(store)
+    assert {"carol", "dave"} <= set(build_save_data(*load_data(path))["people"])
+
+
+def test_torn_last_line_is_skipped(write_data):
+    path = write_data(COURSES, {"alice": ["Calculus"]})
+    store = open_store(path)
+    store.add_person("carol")
+    expected = saved(store)
+    with open(journal_path(path), "a") as file:
+        file.write('{"op": "add_person", "na')
+    assert build_save_data(*load_data(path)) == expected
+
+
+def test_encrypted_snapshot_gets_an_encrypted_journal(write_data):
+    path = write_data(COURSES, {"alice": ["Calculus"]})
+    people_list, courses = load_data(path)
+    save_data_encrypted(people_list, courses, path)
+    store = open_store(path)
+    store.add_person("carol", [store.courses["Physics"]])
+
+    with open(journal_path(path)) as file:
+        assert "carol" not in file.read()
+    assert build_save_data(*load_data(path)) == saved(store)
@@ -0,0 +1,157 @@
+import random
+
+import schedule
+from models import Person, intern_time_slot
+from schedule import (
+    DAYS, to_minutes, normalized_busy, unique_schedules, free_count_grid, quorum_free_times,
+    quorum_intervals, invert_busy, to_time, common_free_times
+)
+
+
+def person(name, *slots):
+    return Person(name, [[intern_time_slot(*slot) for slot in slots]])
+
+
+def random_people(rng, count, patterns=5):
+    """People drawn from a few busy patterns, so many of them share one"""
+    shapes = []
+    for _ in range(patterns):
+        shape = []
+        for _ in range(rng.randint(0, 4)):
+            start = rng.randrange(8 * 60, 20 * 60, 5)
+            end = start + rng.choice([15, 50, 60, 120])
+            shape.append((to_time(start), to_time(end), rng.choice(DAYS[:3])))
+        shapes.append(shape)
+    return [person(f"P{i}", *rng.choice(shapes)) for i in range(count)]
+
+
+def test_equal_busy_times_share_a_fingerprint():
+    # Same minutes busy: order, a duplicate and a split into touching slots do not matter
+    alice = person("alice", ("09:00", "11:00", "Monday"), ("14:00", "15:00", "Tuesday"))
+    bob = person("bob", ("14:00", "15:00", "Tuesday"), ("10:00", "11:00", "Monday"),
+                 ("09:00", "10:00", "Monday"), ("14:00", "15:00", "Tuesday"))
+    carol = person("carol", ("09:00", "11:00", "Monday"), ("14:00", "15:30", "Tuesday"))
+
+    assert normalized_busy(alice.busy_time.values()) == (
+        ("Monday", 540, 660), ("Tuesday", 840, 900),
+    )
+    assert alice.busy_fingerprint() == bob.busy_fingerprint() != carol.busy_fingerprint()
+
+
+def test_unique_schedules_groups_people_with_their_counts():
+    alice = person("alice", ("09:00", "10:00", "Monday"))
+    bob = person("bob", ("13:00", "14:00", "Friday"))
+    carol = person("carol", ("09:00", "09:30", "Monday"), ("09:30", "10:00", "Monday"))
+    dave = person("dave")
+    erin = person("erin")
+
+    groups = unique_schedules([alice, bob, carol, dave, erin])
+    assert [[p.name for p in group] for group in groups] == [
+        ["alice", "carol"], ["bob"], ["dave", "erin"],
+    ]
+
+
+def unweighted_grid(people_list, days, start, end, step):
+    """free_count_grid computed person by person"""
+    start_m, end_m = to_minutes(start), to_minutes(end)
+    bucket_count = -(-(end_m - start_m) // step)
+    grid = {}
+    for day in days:
+        counts = []
+        for bucket in range(bucket_count):
+            low = start_m + bucket * step
+            high = low + step
+            counts.append(sum(
+                not any(
+                    d == day and to_minutes(s) < high and to_minutes(e) > low
+                    for s, e, d in p.busy_time.values()
+                )
+                for p in people_list
+            ))
+        grid[day] = counts
+    return grid
+
+
+def test_free_count_grid_matches_counting_everyone():
+    rng = random.Random(0)
+    people = random_people(rng, 120)
+    assert len(unique_schedules(people)) <= 5
+
+    for start, end, step in [("09:00", "23:00", 10), ("08:05", "20:00", 15), ("00:00", "24:00", 30)]:
+        assert free_count_grid(people, DAYS, start, end, step) == unweighted_grid(
+            people, DAYS, start, end, step
+        )
+
+
+def test_quorum_over_unique_schedules_matches_everyone():
+    rng = random.Random(1)
+    people = random_people(rng, 60)
+    for day in DAYS[:3]:
+        free_lists = [invert_busy(list(p.busy_time.values()), day, "09:00", "23:00") for p in people]
+        expected = [(to_time(s), to_time(e), n) for s, e, n in quorum_intervals(free_lists, 40)]
+        assert quorum_free_times(people, day, 40) == expected
+
+
+def counting_calls(monkeypatch):
+    """Count the calls common_free_times makes to the uncached computation"""
+    calls = []
+    compute = schedule._common_free_times
+
+    def counted(*args):
+        calls.append(args)
+        return compute(*args)
+
+    monkeypatch.setattr(schedule, "_common_free_times", counted)
+    return calls
+
+
+def test_common_free_times_reuses_a_cached_result(monkeypatch):
+    schedule.clear_free_times_cache()
+    calls = counting_calls(monkeypatch)
+    people = [person("alice", ("09:00", "10:00", "Monday")), person("bob", ("12:00", "13:00", "Monday"))]
+
+    first = common_free_times(people, "Monday")
+    # The same group in another order is the same key
+    second = common_free_times(list(reversed(people)), "Monday")
+    assert first == second == [("10:00", "12:00"), ("13:00", "23:00")]
+    assert len(calls) == 1
+    # Callers get their own copy
+    second.clear()
+    assert common_free_times(people, "Monday") == first
+    assert len(calls) == 1
+
+    common_free_times(people, "Tuesday")
+    common_free_times(people, "Monday", "08:00", "12:00")
+    assert len(calls) == 3
+
+
+def test_a_schedule_change_invalidates_the_cached_result(monkeypatch):
+    schedule.clear_free_times_cache()
+    calls = counting_calls(monkeypatch)
+    alice = person("alice", ("09:00", "10:00", "Monday"))
+    bob = person("bob")
+    assert common_free_times([alice, bob], "Monday") == [("10:00", "23:00")]
+
+    alice.schedule = [[intern_time_slot("09:00", "11:00", "Monday")]]
+    alice.busy_time = alice._create_busy_time_dict()
+    assert common_free_times([alice, bob], "Monday") == [("11:00", "23:00")]
+    assert len(calls) == 2
+    assert common_free_times([alice, bob], "Monday") == [("11:00", "23:00")]
+    assert len(calls) == 2
+
+
+def test_the_least_recently_used_result_is_evicted(monkeypatch):
+    schedule.clear_free_times_cache()
+    calls = counting_calls(monkeypatch)
+    people = [person(f"P{i}") for i in range(schedule.FREE_TIMES_CACHE_SIZE + 1)]
+
+    for p in people:
+        common_free_times([p], "Monday")
+    assert len(schedule._free_times_cache) == schedule.FREE_TIMES_CACHE_SIZE
+    assert len(calls) == schedule.FREE_TIMES_CACHE_SIZE + 1
+
+    # P1 is still cached; P0 was evicted by the last insert
+    common_free_times([people[1]], "Monday")
+    assert len(calls) == schedule.FREE_TIMES_CACHE_SIZE + 1
+    common_free_times([people[0]], "Monday")
+    assert len(calls) == schedule.FREE_TIMES_CACHE_SIZE + 2
@@ -0,0 +1,120 @@
+import itertools
+import random
+
+import pytest
+
+from models import Person, intern_time_slot
+from schedule import DAYS, window_mask
+from sections import optimize_sections, section_choices, slots_mask
+
+PERIODS = [("09:00", "10:00"), ("10:00", "11:00"), ("11:00", "12:00"), ("13:00", "14:00")]
+
+
+def random_instance(rng, course_count=4, people_count=3):
+    """Courses with 1-3 sections each ("Course i (CODEi0s)") and people taking
+    some of them, a few with a personal period"""
+    courses = {}
+    for i in range(course_count):
+        for section in range(1, rng.randint(1, 3) + 1):
+            slots = [
+                intern_time_slot(*rng.choice(PERIODS), rng.choice(DAYS[:2]))
+                for _ in range(rng.randint(1, 2))
+            ]
+            courses[f"Course {i} (CODE{i}{section:02d})"] = slots
+    by_course = {}
+    for name in courses:
+        by_course.setdefault(name.split(" (")[0], []).append(name)
+    people = []
+    for p in range(people_count):
+        taken = rng.sample(sorted(by_course), rng.randint(1, 3))
+        schedule = [courses[rng.choice(by_course[course])] for course in taken]
+        if rng.random() < 0.4:
+            schedule.append([intern_time_slot(*rng.choice(PERIODS), rng.choice(DAYS[:2]))])
+        people.append(Person(f"P{p}", schedule))
+    return people, courses
+
+
+def brute_force(people, courses, days, start, end):
+    """Most free minutes over every section assignment in which no switched
+    section clashes with the person's other courses, periods or sections"""
+    choices = section_choices(people, courses)
+    window = window_mask(days, start, end)
+    names = {id(slots): name for name, slots in courses.items()}
+    switchable = {(id(person), current) for person, current, _ in choices}
+    fixed = {
+        id(person): [
+            slots_mask(group) for group in person.schedule
+            if (id(person), names.get(id(group))) not in switchable
+        ]
+        for person in people
+    }
+    best = None
+    for picked in itertools.product(*[sections for _, _, sections in choices]):
+        valid = True
+        for i, ((person, current, _), name) in enumerate(zip(choices, picked)):
+            if name == current:
+                continue
+            others = fixed[id(person)] + [
+                slots_mask(courses[other])
+                for j, ((owner, _, _), other) in enumerate(zip(choices, picked))
+                if owner is person and j != i
+            ]
+            if any(slots_mask(courses[name]) & mask for mask in others):
+                valid = False
+                break
+        if not valid:
+            continue
+        free = window
+        for person in people:
+            for mask in fixed[id(person)]:
+                free &= ~mask
+        for name in picked:
+            free &= ~slots_mask(courses[name])
+        if best is None or free.bit_count() > best:
+            best = free.bit_count()
+    return best
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_brute_force_on_small_instances(seed):
+    rng = random.Random(seed)
+    people, courses = random_instance(rng)
+    days = [rng.choice(DAYS[:2])] if rng.random() < 0.5 else DAYS
+    start, end = ("09:00", "14:00") if rng.random() < 0.5 else ("09:00", "23:00")
+
+    result = optimize_sections(people, courses, days=days, start=start, end=end)
+    assert result["free_minutes"] == brute_force(people, courses, days, start, end)
+    assert result["free_minutes"] >= result["baseline_minutes"]
+
+
+def test_switches_to_the_section_that_frees_the_group():
+    courses = {
+        "Calculus (MATH10101)": [intern_time_slot("09:00", "10:00", "Monday")],
+        "Calculus (MATH10102)": [intern_time_slot("13:00", "14:00", "Monday")],
+        "Physics (PHYS10101)": [intern_time_slot("13:00", "14:00", "Monday")],
+    }
+    people = [
+        Person("alice", [courses["Calculus (MATH10101)"]]),
+        Person("bob", [courses["Physics (PHYS10101)"]]),
+    ]
+    result = optimize_sections(people, courses, days=["Monday"], start="09:00", end="15:00")
+    assert result["changes"] == [("alice", "Calculus (MATH10101)", "Calculus (MATH10102)")]
+    assert result["free_minutes"] == 5 * 60
+
+
+def test_keeps_the_current_section_when_no_clash_free_alternative_exists():
+    courses = {
+        "Calculus (MATH10101)": [intern_time_slot("09:00", "10:00", "Monday")],
+        "Calculus (MATH10102)": [intern_time_slot("13:00", "14:00", "Monday")],
+        "Calculus (MATH10103)": [intern_time_slot("15:00", "16:00", "Monday")],
+        "Physics (PHYS10101)": [intern_time_slot("13:00", "14:00", "Monday")],
+    }
+    period = [intern_time_slot("15:00", "16:00", "Monday")]
+    people = [
+        # Every other section clashes with alice's Physics or her personal period
+        Person("alice", [courses["Calculus (MATH10101)"], courses["Physics (PHYS10101)"], period]),
+        Person("bob", []),
+    ]
+    result = optimize_sections(people, courses, days=["Monday"], start="09:00", end="17:00")
+    assert result["changes"] == []
+    assert result["free_minutes"] == result["baseline_minutes"] == 5 * 60
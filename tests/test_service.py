@@ -0,0 +1,66 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from service import ScheduleService, QueryHandler
+
+COURSES = {
+    "Calculus": [["09:00", "10:00", "Monday"]],
+    "Physics": [["11:00", "12:00", "Monday"]],
+}
+
+
+@pytest.fixture
+def service(write_data):
+    path = write_data(COURSES, {"alice": ["Calculus"], "bob": ["Physics"], "carol": []})
+    return ScheduleService(path)
+
+
+@pytest.fixture
+def url(service):
+    handler = type("BoundQueryHandler", (QueryHandler,), {"service": service})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def post(url, body):
+    request = urllib.request.Request(url, data=body.encode(), method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_queries_over_everyone_report_a_count(service):
+    result = service.query("/common", {"day": "Monday"})
+    assert result == {"count": 3, "days": {"Monday": [["10:00", "11:00"], ["12:00", "23:00"]]}}
+
+    result = service.query("/quorum", {"day": "Monday", "min": "2", "people": "alice,carol"})
+    assert result["people"] == ["alice", "carol"]
+    assert result["count"] == 2
+
+
+def test_reload_precomputes_free_intervals(service):
+    assert set(service.index.free) == set(service.index.fingerprints.values())
+
+
+@pytest.mark.parametrize("body", ["[]", '"x"', "3", "null"])
+def test_post_body_that_is_not_an_object_is_rejected(url, body):
+    status, payload = post(f"{url}/common", body)
+    assert status == 400
+    assert payload == {"error": "Request body must be a JSON object"}
+
+
+def test_post_query(url):
+    status, payload = post(f"{url}/common", json.dumps({"day": "Monday", "people": ["alice"]}))
+    assert status == 200
+    assert payload == {"people": ["alice"], "count": 1, "days": {"Monday": [["10:00", "23:00"]]}}
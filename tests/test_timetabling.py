@@ -0,0 +1,113 @@
+import itertools
+import random
+
+import pytest
+
+from models import Person, intern_time_slot
+from timetabling import (
+    conflict_graph, greedy_coloring, conflicting_pairs, local_search, solve_timetable
+)
+
+
+def make_data(course_count, schedules):
+    """(people_list, courses) where person i takes the courses numbered in schedules[i]"""
+    courses = {
+        f"C{i}": [intern_time_slot("09:00", "10:00", "Monday")] for i in range(course_count)
+    }
+    people = [
+        Person(f"P{i}", [courses[f"C{c}"] for c in taken]) for i, taken in enumerate(schedules)
+    ]
+    return people, courses
+
+
+def clashing_people(people_list, courses, assignment):
+    """Names of people with two events in the same slot"""
+    names = {id(slots): name for name, slots in courses.items()}
+    clashing = []
+    for person in people_list:
+        taken = [assignment[names[id(group)]] for group in person.schedule]
+        if len(taken) != len(set(taken)):
+            clashing.append(person.name)
+    return clashing
+
+
+def cycle(n):
+    return [(i, (i + 1) % n) for i in range(n)]
+
+
+@pytest.mark.parametrize("course_count, edges, colours", [
+    (6, cycle(6), 2),
+    (7, cycle(7), 3),
+    # A tree, and a complete bipartite graph
+    (7, [(0, 1), (0, 2), (1, 3), (1, 4), (2, 5), (2, 6)], 2),
+    (6, [(a, b) for a in range(3) for b in range(3, 6)], 2),
+    (5, list(itertools.combinations(range(5), 2)), 5),
+])
+def test_dsatur_uses_the_fewest_colours_on_graphs_it_solves_exactly(course_count, edges, colours):
+    people, courses = make_data(course_count, edges)
+    adjacency = conflict_graph(people, courses, list(courses))
+    colors, members = greedy_coloring(adjacency, 10)
+
+    assert len(set(colors)) == colours
+    assert conflicting_pairs(adjacency, members) == 0
+    assert all(colors[a] != colors[b] for a, b in edges)
+
+
+def planted_instance(seed, slot_count=3, course_count=90, people_count=250):
+    """Random data with a known clash-free timetable: every course is given a
+    slot and people only take courses given different slots"""
+    rng = random.Random(seed)
+    planted = [rng.randrange(slot_count) for _ in range(course_count)]
+    by_slot = [[c for c in range(course_count) if planted[c] == slot] for slot in range(slot_count)]
+    schedules = [
+        [rng.choice(by_slot[slot]) for slot in rng.sample(range(slot_count), 2)]
+        for _ in range(people_count)
+    ]
+    return make_data(course_count, schedules)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_solver_finds_a_clash_free_timetable_when_one_exists(seed):
+    people, courses = planted_instance(seed)
+    slots = ["Slot 1", "Slot 2", "Slot 3"]
+
+    result = solve_timetable(people, courses, slots, seed=seed)
+    assert result["conflicts"] == []
+    assert result["affected_people"] == 0
+    assert clashing_people(people, courses, result["assignment"]) == []
+    assert not result["unavoidable"]
+
+
+def test_local_search_removes_the_clashes_greedy_colouring_leaves():
+    people, courses = planted_instance(0)
+    adjacency = conflict_graph(people, courses, list(courses))
+    colors, members = greedy_coloring(adjacency, 3)
+    assert conflicting_pairs(adjacency, members)
+
+    colors = local_search(adjacency, colors, members, seed=0)
+    improved = [0] * 3
+    for v, color in enumerate(colors):
+        improved[color] |= 1 << v
+    assert conflicting_pairs(adjacency, improved) == 0
+
+
+def test_unavoidable_clashes_are_reported():
+    # Five courses that all share students cannot fit in four slots
+    edges = list(itertools.combinations(range(5), 2))
+    people, courses = make_data(6, edges + [(5,)])
+    result = solve_timetable(people, courses, ["A", "B", "C", "D"])
+
+    assert result["unavoidable"]
+    assert sorted(result["clique"]) == ["C0", "C1", "C2", "C3", "C4"]
+    # The best possible timetable puts exactly one pair together
+    assert len(result["conflicts"]) == 1
+    assert result["conflicts"][0]["people"] == 1
+    assert result["affected_people"] == len(clashing_people(people, courses, result["assignment"])) == 1
+
+
+def test_unknown_course_and_no_slots_are_rejected():
+    people, courses = make_data(2, [(0, 1)])
+    with pytest.raises(ValueError):
+        solve_timetable(people, courses, [])
+    with pytest.raises(ValueError):
+        solve_timetable(people, courses, ["A"], course_names=["C9"])
@@ -0,0 +1,105 @@
+import pytest
+
+from datastore import DataStore, PEOPLE, SCHEDULES
+from models import Person, intern_time_slot
+
+
+def make_store(**kwargs):
+    courses = {
+        "Calculus": [intern_time_slot("09:00", "10:00", "Monday")],
+        "Physics": [intern_time_slot("11:00", "12:00", "Tuesday")],
+    }
+    people = [
+        Person("alice", [courses["Calculus"]]),
+        Person("bob", [courses["Calculus"], courses["Physics"]]),
+    ]
+    return DataStore(people, courses, **kwargs)
+
+
+def snapshot(store):
+    """Everything a rollback must restore, by value"""
+    return {
+        "people": [(person.name, [list(group) for group in person.schedule]) for person in store.people_list],
+        "busy": {person.name: dict(person.busy_time) for person in store.people_list},
+        "courses": {name: list(slots) for name, slots in store.courses.items()},
+        "by_name": {name: person.name for name, person in store.people.items()},
+        "enrolled": {name: store.get_people_in_course(name) for name in store.courses},
+    }
+
+
+def test_rollback_restores_busy_time_and_indexes():
+    store = make_store()
+    before = snapshot(store)
+
+    with pytest.raises(RuntimeError):
+        with store.transaction():
+            store.add_person("carol", [store.courses["Physics"]])
+            store.remove_person("alice")
+            store.update_course("Calculus", [intern_time_slot("15:00", "16:00", "Friday")])
+            store.remove_course_from_person("bob", "Physics")
+            store.add_course("Chemistry", [intern_time_slot("08:00", "09:00", "Monday")])
+            raise RuntimeError("abort")
+
+    assert snapshot(store) == before
+    assert store.get_person("carol") is None
+    assert store.get_person("alice").name == "alice"
+    assert store.course_name(store.courses["Calculus"]) == "Calculus"
+    assert store.is_enrolled("bob", "Physics")
+    assert "Chemistry" not in store.courses
+
+
+def test_failed_mutation_leaves_the_store_unchanged():
+    store = make_store()
+    before = snapshot(store)
+    with pytest.raises(ValueError):
+        store.add_personal_period("alice", [intern_time_slot("09:30", "10:30", "Monday")])
+    assert snapshot(store) == before
+
+
+def test_failed_nested_transaction_only_undoes_its_own_changes():
+    store = make_store()
+    with store.transaction():
+        store.add_person("carol")
+        with pytest.raises(RuntimeError):
+            with store.transaction():
+                store.add_course("Chemistry", [intern_time_slot("08:00", "09:00", "Monday")])
+                store.add_person("dave", [store.courses["Chemistry"]])
+                raise RuntimeError("bad file")
+
+    assert [person.name for person in store.people_list] == ["alice", "bob", "carol"]
+    assert "Chemistry" not in store.courses
+    assert store.get_person("dave") is None
+
+
+def test_commit_rebuilds_busy_time_once_per_person():
+    store = make_store()
+    bob = store.get_person("bob")
+    with store.transaction():
+        store.remove_course_from_person("bob", "Physics")
+        store.add_course_slot("Calculus", intern_time_slot("13:00", "14:00", "Wednesday"))
+        # Deferred until commit
+        assert ("11:00", "12:00", "Tuesday") in bob.busy_time.values()
+    assert sorted(bob.busy_time.values()) == [
+        ("09:00", "10:00", "Monday"), ("13:00", "14:00", "Wednesday"),
+    ]
+
+
+def test_failed_save_rolls_the_transaction_back():
+    def saver(people_list, courses, data_file):
+        raise OSError("disk full")
+
+    store = make_store(data_file="unused.json", saver=saver)
+    before = snapshot(store)
+    with pytest.raises(OSError):
+        store.add_person("carol")
+    assert snapshot(store) == before
+
+
+def test_subscribers_get_the_change_kinds():
+    store = make_store()
+    seen = []
+    store.subscribe(seen.append)
+    with store.transaction():
+        store.add_person("carol")
+        store.assign_course_to_person("carol", "Physics")
+    assert seen == [{PEOPLE, SCHEDULES}]
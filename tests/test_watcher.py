@@ -0,0 +1,90 @@
+import json
+import os
+import threading
+
+from datastore import DataStore
+from journal import Journal
+from storage import load_data, build_save_data
+from watcher import FileWatcher, apply_file_changes, count_changes
+
+COURSES = {
+    "Calculus": [["09:00", "10:00", "Monday"]],
+    "Physics": [["11:00", "12:00", "Tuesday"]],
+}
+
+
+def rewrite(path, courses, people):
+    """Replace the file the way another program would, with a new mtime"""
+    with open(path, "w") as file:
+        json.dump({"courses": courses, "people": people}, file)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_external_change_is_reported_once(write_data):
+    path = write_data(COURSES, {"alice": ["Calculus"]})
+    watcher = FileWatcher(path)
+    assert not watcher.changed()
+
+    rewrite(path, COURSES, {"alice": ["Calculus"], "bob": []})
+    assert watcher.changed()
+    assert not watcher.changed()
+
+
+def test_own_writes_are_ignored(write_data):
+    path = write_data(COURSES, {"alice": ["Calculus"]})
+    store = DataStore(*load_data(path), path, journal=Journal(path))
+    watcher = FileWatcher(path)
+
+    store.assign_course_to_person("alice", "Physics")
+    assert not watcher.changed()
+    store.journal.compact(store.people_list, store.courses, background=False)
+    assert not watcher.changed()
+
+
+def test_forget_makes_the_next_check_report_a_change(write_data):
+    path = write_data(COURSES, {"alice": []})
+    watcher = FileWatcher(path)
+    watcher.forget()
+    assert watcher.changed()
+    assert not watcher.changed()
+
+
+def test_failed_reload_is_retried_on_the_next_poll(write_data):
+    path = write_data(COURSES, {"alice": []})
+    calls = []
+    reloaded = threading.Event()
+
+    def on_change():
+        calls.append(len(calls))
+        if len(calls) == 1:
+            raise ValueError("half-written file")
+        reloaded.set()
+
+    watcher = FileWatcher(path, on_change, interval=0.01)
+    stop_event = watcher.start()
+    try:
+        rewrite(path, COURSES, {"alice": [], "bob": []})
+        assert reloaded.wait(5)
+    finally:
+        stop_event.set()
+    assert calls[:2] == [0, 1]
+
+
+def test_apply_file_changes_makes_the_store_match_the_file(write_data):
+    path = write_data(COURSES, {"alice": ["Calculus"], "bob": ["Physics"]})
+    store = DataStore(*load_data(path))
+    alice = store.get_person("alice")
+
+    courses = dict(COURSES, Physics=[["13:00", "14:00", "Tuesday"]], Chemistry=[])
+    del courses["Calculus"]
+    rewrite(path, courses, {"alice": ["Chemistry"], "carol": ["Physics"]})
+    people_list, new_courses = load_data(path)
+    summary = apply_file_changes(store, people_list, new_courses)
+
+    assert build_save_data(store.people_list, store.courses) == build_save_data(people_list, new_courses)
+    assert store.get_person("alice") is alice
+    assert summary["courses"] == {"added": ["Chemistry"], "removed": ["Calculus"], "changed": ["Physics"]}
+    assert summary["people"]["removed"] == ["bob"]
+    assert summary["people"]["added"] == ["carol"]
+    assert count_changes(apply_file_changes(store, people_list, new_courses)) == 0
@@ -0,0 +1,211 @@
+"""
+Timetabling - place one event per course (e.g. an exam) into a fixed set of
+time slots so that nobody enrolled has two events at once
+
+Courses are vertices of a conflict graph (an edge means someone takes both)
+stored as one int bitset per course. A DSatur-style greedy colouring limited
+to the available slots gives a first timetable; a tabu local search then
+moves conflicting courses to the slot where they clash least. A greedy
+clique gives a lower bound: if it is larger than the number of slots, some
+conflicts cannot be avoided.
+"""
+
+import heapq
+import random
+
+from instrumentation import timed
+
+
+def _bits(mask):
+    """Indices of the set bits of mask"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def conflict_graph(people_list, courses, course_names):
+    """Adjacency bitsets over course_names; bit j of entry i means i and j share someone"""
+    index = {id(courses[name]): i for i, name in enumerate(course_names)}
+    adjacency = [0] * len(course_names)
+    for person in people_list:
+        taken = [index[id(group)] for group in person.schedule if id(group) in index]
+        if len(taken) < 2:
+            continue
+        mask = 0
+        for i in taken:
+            mask |= 1 << i
+        for i in taken:
+            adjacency[i] |= mask
+    for i in range(len(adjacency)):
+        adjacency[i] &= ~(1 << i)
+    return adjacency
+
+
+def greedy_coloring(adjacency, slot_count):
+    """DSatur colouring into at most slot_count colours (clashing where unavoidable)"""
+    n = len(adjacency)
+    colors = [-1] * n
+    members = [0] * slot_count
+    saturation = [0] * n  # bitset of colours used by coloured neighbours
+    degree = [mask.bit_count() for mask in adjacency]
+
+    heap = [(0, -degree[v], v) for v in range(n)]
+    heapq.heapify(heap)
+    while heap:
+        negative_saturation, _, v = heapq.heappop(heap)
+        if colors[v] != -1 or -negative_saturation != saturation[v].bit_count():
+            continue  # already coloured or a stale entry
+
+        free = ~saturation[v] & ((1 << slot_count) - 1)
+        if free:
+            color = (free & -free).bit_length() - 1
+        else:
+            color = min(range(slot_count), key=lambda c: (adjacency[v] & members[c]).bit_count())
+        colors[v] = color
+        members[color] |= 1 << v
+
+        bit = 1 << color
+        for u in _bits(adjacency[v]):
+            if colors[u] == -1 and not saturation[u] & bit:
+                saturation[u] |= bit
+                heapq.heappush(heap, (-saturation[u].bit_count(), -degree[u], u))
+    return colors, members
+
+
+def conflicting_pairs(adjacency, members):
+    """Number of conflict-graph edges whose ends share a colour"""
+    total = 0
+    for color_members in members:
+        for v in _bits(color_members):
+            total += (adjacency[v] & color_members).bit_count()
+    return total // 2
+
+
+def local_search(adjacency, colors, members, iterations=5000, tenure=7, sample=24, seed=0):
+    """Tabu search moving conflicting vertices to their least-clashing colour"""
+    rng = random.Random(seed)
+    slot_count = len(members)
+    conflicts = [(adjacency[v] & members[colors[v]]).bit_count() for v in range(len(colors))]
+    conflicted = {v for v, count in enumerate(conflicts) if count}
+    total = sum(conflicts) // 2
+    best_total, best_colors = total, list(colors)
+    tabu = {}
+
+    for step in range(iterations):
+        if not conflicted or slot_count < 2:
+            break
+
+        # Best non-tabu move among a sample of conflicting vertices
+        best_move = None
+        candidates = tuple(conflicted)
+        if len(candidates) > sample:
+            candidates = rng.sample(candidates, sample)
+        for v in candidates:
+            for color in range(slot_count):
+                if color == colors[v]:
+                    continue
+                delta = (adjacency[v] & members[color]).bit_count() - conflicts[v]
+                # Tabu moves are allowed only if they beat the best timetable so far
+                if tabu.get((v, color), -1) > step and total + delta >= best_total:
+                    continue
+                if best_move is None or delta < best_move[0] or (delta == best_move[0] and rng.random() < 0.3):
+                    best_move = (delta, v, color)
+        if best_move is None:
+            continue
+
+        delta, v, color = best_move
+        current = colors[v]
+        members[current] &= ~(1 << v)
+        for u in _bits(adjacency[v] & members[current]):
+            conflicts[u] -= 1
+            if not conflicts[u]:
+                conflicted.discard(u)
+        for u in _bits(adjacency[v] & members[color]):
+            conflicts[u] += 1
+            conflicted.add(u)
+        members[color] |= 1 << v
+        colors[v] = color
+        conflicts[v] = (adjacency[v] & members[color]).bit_count()
+        if conflicts[v]:
+            conflicted.add(v)
+        else:
+            conflicted.discard(v)
+        tabu[(v, current)] = step + tenure + rng.randrange(3)
+
+        total += delta
+        if total < best_total:
+            best_total, best_colors = total, list(colors)
+
+    return best_colors
+
+
+def greedy_clique(adjacency, tries=10):
+    """A large clique (everyone in it needs a different slot), as vertex indices"""
+    order = sorted(range(len(adjacency)), key=lambda v: -adjacency[v].bit_count())
+    best = []
+    for start in order[:tries]:
+        clique = [start]
+        candidates = adjacency[start]
+        while candidates:
+            v = max(_bits(candidates), key=lambda u: (adjacency[u] & candidates).bit_count())
+            clique.append(v)
+            candidates &= adjacency[v]
+        if len(clique) > len(best):
+            best = clique
+    return best
+
+
+@timed("timetabling.solve_timetable")
+def solve_timetable(people_list, courses, slots, course_names=None, iterations=5000, seed=0):
+    """Assign each course one of `slots` so that as few people as possible have two at once.
+
+    Returns a dict with the assignment (course -> slot), the remaining
+    conflicts (course pair, slot, people affected), the number of people
+    affected and a clique that bounds how many slots a clash-free timetable needs.
+    """
+    if not slots:
+        raise ValueError("At least one time slot is required")
+    if course_names is None:
+        course_names = list(courses)
+    for name in course_names:
+        if name not in courses:
+            raise ValueError(f"Course '{name}' not found")
+
+    adjacency = conflict_graph(people_list, courses, course_names)
+    colors, members = greedy_coloring(adjacency, len(slots))
+    if conflicting_pairs(adjacency, members):
+        colors = local_search(adjacency, colors, members, iterations, seed=seed)
+
+    assignment = {name: slots[color] for name, color in zip(course_names, colors)}
+
+    # Count the people who still have two events in the same slot
+    index = {id(courses[name]): name for name in course_names}
+    pair_counts = {}
+    affected = 0
+    for person in people_list:
+        by_slot = {}
+        for group in person.schedule:
+            name = index.get(id(group))
+            if name is not None:
+                by_slot.setdefault(assignment[name], []).append(name)
+        clashing = False
+        for slot, names in by_slot.items():
+            for i in range(len(names)):
+                for j in range(i + 1, len(names)):
+                    key = (*sorted((names[i], names[j])), slot)
+                    pair_counts[key] = pair_counts.get(key, 0) + 1
+                    clashing = True
+        affected += clashing
+
+    clique = [course_names[v] for v in greedy_clique(adjacency)]
+    return {
+        "assignment": assignment,
+        "conflicts": [
+            {"courses": [first, second], "slot": slot, "people": count}
+            for (first, second, slot), count in sorted(pair_counts.items(), key=lambda item: -item[1])
+        ],
+        "affected_people": affected,
+        "clique": clique,
+        "unavoidable": len(clique) > len(slots),
+    }
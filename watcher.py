@@ -0,0 +1,151 @@
+"""
+File watching - pick up changes other programs make to the data file
+
+When another process (e.g. a nightly import job) rewrites the data file, the
+new file is parsed and compared with the data already in memory by name:
+courses by their set of time slots, people by the set of course names they
+take. Only the differences are applied, through a DataStore transaction
+that is not saved again, so open views and per-person caches are kept for
+everything that did not change.
+
+FileWatcher polls the data file and its journal from a background thread
+(for the query service and other long-running scripts); the GUI drives the
+same check from a QFileSystemWatcher. Writes made by this process (saves,
+journal appends, compactions) are recognised and ignored.
+"""
+
+import sys
+import threading
+
+from storage import load_data, file_state, is_own_write
+from journal import journal_files
+from instrumentation import timed
+
+
+def watched_files(data_file):
+    """The data file and the journal files load_data replays over it"""
+    return [data_file] + journal_files(data_file)
+
+
+def watched_state(data_file):
+    return tuple(file_state(path) for path in watched_files(data_file))
+
+
+@timed("watcher.apply_file_changes")
+def apply_file_changes(store, people_list, courses, overlap_index=None):
+    """Make a DataStore match freshly loaded people and courses, changing only what differs.
+
+    The changes are not saved (they came from the file). Personal periods,
+    which the file does not hold, are kept. Returns a dict of the names
+    added, removed and changed, per "people" and "courses".
+    """
+    summary = {
+        "courses": {"added": [], "removed": [], "changed": []},
+        "people": {"added": [], "removed": [], "changed": []},
+    }
+    removed_courses = [name for name in store.courses if name not in courses]
+    file_names = {id(slots): name for name, slots in courses.items()}
+
+    with store.transaction(persist=False):
+        for name, slots in courses.items():
+            if name not in store.courses:
+                store.add_course(name, list(slots), overlap_index)
+                summary["courses"]["added"].append(name)
+            elif set(store.courses[name]) != set(slots):
+                # Time slots are interned, so equal slots are the same objects
+                store.update_course(name, slots, overlap_index)
+                summary["courses"]["changed"].append(name)
+
+        wanted_people = {person.name for person in people_list}
+        for person in list(store.people_list):
+            if person.name not in wanted_people:
+                store.remove_person(person.name)
+                summary["people"]["removed"].append(person.name)
+
+        for person in people_list:
+            wanted = [file_names[id(group)] for group in person.schedule if id(group) in file_names]
+            current = store.get_person(person.name)
+            if current is None:
+                store.add_person(person.name, [store.courses[name] for name in wanted])
+                summary["people"]["added"].append(person.name)
+                continue
+            taken = store.person_course_names(current)
+            dropped = [name for name in taken if name not in wanted and name in courses]
+            joined = [name for name in wanted if name not in taken]
+            for name in dropped:
+                store.remove_course_from_person(person.name, name)
+            for name in joined:
+                store.assign_course_to_person(person.name, name, allow_conflicts=True)
+            if dropped or joined:
+                summary["people"]["changed"].append(person.name)
+
+        # Removing a course also takes it out of the schedules that still have it
+        for name in removed_courses:
+            store.remove_course(name, overlap_index)
+            summary["courses"]["removed"].append(name)
+    return summary
+
+
+def count_changes(summary):
+    """Total number of names in an apply_file_changes summary"""
+    return sum(len(names) for kinds in summary.values() for names in kinds.values())
+
+
+class FileWatcher:
+    """Notices when the data file or its journal is changed by another program"""
+
+    def __init__(self, data_file, on_change=None, interval=2.0):
+        self.data_file = data_file
+        self.on_change = on_change
+        self.interval = interval
+        self.state = watched_state(data_file)
+
+    def changed(self):
+        """True if the files changed since the last check and this process did not write them"""
+        state = watched_state(self.data_file)
+        if state == self.state:
+            return False
+        previous, self.state = self.state, state
+        if previous is None:
+            # After forget(), e.g. a reload that failed
+            return True
+        changed = [
+            (path, new)
+            for path, old, new in zip(watched_files(self.data_file), previous, state)
+            if old != new
+        ]
+        return not all(is_own_write(path, new) for path, new in changed)
+
+    def forget(self):
+        """Make the next check report a change, e.g. to retry a reload that failed"""
+        self.state = None
+
+    def check(self):
+        """Call on_change() if changed(); returns True if it was called"""
+        if not self.changed():
+            return False
+        self.on_change()
+        return True
+
+    def start(self, stop_event=None):
+        """Poll every `interval` seconds in a background thread until stop_event is set"""
+        stop_event = stop_event or threading.Event()
+
+        def poll():
+            while not stop_event.wait(self.interval):
+                try:
+                    self.check()
+                except Exception as e:
+                    # Half-written files are retried on the next poll
+                    print(f"reload of {self.data_file} failed: {e}", file=sys.stderr)
+                    self.forget()
+
+        thread = threading.Thread(target=poll, name="data-file-watcher", daemon=True)
+        thread.start()
+        return stop_event
+
+
+def reload_store(store, data_file, overlap_index=None):
+    """Load data_file and apply its differences to store; returns the summary"""
+    people_list, courses = load_data(data_file)
+    return apply_file_changes(store, people_list, courses, overlap_index)